@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from monitoring.metrics import render_metrics
+from service.task_service import get_pool_stats_service, get_cache_stats_service
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition format, version 0.0.4."""
+    return PlainTextResponse(
+        render_metrics(get_pool_stats_service().dict(), get_cache_stats_service().dict()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
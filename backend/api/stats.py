@@ -1,12 +1,27 @@
-from fastapi import APIRouter
-from service.task_service import get_stats_service
-from dto.task import TaskStats
+from fastapi import APIRouter, Header, Response, status
+from typing import Optional
+from service.async_task_service import get_stats_service
+from service.task_cache import etag_matches
+from service.task_service import get_pool_stats_service, get_cache_stats_service, get_stats_etag
+from dto.task import TaskStats, PoolStats, CacheStats
 
 router = APIRouter(tags=["stats"])
 
 @router.get("/stats/", response_model=TaskStats)
-def get_stats():
-    return get_stats_service()
+async def get_stats(response: Response, if_none_match: Optional[str] = Header(None)):
+    etag = get_stats_etag()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return await get_stats_service()
+
+@router.get("/stats/db-pool", response_model=PoolStats)
+def get_pool_stats():
+    return get_pool_stats_service()
+
+@router.get("/stats/cache", response_model=CacheStats)
+def get_cache_stats():
+    return get_cache_stats_service()
 
 def root_info():
     return {
@@ -15,11 +30,20 @@ def root_info():
         "description": "A simple task management API",
         "endpoints": {
             "GET /": "This information",
-            "GET /tasks/": "Get all tasks",
+            "GET /tasks/": "List tasks (filters: is_completed, priority, due_from, due_to; sort; limit/cursor paging)",
             "POST /tasks/": "Create a new task",
+            "GET /tasks/search": "Full-text search over titles and descriptions (q, prefix, limit/cursor paging)",
+            "GET /tasks/changes": "Changes after a sequence number (since, limit) for delta sync",
+            "GET /tasks/changes/stream": "Server-sent events stream of task changes",
             "GET /tasks/{id}": "Get a specific task",
             "PUT /tasks/{id}": "Update a task",
             "DELETE /tasks/{id}": "Delete a task",
-            "GET /stats/": "Get task statistics"
+            "POST /tasks/bulk": "Create many tasks in one transaction",
+            "PATCH /tasks/bulk": "Update many tasks in one transaction",
+            "DELETE /tasks/bulk": "Delete many tasks in one transaction",
+            "GET /stats/": "Get task statistics",
+            "GET /stats/db-pool": "Get database connection pool statistics",
+            "GET /stats/cache": "Get read-cache hit/miss/eviction counters",
+            "GET /metrics": "Prometheus metrics (only when TASKMASTER_METRICS=1)"
         }
     }
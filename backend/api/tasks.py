@@ -1,37 +1,171 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from dto.task import Task, TaskCreate, TaskUpdate
-from service.task_service import (
-    create_task_service, get_task_service, get_all_tasks_service, update_task_service, delete_task_service
+import os
+from datetime import date
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from dto.task import (
+    Task, TaskCreate, TaskUpdate, TaskListQuery, TaskBulkUpdate, TaskBulkDelete, BulkResult, TaskSearchQuery, TaskSearchHit,
+    TaskChangeFeed
 )
+from service.async_task_service import (
+    create_task_service, get_task_service, list_tasks_service, update_task_service, delete_task_service,
+    create_tasks_bulk_service, update_tasks_bulk_service, delete_tasks_bulk_service,
+    list_tasks_json_service, get_task_json_service, search_tasks_service, get_changes_service
+)
+from service.change_feed import stream_changes
+from service.task_cache import etag_matches
+from service.task_service import get_cache_etag
+
+MAX_PAGE_SIZE = 1000
+SORT_PATTERN = "^-?(id|due_date|priority)$"
+MAX_BULK_ITEMS = 10000
+
+# "validated" builds Task models and lets FastAPI validate and serialize them;
+# "fast" returns JSON encoded by SQLite as-is. Both produce identical bytes.
+RESPONSE_MODE = os.environ.get("TASKMASTER_RESPONSE_MODE", "validated")
+
+def _check_bulk_size(items):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BULK_ITEMS} items per bulk request"
+        )
+
+def _check_unique_ids(ids):
+    # Several items for one task would make its outcome depend on their order
+    seen, duplicates = set(), []
+    for task_id in ids:
+        if task_id in seen and task_id not in duplicates:
+            duplicates.append(task_id)
+        seen.add(task_id)
+    if duplicates:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Duplicate task ids: {', '.join(map(str, duplicates))}"
+        )
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 @router.post("/", response_model=Task, status_code=status.HTTP_201_CREATED)
-def create_task(task: TaskCreate):
-    return create_task_service(task)
+async def create_task(task: TaskCreate):
+    return await create_task_service(task)
 
 @router.get("/", response_model=List[Task])
-def read_tasks():
-    return get_all_tasks_service()
+async def read_tasks(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    is_completed: Optional[bool] = None,
+    priority: Optional[int] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    sort: str = Query("id", pattern=SORT_PATTERN),
+    if_none_match: Optional[str] = Header(None),
+):
+    # Taken before the read so a concurrent write can only make it stale, never too new
+    etag = get_cache_etag()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    query = TaskListQuery(
+        limit=limit, cursor=cursor, is_completed=is_completed, priority=priority,
+        due_from=due_from, due_to=due_to, sort=sort,
+    )
+    try:
+        if RESPONSE_MODE == "fast":
+            body, next_cursor = await list_tasks_json_service(query)
+            response = Response(content=body, media_type="application/json")
+        else:
+            tasks, next_cursor = await list_tasks_service(query)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["ETag"] = etag
+    return response if RESPONSE_MODE == "fast" else tasks
+
+# Search, change feed and bulk routes are declared before /{task_id} so their paths are not parsed as an id
+@router.get("/changes", response_model=TaskChangeFeed)
+async def read_changes(since: int = Query(0, ge=0), limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE)):
+    return await get_changes_service(since, limit)
+
+@router.get("/changes/stream")
+async def stream_task_changes(
+    since: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None),
+):
+    # A reconnecting EventSource sends the id of the last event it received
+    start = since if since is not None else (last_event_id or 0)
+    return StreamingResponse(
+        stream_changes(start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/search", response_model=List[TaskSearchHit])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    prefix: bool = True,
+    if_none_match: Optional[str] = Header(None),
+):
+    etag = get_cache_etag()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    query = TaskSearchQuery(q=q, limit=limit, cursor=cursor, prefix=prefix)
+    try:
+        hits, next_cursor = await search_tasks_service(query)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["ETag"] = etag
+    return hits
+
+@router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED)
+async def create_tasks_bulk(tasks: List[TaskCreate]):
+    _check_bulk_size(tasks)
+    return await create_tasks_bulk_service(tasks)
+
+@router.patch("/bulk", response_model=BulkResult)
+async def update_tasks_bulk(tasks: List[TaskBulkUpdate]):
+    _check_bulk_size(tasks)
+    _check_unique_ids(task.id for task in tasks)
+    return await update_tasks_bulk_service(tasks)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_tasks_bulk(request: TaskBulkDelete):
+    _check_bulk_size(request.ids)
+    _check_unique_ids(request.ids)
+    return await delete_tasks_bulk_service(request.ids)
 
 @router.get("/{task_id}", response_model=Task)
-def read_task(task_id: int):
-    task = get_task_service(task_id)
+async def read_task(task_id: int, response: Response, if_none_match: Optional[str] = Header(None)):
+    etag = get_cache_etag()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if RESPONSE_MODE == "fast":
+        body = await get_task_json_service(task_id)
+        if body is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+    task = await get_task_service(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    response.headers["ETag"] = etag
     return task
 
 @router.put("/{task_id}", response_model=Task)
-def update_task(task_id: int, task: TaskUpdate):
-    updated_task = update_task_service(task_id, task)
+async def update_task(task_id: int, task: TaskUpdate):
+    updated_task = await update_task_service(task_id, task)
     if not updated_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return updated_task
 
 @router.delete("/{task_id}", status_code=status.HTTP_200_OK)
-def delete_task(task_id: int):
-    success = delete_task_service(task_id)
+async def delete_task(task_id: int):
+    success = await delete_task_service(task_id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Task deleted successfully"}
@@ -0,0 +1,294 @@
+"""
+TaskMaster API - Benchmarks
+
+Seeds synthetic databases and drives every route of api/tasks.py and
+api/stats.py in-process (httpx over ASGI, no network), reporting p50/p95/p99
+latency and throughput per route, table size and concurrency. Needs httpx,
+which is not a server dependency:
+
+    pip install -r requirements-dev.txt
+
+Run from the backend/ directory:
+
+    python -m benchmarks.run                          # 1k, 100k and 1M tasks
+    python -m benchmarks.run --sizes 1000,100000 --concurrency 1,16
+    python -m benchmarks.run --save-baseline          # record benchmarks/baseline.json
+    python -m benchmarks.run --compare                # exit 1 on regressions vs the baseline
+    python -m benchmarks.run --metrics                # also print per-layer timings
+    python -m benchmarks.run --engine memory          # benchmark the memory storage engine
+
+Write scenarios delete what they create, so a seeded database keeps its size
+and is reused by later runs. GET /tasks/changes/stream is not driven: it
+never completes, and the in-process transport buffers whole responses.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).parent
+DEFAULT_SIZES = "1000,100000,1000000"
+DEFAULT_CONCURRENCY = "1,8"
+
+
+def _random_task(rng, n):
+    return {
+        "title": f"Benchmark {n} {rng.choice(('report', 'meeting', 'invoice'))}",
+        "description": "Created by the benchmark suite",
+        "due_date": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "priority": rng.randint(1, 3),
+    }
+
+
+class Context:
+    """State shared by the requests of one run: table size, rng and created ids."""
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.created = []
+        self.bulk_created = []
+
+    def existing_id(self):
+        return self.rng.randint(1, self.size)
+
+
+# name -> (method, function(context, n) returning (url, request kwargs)).
+# Reads run first; each delete scenario removes the ids its create scenario made.
+SCENARIOS = {
+    "root": ("GET", lambda ctx, n: ("/", {})),
+    "list_page": ("GET", lambda ctx, n: ("/tasks/", {"params": {"limit": 100}})),
+    "list_filtered": ("GET", lambda ctx, n: ("/tasks/", {"params": {
+        "limit": 100, "is_completed": False, "priority": ctx.rng.randint(1, 3), "sort": "-due_date",
+    }})),
+    "list_due_range": ("GET", lambda ctx, n: ("/tasks/", {"params": {
+        "limit": 100, "due_from": "2025-03-01", "due_to": "2025-03-31", "sort": "due_date",
+    }})),
+    "get_task": ("GET", lambda ctx, n: (f"/tasks/{ctx.existing_id()}", {})),
+    "search": ("GET", lambda ctx, n: ("/tasks/search", {"params": {
+        "q": ctx.rng.choice(("report", "cafe meeting", "audit")), "limit": 20,
+    }})),
+    "search_prefix": ("GET", lambda ctx, n: ("/tasks/search", {"params": {"q": "mig", "prefix": True, "limit": 20}})),
+    "changes": ("GET", lambda ctx, n: ("/tasks/changes", {"params": {"since": 0, "limit": 100}})),
+    "stats": ("GET", lambda ctx, n: ("/stats/", {})),
+    "stats_db_pool": ("GET", lambda ctx, n: ("/stats/db-pool", {})),
+    "stats_cache": ("GET", lambda ctx, n: ("/stats/cache", {})),
+    "create_task": ("POST", lambda ctx, n: ("/tasks/", {"json": _random_task(ctx.rng, n)})),
+    "update_task": ("PUT", lambda ctx, n: (f"/tasks/{ctx.existing_id()}", {"json": {"priority": ctx.rng.randint(1, 3)}})),
+    "bulk_create": ("POST", lambda ctx, n: ("/tasks/bulk", {"json": [_random_task(ctx.rng, n) for _ in range(100)]})),
+    "bulk_update": ("PATCH", lambda ctx, n: ("/tasks/bulk", {"json": [
+        {"id": ctx.existing_id(), "is_completed": ctx.rng.random() < 0.5} for _ in range(100)
+    ]})),
+    "delete_task": ("DELETE", lambda ctx, n: (f"/tasks/{ctx.created.pop()}", {})),
+    "bulk_delete": ("DELETE", lambda ctx, n: ("/tasks/bulk", {"json": {"ids": ctx.bulk_created.pop()}})),
+}
+
+
+def _record_created(name, ctx, response):
+    if name == "create_task" and response.status_code == 201:
+        ctx.created.append(response.json()["id"])
+    elif name == "bulk_create" and response.status_code == 201:
+        ctx.bulk_created.append([result["id"] for result in response.json()["results"]])
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(client, name, ctx, requests, concurrency, warmup):
+    method, build = SCENARIOS[name]
+    # Untimed reads first, so page and statement caches are warm
+    if method == "GET":
+        for n in range(warmup):
+            url, kwargs = build(ctx, n)
+            await client.request(method, url, **kwargs)
+    if name == "delete_task":
+        requests = min(requests, len(ctx.created))
+    elif name == "bulk_delete":
+        requests = min(requests, len(ctx.bulk_created))
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < requests:
+            n = issued
+            issued += 1
+            url, kwargs = build(ctx, n)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            _record_created(name, ctx, response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+async def run_size(app, size, concurrency_levels, scenarios, requests, warmup, seed):
+    import httpx
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for concurrency in concurrency_levels:
+            ctx = Context(size, seed)
+            for name in scenarios:
+                result = await run_scenario(client, name, ctx, requests, concurrency, warmup)
+                results[f"{size}/c{concurrency}/{name}"] = result
+                print(
+                    f"{size:>9} {concurrency:>4} {name:<16} {result['requests']:>6} {result['errors']:>5} "
+                    f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                    f"{result['throughput_rps']:>10.1f}",
+                    flush=True,
+                )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the change of each result against the baseline and return the keys
+    whose p95 latency grew, or throughput fell, by more than `tolerance`.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<36} {'p95 base':>9} {'p95 now':>9} {'change':>8} {'rps change':>11}")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = result["throughput_rps"] / base["throughput_rps"] - 1 if base["throughput_rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance
+        if regressed:
+            regressions.append(key)
+        print(
+            f"{key:<36} {base['p95_ms']:>9.2f} {result['p95_ms']:>9.2f} {p95_change:>+8.1%} {rps_change:>+11.1%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def print_layer_timings():
+    from monitoring.metrics import layer_duration, dao_rows, reset_metrics
+    with dao_rows._lock:
+        rows = {labels[0]: value for labels, value in dao_rows._series.items()}
+    with layer_duration._lock:
+        series = {labels: (total, count) for labels, (_, total, count) in layer_duration._series.items()}
+    print(f"\n{'layer':<12} {'function':<30} {'calls':>8} {'mean ms':>9} {'total s':>9} {'rows':>10}")
+    for (layer, function), (total, count) in sorted(series.items(), key=lambda item: -item[1][0]):
+        row_count = rows.get(function, "") if layer == "dao" else ""
+        print(f"{layer:<12} {function:<30} {count:>8} {total / count * 1000:>9.3f} {total:>9.2f} {row_count:>10}")
+    reset_metrics()
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TaskMaster API benchmarks")
+    parser.add_argument("--sizes", type=_int_list, default=DEFAULT_SIZES, help="Comma-separated table sizes")
+    parser.add_argument("--concurrency", type=_int_list, default=DEFAULT_CONCURRENCY,
+                        help="Comma-separated numbers of concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed requests before each read scenario")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                        help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--data-dir", type=Path, default=BENCHMARK_DIR / "data",
+                        help="Where seeded databases are kept between runs")
+    parser.add_argument("--engine", choices=("sqlite", "memory"),
+                        default=os.environ.get("TASKMASTER_STORAGE_ENGINE", "sqlite"), help="Storage engine to benchmark")
+    parser.add_argument("--baseline", type=Path, help="Baseline file (default: benchmarks/baseline[-ENGINE].json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline, exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown when comparing")
+    parser.add_argument("--cache", action="store_true", help="Keep the read cache enabled")
+    parser.add_argument("--metrics", action="store_true", help="Instrument the layers and print their timings")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for request parameters")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    scenarios = [name for name in SCENARIOS if name in args.scenarios]
+    if args.baseline is None:
+        suffix = "" if args.engine == "sqlite" else f"-{args.engine}"
+        args.baseline = BENCHMARK_DIR / f"baseline{suffix}.json"
+
+    # Configuration is read at import time, so set it before importing the app
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["TASKMASTER_STORAGE_ENGINE"] = args.engine
+    os.environ["TASKMASTER_DB_PATH"] = str(args.data_dir / f"tasks-{args.sizes[0]}.db")
+    os.environ["TASKMASTER_MEMORY_DIR"] = str(args.data_dir / f"tasks-{args.sizes[0]}-memory")
+    if args.metrics:
+        os.environ["TASKMASTER_METRICS"] = "1"
+    from main import app
+    from benchmarks.seed import seed_database, seed_path
+    from persistence.storage import close_storage
+    from persistence.executor import shutdown_executors
+    from service.task_cache import task_cache
+
+    if not args.cache:
+        task_cache.max_entries = 0
+
+    print(f"{'tasks':>9} {'conc':>4} {'scenario':<16} {'reqs':>6} {'errs':>5} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>10}")
+    results = {}
+    try:
+        for size in args.sizes:
+            start = time.perf_counter()
+            seed_database(
+                seed_path(args.data_dir, size), size,
+                lambda done, total: print(f"seeding {done}/{total}", end="\r", file=sys.stderr, flush=True),
+            )
+            print(f"seeded {size} tasks in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            task_cache.clear()
+            results.update(asyncio.run(run_size(app, size, args.concurrency, scenarios, args.requests, args.warmup, args.seed)))
+            if args.metrics:
+                print_layer_timings()
+    finally:
+        shutdown_executors()
+        close_storage()
+
+    status = 0
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            status = 1
+        else:
+            baseline = json.loads(args.baseline.read_text())["results"]
+            regressions = compare(results, baseline, args.tolerance)
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            status = 1 if regressions else 0
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "requests": args.requests,
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Synthetic task databases for the benchmarks.
+
+Rows are generated inside SQLite with a recursive CTE, so seeding a million
+tasks does not round-trip through Python. Every trigger (stats counters,
+search index, change log) fires as it would for API writes, so the derived
+tables are as large as they would be in production.
+
+With the memory storage engine the same rows are generated in Python and
+written through the DAO, then snapshotted so later runs load them quickly.
+"""
+
+import json
+import os
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+
+from persistence import database
+from persistence.storage import STORAGE_ENGINE
+
+# Words mixed into titles and descriptions so searches have hits of varying frequency
+WORDS = ("report", "meeting", "invoice", "release", "review", "deploy", "budget", "hiring",
+         "roadmap", "incident", "backup", "migration", "audit", "design", "cafe", "launch")
+
+SEED_BATCH_SIZE = 100000
+
+# Deterministic in n: priority cycles, a quarter are completed, a tenth have
+# no due date and the rest spread over two years
+SEED_SQL = """
+INSERT INTO tasks (title, description, due_date, priority, is_completed, created_at, updated_at)
+WITH RECURSIVE seq(n) AS (SELECT :start UNION ALL SELECT n + 1 FROM seq WHERE n < :end)
+SELECT
+    'Task ' || n || ' ' || json_extract(:words, '$[' || (n % 16) || ']'),
+    'Synthetic ' || json_extract(:words, '$[' || (n * 7 % 16) || ']') || ' task for '
+        || json_extract(:words, '$[' || (n * 11 % 16) || ']'),
+    CASE WHEN n % 10 = 0 THEN NULL ELSE date('2025-01-01', '+' || (n * 37 % 730) || ' days') END,
+    n % 3 + 1,
+    n % 4 = 0,
+    strftime('%Y-%m-%dT%H:%M:%fZ', 'now'),
+    strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+FROM seq
+"""
+
+
+def seed_path(data_dir, size):
+    """Where the seeded tasks of `size` are kept for the configured storage engine."""
+    if STORAGE_ENGINE == "memory":
+        return Path(data_dir) / f"tasks-{size}-memory"
+    return Path(data_dir) / f"tasks-{size}.db"
+
+
+def seed_rows(start, end):
+    """(task data, is_completed) for n in start..end, the rows SEED_SQL generates."""
+    for n in range(start, end + 1):
+        due_date = None if n % 10 == 0 else (date(2025, 1, 1) + timedelta(days=n * 37 % 730)).isoformat()
+        task_data = {
+            "title": f"Task {n} {WORDS[n % 16]}",
+            "description": f"Synthetic {WORDS[n * 7 % 16]} task for {WORDS[n * 11 % 16]}",
+            "due_date": due_date,
+            "priority": n % 3 + 1,
+        }
+        yield task_data, n % 4 == 0
+
+
+def use_database(path):
+    """Point the persistence layer at `path`, closing connections to the previous file."""
+    from persistence.executor import shutdown_executors
+    shutdown_executors()
+    database.close_pool()
+    database.DATABASE_PATH = Path(path)
+    database.init_db()
+
+
+def seed_database(path, size, progress=None):
+    """
+    Create a database of `size` tasks at `path` and switch to it. An existing
+    file with exactly `size` tasks is reused, since seeding 1M rows takes a while.
+    """
+    if STORAGE_ENGINE == "memory":
+        return seed_store(path, size, progress)
+    path = Path(path)
+    if path.exists():
+        use_database(path)
+        with database.read_connection() as conn:
+            if conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == size:
+                return path
+        database.close_pool()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f"{path}{suffix}"):
+                os.remove(f"{path}{suffix}")
+    use_database(path)
+    words = json.dumps(WORDS)
+    for start in range(1, size + 1, SEED_BATCH_SIZE):
+        end = min(start + SEED_BATCH_SIZE - 1, size)
+        with database.write_transaction() as conn:
+            conn.execute(SEED_SQL, {"start": start, "end": end, "words": words})
+        if progress:
+            progress(end, size)
+    with database.write_transaction() as conn:
+        conn.execute("ANALYZE")
+    return path
+
+
+def use_store(path):
+    """Point the memory engine at the data directory `path`, closing the previous store."""
+    from persistence.executor import shutdown_executors
+    from persistence.memory_store import configure_store, get_store
+    shutdown_executors()
+    configure_store(data_dir=str(path))
+    return get_store()
+
+
+def seed_store(path, size, progress=None):
+    """seed_database for the memory engine; `path` is the store's data directory."""
+    from dao import memory_task_dao
+    from persistence.memory_store import close_store
+    path = Path(path)
+    if path.exists():
+        if len(use_store(path).tasks) == size:
+            return path
+        close_store()
+        shutil.rmtree(path)
+    store = use_store(path)
+    for start in range(1, size + 1, SEED_BATCH_SIZE):
+        end = min(start + SEED_BATCH_SIZE - 1, size)
+        rows = list(seed_rows(start, end))
+        created = memory_task_dao.create_tasks_bulk_db([task_data for task_data, _ in rows])
+        memory_task_dao.update_tasks_bulk_db([
+            (task["id"], {"is_completed": 1}) for (task, _), (_, completed) in zip(created, rows) if completed
+        ])
+        if progress:
+            progress(end, size)
+    store.snapshot()
+    return path
@@ -0,0 +1,55 @@
+"""
+Awaitable counterparts of dao.task_dao for the async API path.
+
+Reads run on the reader executor; writes are queued to the writer thread and
+group-committed with other concurrent writes. The sync functions in task_dao
+remain the single implementation, for whichever storage engine is configured.
+"""
+
+from dao import task_dao
+from persistence.executor import run_read, run_write
+
+async def create_task_db(task_data):
+    return await run_write(task_dao.create_task_db, task_data)
+
+async def create_tasks_bulk_db(tasks_data):
+    return await run_write(task_dao.create_tasks_bulk_db, tasks_data)
+
+async def get_task_db(task_id):
+    return await run_read(task_dao.get_task_db, task_id)
+
+async def get_all_tasks_db():
+    return await run_read(task_dao.get_all_tasks_db)
+
+async def get_tasks_page_db(**page_args):
+    return await run_read(task_dao.get_tasks_page_db, **page_args)
+
+async def get_task_json_db(task_id):
+    return await run_read(task_dao.get_task_json_db, task_id)
+
+async def get_tasks_page_json_db(**page_args):
+    return await run_read(task_dao.get_tasks_page_json_db, **page_args)
+
+async def search_tasks_db(match, **search_args):
+    return await run_read(task_dao.search_tasks_db, match, **search_args)
+
+async def update_task_db(task_id, update_data):
+    return await run_write(task_dao.update_task_db, task_id, update_data)
+
+async def update_tasks_bulk_db(updates):
+    return await run_write(task_dao.update_tasks_bulk_db, updates)
+
+async def delete_task_db(task_id):
+    return await run_write(task_dao.delete_task_db, task_id)
+
+async def delete_tasks_bulk_db(task_ids):
+    return await run_write(task_dao.delete_tasks_bulk_db, task_ids)
+
+async def get_stats_db(today, tomorrow):
+    return await run_read(task_dao.get_stats_db, today, tomorrow)
+
+async def get_changes_db(since, limit):
+    return await run_read(task_dao.get_changes_db, since, limit)
+
+async def compact_changes_db(retain):
+    return await run_write(task_dao.compact_changes_db, retain)
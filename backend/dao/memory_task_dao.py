@@ -0,0 +1,397 @@
+"""
+Task DAO of the memory storage engine (TASKMASTER_STORAGE_ENGINE=memory).
+
+Same functions and return shapes as dao.sqlite_task_dao, answered from the
+indexes of persistence.memory_store instead of SQL. Reads hold the store
+lock only while collecting records; records are immutable, so they are
+turned into dicts and JSON after it is released.
+"""
+
+import bisect
+import json
+from datetime import datetime, timezone
+
+from monitoring.metrics import timed
+from persistence.memory_store import get_store, sort_key
+from persistence.text_index import highlight, parse_match, snippet
+
+# Columns GET /tasks/ may sort on; each is paired with id as a tie-breaker
+SORTABLE_COLUMNS = ("id", "due_date", "priority")
+
+# Filtered pages are built from the smallest matching index when it has at
+# most this many ids; larger ones are answered by walking the sort order
+CANDIDATE_SCAN_LIMIT = 4096
+
+def _now():
+    """UTC timestamp with milliseconds, formatted like the SQLite engine's created_at and updated_at."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+@timed("dao")
+def create_task_db(task_data):
+    """Insert a task and return the created row."""
+    store = get_store()
+    with store.transaction():
+        record = store.insert(task_data, _now())
+    return record.as_dict()
+
+@timed("dao")
+def create_tasks_bulk_db(tasks_data):
+    """
+    Insert many tasks in one transaction.
+
+    Returns a (row, error) pair per item in input order. An item the store
+    rejects gets (None, error) and is skipped; the rest are kept.
+    """
+    store = get_store()
+    now = _now()
+    created = []
+    with store.transaction():
+        for task_data in tasks_data:
+            try:
+                with store.job():
+                    created.append((store.insert(task_data, now), None))
+            except ValueError as exc:
+                created.append((None, str(exc)))
+    return [(record.as_dict() if record else None, error) for record, error in created]
+
+@timed("dao")
+def get_task_db(task_id):
+    record = get_store().tasks.get(task_id)
+    return record.as_dict() if record else None
+
+@timed("dao")
+def get_all_tasks_db():
+    store = get_store()
+    with store.lock:
+        records = list(store.tasks.values())
+    return [record.as_dict() for record in records]
+
+def _after_key(sort, after):
+    """The index key of the cursor (sort value, id)."""
+    last_value, last_id = after
+    if sort == "id":
+        return last_id
+    if last_value is not None and not isinstance(last_value, (int, float, str)):
+        raise ValueError("Invalid cursor")
+    return sort_key(last_value, last_id)
+
+def _record_key(sort, record):
+    return record.id if sort == "id" else sort_key(getattr(record, sort), record.id)
+
+def _due_bounds(due_from, due_to):
+    """Keys bounding a due date range in the due_date index: low <= key < high."""
+    # Due dates are text, which sorts after NULLs and numbers
+    low = (2, due_from) if due_from is not None else (2,)
+    high = (2, due_to + "\x00") if due_to is not None else (3,)
+    return low, high
+
+def _candidates(store, is_completed, priority, due_from, due_to):
+    """
+    (count, ids) of the smallest index selection known to contain every
+    match, or None when no filter narrows the tasks down.
+    """
+    sources = []
+    if is_completed is not None:
+        ids = store.by_completed.get(1 if is_completed else 0, ())
+        sources.append((len(ids), ids))
+    if priority is not None:
+        ids = store.by_priority.get(priority, ())
+        sources.append((len(ids), ids))
+    if due_from is not None or due_to is not None:
+        keys = store.sort_index["due_date"]
+        low, high = _due_bounds(due_from, due_to)
+        count = max(0, keys.rank(high) - keys.rank(low))
+        sources.append((count, (key[2] for key in keys.between(low, high))))
+    if not sources:
+        return None
+    return min(sources, key=lambda source: source[0])
+
+def _page_records(limit, after, is_completed, priority, due_from, due_to, sort, descending):
+    if sort not in SORTABLE_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort}")
+    after_key = _after_key(sort, after) if after is not None else None
+    completed = None if is_completed is None else (1 if is_completed else 0)
+
+    def matches(record):
+        if completed is not None and record.is_completed != completed:
+            return False
+        if priority is not None and record.priority != priority:
+            return False
+        if due_from is not None and (record.due_date is None or record.due_date < due_from):
+            return False
+        if due_to is not None and (record.due_date is None or record.due_date > due_to):
+            return False
+        return True
+
+    store = get_store()
+    with store.lock:
+        tasks = store.tasks
+        # A due date range on a due date sort is a contiguous run of the
+        # sort index, so walking it beats collecting the range
+        ranged = sort == "due_date" and (due_from is not None or due_to is not None)
+        candidates = _candidates(store, is_completed, priority, due_from, due_to)
+        if candidates is not None and (limit is None or (candidates[0] <= CANDIDATE_SCAN_LIMIT and not ranged)):
+            # Few enough matches to filter and sort them all
+            records = sorted(
+                (record for record in map(tasks.__getitem__, candidates[1]) if matches(record)),
+                key=lambda record: _record_key(sort, record),
+                reverse=descending,
+            )
+            if after_key is not None:
+                records = [
+                    record for record in records
+                    if (_record_key(sort, record) < after_key if descending else _record_key(sort, record) > after_key)
+                ]
+            return records[:limit] if limit is not None else records
+        # Walk the sort order from the cursor until the page is full
+        keys = store.ids if sort == "id" else store.sort_index[sort]
+        low, high = _due_bounds(due_from, due_to) if ranged else (None, None)
+        if descending:
+            start = high if after_key is None or (high is not None and high < after_key) else after_key
+            walk = keys.before(start)
+        else:
+            start = low if after_key is None or (low is not None and low > after_key) else after_key
+            walk = keys.after(start)
+        records = []
+        for key in walk:
+            if ranged and (key < low if descending else key >= high):
+                break
+            record = tasks[key if sort == "id" else key[2]]
+            if matches(record):
+                records.append(record)
+                if limit is not None and len(records) >= limit:
+                    break
+        return records
+
+@timed("dao")
+def get_tasks_page_db(limit=None, after=None, is_completed=None, priority=None,
+                      due_from=None, due_to=None, sort="id", descending=False):
+    """
+    Fetch one page of tasks using keyset (seek) pagination.
+
+    `after` is the (sort value, id) pair of the last row already returned;
+    the page starts with a binary search of the sort index for it.
+    """
+    records = _page_records(limit, after, is_completed, priority, due_from, due_to, sort, descending)
+    return [record.as_dict() for record in records]
+
+def _task_json(record):
+    """The record encoded byte-for-byte as FastAPI renders the Task model, cached on the record."""
+    if record.json is None:
+        record.json = json.dumps(
+            {
+                "title": record.title, "description": record.description, "due_date": record.due_date,
+                "priority": record.priority, "id": record.id, "is_completed": bool(record.is_completed),
+                "created_at": record.created_at, "updated_at": record.updated_at,
+            },
+            ensure_ascii=False, separators=(",", ":"),
+        )
+    return record.json
+
+@timed("dao")
+def get_task_json_db(task_id):
+    record = get_store().tasks.get(task_id)
+    return _task_json(record) if record else None
+
+@timed("dao")
+def get_tasks_page_json_db(limit=None, after=None, is_completed=None, priority=None,
+                           due_from=None, due_to=None, sort="id", descending=False):
+    """
+    Same page as get_tasks_page_db, with each row already encoded as JSON.
+    Returns (json, sort value, id) tuples so the caller can build a cursor.
+    """
+    records = _page_records(limit, after, is_completed, priority, due_from, due_to, sort, descending)
+    return [(_task_json(record), getattr(record, sort), record.id) for record in records]
+
+@timed("dao")
+def search_tasks_db(match, limit=None, offset=0):
+    """
+    Full-text search over task titles and descriptions.
+
+    `match` is a query as built by the search service: quoted terms, each
+    optionally a prefix. Rows come best match first (lowest bm25 score)
+    with id as a tie-breaker, skipping the first `offset`.
+    title_highlight and snippet are HTML with matches wrapped in <mark>.
+    """
+    phrases = parse_match(match)
+    if phrases is None:
+        return []
+    store = get_store()
+    with store.lock:
+        tasks = store.tasks
+        load = lambda task_id: (tasks[task_id].title, tasks[task_id].description)
+        ranked = store.search_index().search(phrases, load)
+        end = offset + limit if limit is not None else len(ranked)
+        hits = [(score, tasks[task_id]) for score, task_id in ranked[offset:end]]
+    rows = []
+    for score, record in hits:
+        row = record.as_dict()
+        row["rank"] = score
+        row["title_highlight"] = highlight(record.title, phrases)
+        row["snippet"] = snippet(record.description, phrases)
+        rows.append(row)
+    return rows
+
+@timed("dao")
+def rebuild_search_index_db():
+    get_store().rebuild_search_index()
+
+@timed("dao")
+def get_changes_db(since, limit):
+    """
+    Return the log entries after `since`, keeping only the latest entry per
+    task, with the current row for upserts. Also returns the log head and
+    compaction point, all read under one lock.
+    """
+    store = get_store()
+    changes = []
+    with store.lock:
+        head = store.change_head()
+        compacted_through = store.compacted_through
+        seqs = store.change_seqs
+        for position in range(bisect.bisect_right(seqs, since), len(seqs)):
+            if len(changes) >= limit:
+                break
+            change = store.changes.get(seqs[position])
+            if change is None:
+                continue
+            task_id, op = change
+            record = store.tasks.get(task_id) if op == "upsert" else None
+            changes.append({"seq": seqs[position], "op": op, "id": task_id, "task": record})
+    for change in changes:
+        if change["task"] is not None:
+            change["task"] = change["task"].as_dict()
+    return {"changes": changes, "head": head, "compacted_through": compacted_through}
+
+@timed("dao")
+def compact_changes_db(retain):
+    """
+    Compact the change log: superseded entries are never kept, so this keeps
+    at most `retain` entries, at least 1 so the log head is kept. Returns
+    the new compaction point.
+    """
+    if retain < 1:
+        raise ValueError("retain must be at least 1")
+    store = get_store()
+    with store.transaction():
+        return store.compact_changes(retain)
+
+@timed("dao")
+def update_task_db(task_id, update_data):
+    store = get_store()
+    if not update_data:
+        return get_task_db(task_id)
+    with store.transaction():
+        record = store.update(task_id, update_data, _now())
+    return record.as_dict() if record else None
+
+@timed("dao")
+def delete_task_db(task_id):
+    store = get_store()
+    with store.transaction():
+        return store.delete(task_id)
+
+@timed("dao")
+def update_tasks_bulk_db(updates):
+    """
+    Apply many partial updates in one transaction.
+
+    `updates` is a list of (task_id, update_data) pairs. Returns a (row,
+    error) pair per item: the resulting row, (None, None) where the task does
+    not exist, or (None, error) where the store rejected the update, which
+    then leaves the task unchanged while the other items still apply.
+    """
+    store = get_store()
+    now = _now()
+    errors = {}
+    with store.transaction():
+        for task_id, update_data in updates:
+            if not update_data:
+                continue
+            try:
+                with store.job():
+                    store.update(task_id, update_data, now)
+            except ValueError as exc:
+                errors[task_id] = str(exc)
+        records = [store.tasks.get(task_id) for task_id, _ in updates]
+    return [
+        (None, errors[task_id]) if task_id in errors else (record.as_dict() if record else None, None)
+        for (task_id, _), record in zip(updates, records)
+    ]
+
+@timed("dao")
+def delete_tasks_bulk_db(task_ids):
+    """
+    Delete many tasks in one transaction and return the set of ids that existed.
+    """
+    store = get_store()
+    with store.transaction():
+        return {task_id for task_id in dict.fromkeys(task_ids) if store.delete(task_id)}
+
+@timed("dao")
+def get_stats_db(today, tomorrow):
+    """
+    Read task statistics from the store's counters.
+    `today` and `tomorrow` are ISO dates bounding the due-today window.
+    """
+    store = get_store()
+    with store.lock:
+        counts = list(store.counts.items())
+        overdue = due_today = 0
+        for due_date, pending in store.due_pending.items():
+            if due_date < today:
+                overdue += pending
+            elif due_date < tomorrow:
+                due_today += pending
+    by_priority = {}
+    for (priority, is_completed), count in counts:
+        bucket = by_priority.setdefault(priority, {"priority": priority, "total": 0, "completed": 0})
+        bucket["total"] += count
+        if is_completed == 1:
+            bucket["completed"] += count
+    for bucket in by_priority.values():
+        bucket["pending"] = bucket["total"] - bucket["completed"]
+    total = sum(bucket["total"] for bucket in by_priority.values())
+    completed = sum(bucket["completed"] for bucket in by_priority.values())
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "by_priority": sorted(by_priority.values(), key=lambda bucket: (bucket["priority"] is None, bucket["priority"] or 0)),
+        "overdue": overdue,
+        "due_today": due_today,
+    }
+
+@timed("dao")
+def verify_stats_db():
+    """
+    Recompute the counters from the tasks and compare them with the
+    maintained ones. Returns a list of drifted entries (empty when consistent).
+    """
+    store = get_store()
+    expected_counts, expected_due = {}, {}
+    with store.lock:
+        for record in store.tasks.values():
+            key = (record.priority, record.is_completed)
+            expected_counts[key] = expected_counts.get(key, 0) + 1
+            if record.due_date is not None and record.is_completed != 1:
+                expected_due[record.due_date] = expected_due.get(record.due_date, 0) + 1
+        actual_counts, actual_due = dict(store.counts), dict(store.due_pending)
+    drift = []
+    for key in sorted(set(expected_counts) | set(actual_counts), key=repr):
+        if expected_counts.get(key, 0) != actual_counts.get(key, 0):
+            drift.append({
+                "counter": "task_counts", "priority": key[0], "is_completed": key[1],
+                "expected": expected_counts.get(key, 0), "actual": actual_counts.get(key, 0),
+            })
+    for due_date in sorted(set(expected_due) | set(actual_due)):
+        if expected_due.get(due_date, 0) != actual_due.get(due_date, 0):
+            drift.append({
+                "counter": "task_due_counts", "due_date": due_date,
+                "expected": expected_due.get(due_date, 0), "actual": actual_due.get(due_date, 0),
+            })
+    return drift
+
+@timed("dao")
+def rebuild_stats_db():
+    get_store().rebuild_counters()
@@ -0,0 +1,486 @@
+import sqlite3
+from contextlib import contextmanager
+from html import escape
+from itertools import groupby
+from persistence.database import read_connection, write_transaction, rebuild_stats_counters, rebuild_search_index
+from monitoring.metrics import timed
+from persistence.text_index import highlight, parse_match, snippet
+
+# Rows per multi-row statement in the bulk functions; keeps the bound
+# parameter count well under SQLite's per-statement limit
+BULK_CHUNK_SIZE = 500
+
+# UTC timestamp with milliseconds, used for created_at and updated_at
+NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+@timed("dao")
+def create_task_db(task_data):
+    """Insert a task and return the created row."""
+    with write_transaction() as conn:
+        row = conn.execute(
+            "INSERT INTO tasks (title, description, due_date, priority, created_at, updated_at) "
+            f"VALUES (?, ?, ?, ?, {NOW}, {NOW}) RETURNING *",
+            (task_data['title'], task_data.get('description'), task_data.get('due_date'), task_data.get('priority'))
+        ).fetchone()
+    return dict(row)
+
+@contextmanager
+def _savepoint(conn):
+    """Undo only the writes made inside the block when it raises."""
+    conn.execute("SAVEPOINT bulk_item")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK TO bulk_item")
+        conn.execute("RELEASE bulk_item")
+        raise
+    conn.execute("RELEASE bulk_item")
+
+def _insert_rows(conn, chunk):
+    placeholders = ", ".join([f"(?, ?, ?, ?, {NOW}, {NOW})"] * len(chunk))
+    params = []
+    for task_data in chunk:
+        params.extend((task_data['title'], task_data.get('description'), task_data.get('due_date'), task_data.get('priority')))
+    rows = conn.execute(
+        f"INSERT INTO tasks (title, description, due_date, priority, created_at, updated_at) VALUES {placeholders} "
+        "RETURNING *",
+        params
+    ).fetchall()
+    # Ids are assigned in VALUES order, RETURNING order is not guaranteed
+    return sorted((dict(row) for row in rows), key=lambda row: row["id"])
+
+@timed("dao")
+def create_tasks_bulk_db(tasks_data):
+    """
+    Insert many tasks in one transaction.
+
+    Returns a (row, error) pair per item in input order. An item the
+    database rejects gets (None, error) and is skipped; the rest are kept.
+    """
+    created = []
+    with write_transaction() as conn:
+        for chunk in _chunks(tasks_data):
+            try:
+                with _savepoint(conn):
+                    rows = _insert_rows(conn, chunk)
+            except sqlite3.IntegrityError:
+                # Retry the chunk one row at a time to find the rejected items
+                for task_data in chunk:
+                    try:
+                        with _savepoint(conn):
+                            row, = _insert_rows(conn, [task_data])
+                        created.append((row, None))
+                    except sqlite3.IntegrityError as exc:
+                        created.append((None, str(exc)))
+            else:
+                created.extend((row, None) for row in rows)
+    return created
+
+@timed("dao")
+def get_task_db(task_id):
+    with read_connection() as conn:
+        task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return dict(task) if task else None
+
+@timed("dao")
+def get_all_tasks_db():
+    with read_connection() as conn:
+        tasks = conn.execute("SELECT * FROM tasks").fetchall()
+    return [dict(task) for task in tasks]
+
+# Columns GET /tasks/ may sort on; each is paired with id as a tie-breaker
+SORTABLE_COLUMNS = ("id", "due_date", "priority")
+
+def _keyset_segments(sort, descending, after):
+    """
+    Split "rows after (sort value, id)" into index-seekable WHERE fragments.
+
+    NULLs sort first ascending and last descending, so a seek can cross from
+    the NULL block into the non-NULL block (or back). An OR across the two
+    would defeat the index, so each block becomes its own segment, queried
+    in order until the page is full. Within a block a row-value comparison
+    lets SQLite seek on the (column, rowid) index directly.
+    """
+    if after is None:
+        return [(None, [])]
+    last_value, last_id = after
+    op = "<" if descending else ">"
+    if sort == "id":
+        return [(f"id {op} ?", [last_id])]
+    if last_value is None:
+        null_segment = (f"{sort} IS NULL AND id {op} ?", [last_id])
+        if descending:
+            return [null_segment]
+        return [null_segment, (f"{sort} IS NOT NULL", [])]
+    value_segment = (f"({sort}, id) {op} (?, ?)", [last_value, last_id])
+    if descending:
+        return [value_segment, (f"{sort} IS NULL", [])]
+    return [value_segment]
+
+def _fetch_page(columns, limit, after, is_completed, priority, due_from, due_to, sort, descending):
+    if sort not in SORTABLE_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort}")
+    conditions = []
+    params = []
+    if is_completed is not None:
+        conditions.append("is_completed = ?")
+        params.append(1 if is_completed else 0)
+    if priority is not None:
+        conditions.append("priority = ?")
+        params.append(priority)
+    # Sorted by priority, the unary + keeps SQLite from seeking the due date
+    # range, which would sort every match; the page instead walks a
+    # (priority, id, due_date) index and checks the range in it
+    due_date = "+due_date" if sort == "priority" else "due_date"
+    if due_from is not None:
+        conditions.append(f"{due_date} >= ?")
+        params.append(due_from)
+    if due_to is not None:
+        conditions.append(f"{due_date} <= ?")
+        params.append(due_to)
+    direction = "DESC" if descending else "ASC"
+    if sort == "priority" and priority is not None:
+        # Every row shares the filtered priority, so the order is the id order
+        sort = "id"
+        after = None if after is None else (None, after[1])
+    if sort == "id":
+        order_by = f" ORDER BY id {direction}"
+    else:
+        order_by = f" ORDER BY {sort} {direction}, id {direction}"
+    rows = []
+    with read_connection() as conn:
+        for segment, segment_params in _keyset_segments(sort, descending, after):
+            where = conditions + [segment] if segment else conditions
+            query = f"SELECT {columns} FROM tasks"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += order_by
+            query_params = params + segment_params
+            if limit is not None:
+                query += " LIMIT ?"
+                query_params.append(limit - len(rows))
+            rows.extend(conn.execute(query, query_params).fetchall())
+            if limit is not None and len(rows) >= limit:
+                break
+    return rows
+
+@timed("dao")
+def get_tasks_page_db(limit=None, after=None, is_completed=None, priority=None,
+                      due_from=None, due_to=None, sort="id", descending=False):
+    """
+    Fetch one page of tasks using keyset (seek) pagination.
+
+    `after` is the (sort value, id) pair of the last row already returned, so
+    the query seeks straight to the next row instead of skipping an OFFSET.
+    """
+    rows = _fetch_page("*", limit, after, is_completed, priority, due_from, due_to, sort, descending)
+    return [dict(row) for row in rows]
+
+# A task row encoded by SQLite, byte-for-byte what FastAPI renders for the
+# Task model: same key order, compact separators, booleans as true/false
+TASK_JSON = (
+    "json_object('title', title, 'description', description, 'due_date', due_date, "
+    "'priority', priority, 'id', id, "
+    "'is_completed', json(CASE WHEN is_completed THEN 'true' ELSE 'false' END), "
+    "'created_at', created_at, 'updated_at', updated_at)"
+)
+
+@timed("dao")
+def get_task_json_db(task_id):
+    with read_connection() as conn:
+        row = conn.execute(f"SELECT {TASK_JSON} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return row[0] if row else None
+
+@timed("dao")
+def get_tasks_page_json_db(limit=None, after=None, is_completed=None, priority=None,
+                           due_from=None, due_to=None, sort="id", descending=False):
+    """
+    Same page as get_tasks_page_db, with each row already encoded as JSON.
+    Returns (json, sort value, id) tuples so the caller can build a cursor.
+    """
+    rows = _fetch_page(
+        f"{TASK_JSON}, {sort}, id", limit, after, is_completed, priority, due_from, due_to, sort, descending
+    )
+    return [tuple(row) for row in rows]
+
+# Column weights for bm25(): a title match counts ten times a description match
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+# highlight() and snippet() mark matches with these control characters; the
+# text is HTML-escaped in Python and the markers then become <mark> tags
+MARK_START, MARK_END = "\x02", "\x03"
+
+def _search_markup(row, match):
+    """HTML-escape title_highlight and snippet of a search row, then turn the markers into <mark>."""
+    if any(MARK_START in text or MARK_END in text for text in (row["title"], row["description"] or "")):
+        # The markers are ambiguous; mark up the text like the memory engine does
+        phrases = parse_match(match)
+        row["title_highlight"] = highlight(row["title"], phrases)
+        row["snippet"] = snippet(row["description"], phrases)
+        return row
+    for column in ("title_highlight", "snippet"):
+        if row[column] is not None:
+            row[column] = escape(row[column]).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return row
+
+@timed("dao")
+def search_tasks_db(match, limit=None, offset=0):
+    """
+    Full-text search over task titles and descriptions.
+
+    `match` is an FTS5 query string. Rows come best match first (lowest
+    bm25 score) with id as a tie-breaker, skipping the first `offset`.
+    title_highlight and snippet are HTML with matches wrapped in <mark>.
+    """
+    title_weight, description_weight = SEARCH_WEIGHTS
+    query = f"""
+        SELECT * FROM (
+            SELECT tasks.*,
+                   bm25(tasks_fts, {title_weight}, {description_weight}) AS rank,
+                   highlight(tasks_fts, 0, char(2), char(3)) AS title_highlight,
+                   snippet(tasks_fts, 1, char(2), char(3), '...', 16) AS snippet
+            FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid
+            WHERE tasks_fts MATCH ?
+        )
+    """
+    query += " ORDER BY rank, id LIMIT ? OFFSET ?"
+    params = [match, -1 if limit is None else limit, offset]
+    with read_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [_search_markup(dict(row), match) for row in rows]
+
+@timed("dao")
+def rebuild_search_index_db():
+    with write_transaction() as conn:
+        rebuild_search_index(conn)
+
+@timed("dao")
+def get_changes_db(since, limit):
+    """
+    Return the log entries after `since`, keeping only the latest entry per
+    task, with the current row for upserts. Also returns the log head and
+    compaction point, all read from one snapshot.
+    """
+    with read_connection() as conn:
+        conn.execute("BEGIN")
+        try:
+            head = conn.execute("SELECT IFNULL(MAX(seq), 0) FROM task_changes").fetchone()[0]
+            compacted_through = conn.execute(
+                "SELECT compacted_through FROM task_change_log_state WHERE id = 1"
+            ).fetchone()[0]
+            rows = conn.execute(
+                """
+                SELECT c.seq, c.op, c.task_id AS change_task_id, t.*
+                FROM task_changes c LEFT JOIN tasks t ON t.id = c.task_id
+                WHERE c.seq > ?
+                  AND c.seq = (SELECT MAX(seq) FROM task_changes WHERE task_id = c.task_id)
+                ORDER BY c.seq
+                LIMIT ?
+                """,
+                (since, limit)
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+    changes = []
+    for row in rows:
+        change = dict(row)
+        seq, op, task_id = change.pop("seq"), change.pop("op"), change.pop("change_task_id")
+        task = change if op == "upsert" and change["id"] is not None else None
+        changes.append({"seq": seq, "op": op, "id": task_id, "task": task})
+    return {"changes": changes, "head": head, "compacted_through": compacted_through}
+
+@timed("dao")
+def compact_changes_db(retain):
+    """
+    Compact the change log: drop entries superseded by a later change to the
+    same task, then keep at most `retain` entries. Returns the new
+    compaction point.
+
+    `retain` must be at least 1: the newest entry is the log head that
+    clients compare their position against, and must never be dropped.
+    """
+    if retain < 1:
+        raise ValueError("retain must be at least 1")
+    with write_transaction() as conn:
+        conn.execute(
+            "DELETE FROM task_changes "
+            "WHERE seq < (SELECT MAX(seq) FROM task_changes latest WHERE latest.task_id = task_changes.task_id)"
+        )
+        cutoff = conn.execute(
+            "SELECT seq FROM task_changes ORDER BY seq DESC LIMIT 1 OFFSET ?", (retain,)
+        ).fetchone()
+        if cutoff is not None:
+            conn.execute("DELETE FROM task_changes WHERE seq <= ?", (cutoff[0],))
+            conn.execute(
+                "UPDATE task_change_log_state SET compacted_through = MAX(compacted_through, ?) WHERE id = 1",
+                (cutoff[0],)
+            )
+        return conn.execute("SELECT compacted_through FROM task_change_log_state WHERE id = 1").fetchone()[0]
+
+@timed("dao")
+def update_task_db(task_id, update_data):
+    with write_transaction() as conn:
+        existing_task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if not existing_task:
+            return None
+        set_expressions = []
+        values = []
+        for key, value in update_data.items():
+            set_expressions.append(f"{key} = ?")
+            values.append(value)
+        if not set_expressions:
+            return dict(existing_task)
+        set_expressions.append(f"updated_at = {NOW}")
+        values.append(task_id)
+        conn.execute(f"UPDATE tasks SET {', '.join(set_expressions)} WHERE id = ?", values)
+        updated_task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return dict(updated_task)
+
+@timed("dao")
+def delete_task_db(task_id):
+    with write_transaction() as conn:
+        cursor = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+    return cursor.rowcount > 0
+
+@timed("dao")
+def update_tasks_bulk_db(updates):
+    """
+    Apply many partial updates in one transaction.
+
+    `updates` is a list of (task_id, update_data) pairs. Consecutive updates
+    touching the same columns share one executemany. Returns a (row, error)
+    pair per item: the resulting row, (None, None) where the task does not
+    exist, or (None, error) where the database rejected the update, which
+    then leaves the task unchanged while the other items still apply.
+    """
+    errors = {}
+    with write_transaction() as conn:
+        for columns, group in groupby(updates, key=lambda update: tuple(update[1])):
+            if not columns:
+                continue
+            set_clause = ", ".join([*(f"{column} = ?" for column in columns), f"updated_at = {NOW}"])
+            sql = f"UPDATE tasks SET {set_clause} WHERE id = ?"
+            group = list(group)
+            try:
+                with _savepoint(conn):
+                    conn.executemany(sql, [[*update_data.values(), task_id] for task_id, update_data in group])
+            except sqlite3.IntegrityError:
+                # Retry the group one row at a time to find the rejected items
+                for task_id, update_data in group:
+                    try:
+                        with _savepoint(conn):
+                            conn.execute(sql, [*update_data.values(), task_id])
+                    except sqlite3.IntegrityError as exc:
+                        errors[task_id] = str(exc)
+        found = {}
+        task_ids = list(dict.fromkeys(task_id for task_id, _ in updates))
+        for chunk in _chunks(task_ids):
+            placeholders = ", ".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT * FROM tasks WHERE id IN ({placeholders})", chunk):
+                found[row["id"]] = dict(row)
+    return [
+        (None, errors[task_id]) if task_id in errors else (found.get(task_id), None)
+        for task_id, _ in updates
+    ]
+
+@timed("dao")
+def delete_tasks_bulk_db(task_ids):
+    """
+    Delete many tasks in one transaction and return the set of ids that existed.
+    """
+    deleted = set()
+    with write_transaction() as conn:
+        for chunk in _chunks(list(dict.fromkeys(task_ids))):
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(f"DELETE FROM tasks WHERE id IN ({placeholders}) RETURNING id", chunk)
+            deleted.update(row["id"] for row in rows)
+    return deleted
+
+@timed("dao")
+def get_stats_db(today, tomorrow):
+    """
+    Read task statistics from the trigger-maintained counter tables.
+    `today` and `tomorrow` are ISO dates bounding the due-today window.
+    """
+    with read_connection() as conn:
+        # One read transaction so every counter comes from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            rows = conn.execute(
+                "SELECT priority, is_completed, count FROM task_counts WHERE count != 0"
+            ).fetchall()
+            overdue = conn.execute(
+                "SELECT IFNULL(SUM(pending), 0) FROM task_due_counts WHERE due_date < ?", (today,)
+            ).fetchone()[0]
+            due_today = conn.execute(
+                "SELECT IFNULL(SUM(pending), 0) FROM task_due_counts WHERE due_date >= ? AND due_date < ?",
+                (today, tomorrow)
+            ).fetchone()[0]
+        finally:
+            conn.execute("COMMIT")
+    by_priority = {}
+    for row in rows:
+        bucket = by_priority.setdefault(row["priority"], {"priority": row["priority"], "total": 0, "completed": 0})
+        bucket["total"] += row["count"]
+        if row["is_completed"] == 1:
+            bucket["completed"] += row["count"]
+    for bucket in by_priority.values():
+        bucket["pending"] = bucket["total"] - bucket["completed"]
+    total = sum(bucket["total"] for bucket in by_priority.values())
+    completed = sum(bucket["completed"] for bucket in by_priority.values())
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "by_priority": sorted(by_priority.values(), key=lambda bucket: (bucket["priority"] is None, bucket["priority"] or 0)),
+        "overdue": overdue,
+        "due_today": due_today,
+    }
+
+@timed("dao")
+def verify_stats_db():
+    """
+    Recompute the counters from the tasks table and compare them with the
+    stored ones. Returns a list of drifted entries (empty when consistent).
+    """
+    drift = []
+    # The writer lock keeps both sides of the comparison on the same snapshot
+    with write_transaction() as conn:
+        expected = {
+            (row["priority"], row["is_completed"]): row["count"]
+            for row in conn.execute("SELECT priority, is_completed, COUNT(*) AS count FROM tasks GROUP BY priority, is_completed")
+        }
+        actual = {
+            (row["priority"], row["is_completed"]): row["count"]
+            for row in conn.execute("SELECT priority, is_completed, SUM(count) AS count FROM task_counts GROUP BY priority, is_completed")
+        }
+        for key in sorted(set(expected) | set(actual), key=repr):
+            if expected.get(key, 0) != actual.get(key, 0):
+                drift.append({
+                    "counter": "task_counts", "priority": key[0], "is_completed": key[1],
+                    "expected": expected.get(key, 0), "actual": actual.get(key, 0),
+                })
+        expected = {
+            row["due_date"]: row["count"]
+            for row in conn.execute(
+                "SELECT due_date, COUNT(*) AS count FROM tasks "
+                "WHERE due_date IS NOT NULL AND is_completed IS NOT 1 GROUP BY due_date"
+            )
+        }
+        actual = {row["due_date"]: row["pending"] for row in conn.execute("SELECT due_date, pending FROM task_due_counts")}
+        for due_date in sorted(set(expected) | set(actual)):
+            if expected.get(due_date, 0) != actual.get(due_date, 0):
+                drift.append({
+                    "counter": "task_due_counts", "due_date": due_date,
+                    "expected": expected.get(due_date, 0), "actual": actual.get(due_date, 0),
+                })
+    return drift
+
+@timed("dao")
+def rebuild_stats_db():
+    with write_transaction() as conn:
+        rebuild_stats_counters(conn)
@@ -1,65 +1,36 @@
-from persistence.database import get_db_connection
+"""
+Task DAO of the configured storage engine (TASKMASTER_STORAGE_ENGINE).
 
-def create_task_db(task_data):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO tasks (title, description, due_date, priority) VALUES (?, ?, ?, ?)",
-        (task_data['title'], task_data.get('description'), task_data.get('due_date'), task_data.get('priority'))
-    )
-    conn.commit()
-    task_id = cursor.lastrowid
-    conn.close()
-    return task_id
+The SQL lives in dao.sqlite_task_dao and the in-memory implementation in
+dao.memory_task_dao; both expose the same functions with the same return
+shapes, and this module binds the selected engine's at import time, so
+the services and dao.async_task_dao stay engine-agnostic. Only the selected
+engine's module is imported: the memory engine relies on fcntl, which
+exists on Unix only.
+"""
 
-def get_task_db(task_id):
-    conn = get_db_connection()
-    task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
-    conn.close()
-    return dict(task) if task else None
+from importlib import import_module
+from persistence.storage import STORAGE_ENGINE
 
-def get_all_tasks_db():
-    conn = get_db_connection()
-    tasks = conn.execute("SELECT * FROM tasks").fetchall()
-    conn.close()
-    return [dict(task) for task in tasks]
+_engine = import_module(f"dao.{STORAGE_ENGINE}_task_dao")
 
-def update_task_db(task_id, update_data):
-    conn = get_db_connection()
-    existing_task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
-    if not existing_task:
-        conn.close()
-        return None
-    set_expressions = []
-    values = []
-    for key, value in update_data.items():
-        set_expressions.append(f"{key} = ?")
-        values.append(value)
-    if not set_expressions:
-        conn.close()
-        return dict(existing_task)
-    values.append(task_id)
-    conn.execute(f"UPDATE tasks SET {', '.join(set_expressions)} WHERE id = ?", values)
-    conn.commit()
-    updated_task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
-    conn.close()
-    return dict(updated_task)
+SORTABLE_COLUMNS = _engine.SORTABLE_COLUMNS
 
-def delete_task_db(task_id):
-    conn = get_db_connection()
-    existing_task = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
-    if not existing_task:
-        conn.close()
-        return False
-    conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-    conn.commit()
-    conn.close()
-    return True
-
-def get_stats_db():
-    conn = get_db_connection()
-    total = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
-    completed = conn.execute("SELECT COUNT(*) FROM tasks WHERE is_completed = 1").fetchone()[0]
-    pending = total - completed
-    conn.close()
-    return {"total": total, "completed": completed, "pending": pending}
+create_task_db = _engine.create_task_db
+create_tasks_bulk_db = _engine.create_tasks_bulk_db
+get_task_db = _engine.get_task_db
+get_all_tasks_db = _engine.get_all_tasks_db
+get_tasks_page_db = _engine.get_tasks_page_db
+get_task_json_db = _engine.get_task_json_db
+get_tasks_page_json_db = _engine.get_tasks_page_json_db
+search_tasks_db = _engine.search_tasks_db
+rebuild_search_index_db = _engine.rebuild_search_index_db
+get_changes_db = _engine.get_changes_db
+compact_changes_db = _engine.compact_changes_db
+update_task_db = _engine.update_task_db
+delete_task_db = _engine.delete_task_db
+update_tasks_bulk_db = _engine.update_tasks_bulk_db
+delete_tasks_bulk_db = _engine.delete_tasks_bulk_db
+get_stats_db = _engine.get_stats_db
+verify_stats_db = _engine.verify_stats_db
+rebuild_stats_db = _engine.rebuild_stats_db
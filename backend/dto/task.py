@@ -1,3 +1,4 @@
+from datetime import date
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -8,7 +9,7 @@ class TaskBase(BaseModel):
     """
     title: str
     description: Optional[str] = None
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None  # ISO-8601, YYYY-MM-DD
     priority: Optional[int] = 1
 
 class TaskCreate(TaskBase):
@@ -25,7 +26,7 @@ class TaskUpdate(BaseModel):
     """
     title: Optional[str] = None
     description: Optional[str] = None
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None
     priority: Optional[int] = None
     is_completed: Optional[bool] = None
 
@@ -36,14 +37,150 @@ class Task(TaskBase):
     """
     id: int  # Included in responses but not in requests
     is_completed: bool
+    created_at: Optional[str] = None  # UTC timestamps, set by the database
+    updated_at: Optional[str] = None
     class Config:
         orm_mode = True
 
+class TaskBulkUpdate(TaskUpdate):
+    """
+    Model for one item of a bulk update.
+    The id of the task plus the fields to change.
+    """
+    id: int
+
+class TaskBulkDelete(BaseModel):
+    """
+    Model for a bulk delete request.
+    """
+    ids: List[int]
+
+class BulkItemResult(BaseModel):
+    """
+    Outcome of one item of a bulk request.
+    Status is created, updated, deleted, not_found or failed; a failed item
+    carries the reason in error, and a failed create has no id.
+    """
+    id: Optional[int] = None
+    status: str
+    task: Optional[Task] = None
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    """
+    Model for bulk endpoint responses.
+    Results are in the same order as the request items.
+    """
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class TaskListQuery(BaseModel):
+    """
+    Model for the filter, sort and pagination options of GET /tasks/.
+    Sort is a column name, prefixed with "-" for descending order.
+    """
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    is_completed: Optional[bool] = None
+    priority: Optional[int] = None
+    due_from: Optional[date] = None
+    due_to: Optional[date] = None
+    sort: str = "id"
+
+class PriorityStats(BaseModel):
+    """
+    Task counts for a single priority level.
+    """
+    priority: Optional[int] = None
+    total: int
+    completed: int
+    pending: int
+
+class TaskSearchQuery(BaseModel):
+    """
+    Model for the options of GET /tasks/search.
+    With prefix, every search term also matches words it starts.
+    """
+    q: str
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    prefix: bool = True
+
+class TaskSearchHit(Task):
+    """
+    A task matched by full-text search.
+    Rank is the bm25 score (lower is better); title_highlight and snippet
+    are HTML-escaped text with matches wrapped in <mark>.
+    """
+    rank: float
+    title_highlight: str
+    snippet: Optional[str] = None
+
+class TaskChange(BaseModel):
+    """
+    One entry of the change feed.
+    Op is upsert (task holds the current row) or delete (a tombstone).
+    """
+    seq: int
+    op: str
+    id: int
+    task: Optional[Task] = None
+
+class TaskChangeFeed(BaseModel):
+    """
+    Model for the /tasks/changes response.
+    Pass last_seq as `since` on the next call. When resync is true the
+    client is too far behind: reload GET /tasks/ and continue from last_seq.
+    """
+    changes: List[TaskChange]
+    last_seq: int
+    has_more: bool
+    resync: bool = False
+
 class TaskStats(BaseModel):
     """
     Model for task statistics.
     Used for the /stats/ endpoint response.
+    Overdue and due-today only count pending tasks.
     """
     total: int
     completed: int
     pending: int
+    by_priority: List[PriorityStats] = []
+    overdue: int = 0
+    due_today: int = 0
+
+class PoolStats(BaseModel):
+    """
+    Model for database connection pool statistics.
+    Used for the /stats/db-pool endpoint response.
+    """
+    max_readers: int
+    readers_created: int
+    readers_idle: int
+    readers_in_use: int
+    reader_checkouts: int
+    reader_waits: int
+    reader_wait_seconds: float
+    writer_transactions: int
+    writer_rollbacks: int
+    writer_open: bool
+    write_batches: int = 0
+    write_jobs: int = 0
+    largest_write_batch: int = 0
+
+class CacheStats(BaseModel):
+    """
+    Model for read-cache counters.
+    Used for the /stats/cache endpoint response.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    version: int
@@ -1,11 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.tasks import router as tasks_router
 from api.stats import router as stats_router, root_info
-from persistence.database import init_db
+from api.metrics import router as metrics_router
+from monitoring import metrics
+from persistence.storage import init_storage, close_storage
+from persistence.executor import shutdown_executors
+from service.change_feed import change_broadcaster, compact_periodically
 
-app = FastAPI(title="TaskMaster API", description="A simple task management API")
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    compaction = asyncio.create_task(compact_periodically())
+    yield
+    compaction.cancel()
+    with suppress(asyncio.CancelledError):
+        await compaction
+    await change_broadcaster.stop()
+    shutdown_executors()
+    close_storage()
+
+app = FastAPI(title="TaskMaster API", description="A simple task management API", lifespan=lifespan)
+init_storage()
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,11 +30,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(tasks_router)
 app.include_router(stats_router)
 
+# Opt-in instrumentation, see monitoring/metrics.py
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(metrics_router)
+
 @app.get("/")
 def read_root():
     return root_info()
@@ -0,0 +1,132 @@
+"""
+TaskMaster API - Maintenance Commands
+
+Run from the backend/ directory:
+
+    python manage.py init-db        # create or upgrade the schema
+    python manage.py migrate        # apply pending migrations and show the schema version
+    python manage.py verify-stats   # compare stats counters with the tasks table
+    python manage.py rebuild-stats  # recompute stats counters from scratch
+    python manage.py rebuild-search # re-index every task for full-text search
+    python manage.py compact-changes # compact the change log now
+    python manage.py snapshot       # memory engine: snapshot the store and trim its log
+
+Commands act on the engine selected by TASKMASTER_STORAGE_ENGINE.
+"""
+
+import argparse
+import sys
+
+from persistence.database import migration_status
+from persistence.storage import STORAGE_ENGINE, init_storage, close_storage
+from dao.task_dao import verify_stats_db, rebuild_stats_db, rebuild_search_index_db, compact_changes_db
+from service.change_feed import DEFAULT_FEED_CONFIG
+
+
+def print_progress(migration, cursor):
+    print(f"Migration {migration.version}: backfilled through task {cursor}")
+
+
+def migrate(args):
+    if STORAGE_ENGINE != "sqlite":
+        print(f"The {STORAGE_ENGINE} storage engine has no schema migrations")
+        return 0
+    status = migration_status()
+    for migration in status["applied"]:
+        print(f"{migration['version']:>4}  {migration['completed_at']}  {migration['description']}")
+    print(f"Schema version {status['version']} (latest {status['latest']})")
+    if status["legacy_due_dates"]:
+        print(f"{status['legacy_due_dates']} unparseable due dates were cleared and kept in legacy_due_date")
+    return 0
+
+
+def verify_stats(args):
+    drift = verify_stats_db()
+    if not drift:
+        print("Stats counters are consistent")
+        return 0
+    for entry in drift:
+        print(f"Drift: {entry}")
+    if args.fix:
+        rebuild_stats_db()
+        print("Stats counters rebuilt")
+        return 0
+    return 1
+
+
+def rebuild_stats(args):
+    rebuild_stats_db()
+    print("Stats counters rebuilt")
+    return 0
+
+
+def rebuild_search(args):
+    rebuild_search_index_db()
+    print("Search index rebuilt")
+    return 0
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def compact_changes(args):
+    compacted_through = compact_changes_db(args.retain)
+    print(f"Change log compacted through seq {compacted_through}")
+    return 0
+
+
+def snapshot(args):
+    if STORAGE_ENGINE != "memory":
+        print(f"The {STORAGE_ENGINE} storage engine does not use snapshots")
+        return 0
+    from persistence.memory_store import get_store
+    store = get_store()
+    store.snapshot()
+    print(f"Snapshot written at log position {store.stats()['lsn']}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TaskMaster maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="Create or upgrade the database schema")
+
+    commands.add_parser("migrate", help="Apply pending schema migrations and show the schema version")
+
+    verify = commands.add_parser("verify-stats", help="Detect drift between stats counters and tasks")
+    verify.add_argument("--fix", action="store_true", help="Rebuild the counters if drift is found")
+
+    commands.add_parser("rebuild-stats", help="Recompute stats counters from the tasks table")
+
+    commands.add_parser("rebuild-search", help="Re-index every task in the full-text search index")
+
+    compact = commands.add_parser("compact-changes", help="Compact the change log")
+    compact.add_argument("--retain", type=positive_int, default=DEFAULT_FEED_CONFIG["retain"],
+                         help="Log entries to keep, at least 1")
+
+    commands.add_parser("snapshot", help="Snapshot the memory store and delete the log it covers")
+
+    args = parser.parse_args(argv)
+    init_storage(progress=print_progress)
+    handlers = {
+        "init-db": lambda args: 0,
+        "migrate": migrate,
+        "verify-stats": verify_stats,
+        "rebuild-stats": rebuild_stats,
+        "rebuild-search": rebuild_search,
+        "compact-changes": compact_changes,
+        "snapshot": snapshot,
+    }
+    try:
+        return handlers[args.command](args)
+    finally:
+        close_storage()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+TaskMaster API - Metrics
+
+Opt-in hot-path instrumentation, enabled with TASKMASTER_METRICS=1:
+
+- MetricsMiddleware times every request per route template and status
+- @timed("service") / @timed("dao") time the service and DAO functions;
+  DAO time is the time spent running SQL, and DAO calls also count the rows
+  they return
+- the write queue times each group commit
+
+Everything is exported in the Prometheus text format by GET /metrics.
+When metrics are disabled @timed returns the function unchanged and the
+middleware is not installed, so the hot path pays nothing.
+"""
+
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("TASKMASTER_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+# Upper bounds in seconds, from 0.5 ms to 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = dict(self._series)
+        for labels, value in sorted(series.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+http_request_duration = Histogram(
+    "taskmaster_http_request_duration_seconds",
+    "Time from receiving a request to sending its response headers.",
+    ("method", "route", "status"),
+)
+layer_duration = Histogram(
+    "taskmaster_layer_duration_seconds",
+    "Time spent in instrumented functions, by layer (service, dao, persistence).",
+    ("layer", "function"),
+)
+dao_rows = Counter(
+    "taskmaster_dao_rows_total",
+    "Rows returned by DAO functions.",
+    ("function",),
+)
+
+
+def _row_count(result):
+    if result is None or isinstance(result, (bool, int)):
+        return 0
+    if isinstance(result, (list, tuple, set)):
+        return len(result)
+    if isinstance(result, dict):
+        # get_changes_db wraps its rows with the log positions
+        if isinstance(result.get("changes"), list):
+            return len(result["changes"])
+    return 1
+
+
+def observe(layer, function, seconds):
+    layer_duration.observe((layer, function), seconds)
+
+
+def timed(layer):
+    """
+    Decorator recording the duration of each call under `layer`. DAO calls
+    also count the rows they return. A no-op unless metrics are enabled.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        name = fn.__name__
+        count_rows = layer == "dao"
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe(layer, name, time.perf_counter() - start)
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed_sync(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                observe(layer, name, time.perf_counter() - start)
+            if count_rows:
+                dao_rows.inc((name,), _row_count(result))
+            return result
+        return timed_sync
+    return decorate
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request. Requests are labelled by
+    route template (/tasks/{task_id}), not raw path, to bound cardinality;
+    streaming responses are timed to their first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe((scope["method"], path, str(status)), time.perf_counter() - start)
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start" and not recorded:
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        except Exception:
+            if not recorded:
+                record(500)
+            raise
+
+
+# Stats that only ever grow, exported as counters; the rest are point-in-time gauges
+MONOTONIC_STATS = frozenset((
+    "hits", "misses", "evictions", "expirations", "invalidations",
+    "reader_checkouts", "reader_waits", "reader_wait_seconds",
+    "writer_transactions", "writer_rollbacks", "write_batches", "write_jobs",
+))
+
+
+def _stats(prefix, values, help_text):
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, float)):
+            continue
+        if key in MONOTONIC_STATS:
+            name, kind = f"{prefix}_{key}_total", "counter"
+        else:
+            name, kind = f"{prefix}_{key}", "gauge"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return lines
+
+
+def render_metrics(pool, cache):
+    """
+    The Prometheus exposition text: the recorded histograms and counters,
+    plus the current connection pool / write queue and cache statistics.
+    """
+    lines = []
+    for metric in (http_request_duration, layer_duration, dao_rows):
+        lines += metric.render()
+    lines += _stats("taskmaster_db_pool", pool, "Connection pool and write queue statistic, see GET /stats/db-pool.")
+    lines += _stats("taskmaster_cache", cache, "Read cache statistic, see GET /stats/cache.")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    for metric in (http_request_duration, layer_duration, dao_rows):
+        with metric._lock:
+            metric._series.clear()
@@ -2,22 +2,449 @@
 TaskMaster API - Database Setup
 
 This file handles the SQLite database connection setup for the TaskMaster API.
-Provides functions to establish database connections and initialize the database.
+Connections are managed by a small pool: a bounded set of reader connections
+that threads check out, plus a single writer connection that serializes all
+writes. The database runs in WAL mode so readers never block the writer.
 """
 
-import sqlite3
 import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
 #Define the database file path, the database will be created in the same dir as the script
-DATABASE_PATH = Path(__file__).parent / "taskmaster.db"
+DATABASE_PATH = Path(os.environ.get("TASKMASTER_DB_PATH", Path(__file__).parent / "taskmaster.db"))
+
+# Pool tuning, overridable through the environment or configure_pool()
+DEFAULT_POOL_CONFIG = {
+    "max_readers": int(os.environ.get("TASKMASTER_DB_MAX_READERS", 8)),
+    "checkout_timeout": float(os.environ.get("TASKMASTER_DB_CHECKOUT_TIMEOUT", 30.0)),
+    "busy_timeout_ms": int(os.environ.get("TASKMASTER_DB_BUSY_TIMEOUT_MS", 5000)),
+    "cache_size_kib": int(os.environ.get("TASKMASTER_DB_CACHE_SIZE_KIB", 16384)),
+    "mmap_size": int(os.environ.get("TASKMASTER_DB_MMAP_SIZE", 256 * 1024 * 1024)),
+    "synchronous": os.environ.get("TASKMASTER_DB_SYNCHRONOUS", "NORMAL"),
+    "statement_cache_size": int(os.environ.get("TASKMASTER_DB_STATEMENT_CACHE", 256)),
+}
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no reader connection becomes available in time."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reader connections plus one writer connection.
+
+    Readers are created lazily up to max_readers and handed out one per
+    thread; a thread that already holds a reader gets the same connection
+    back on nested checkouts. The writer is guarded by a lock and every
+    write runs inside BEGIN IMMEDIATE ... COMMIT.
+    """
+
+    def __init__(self, database_path, **config):
+        self.database_path = str(database_path)
+        self.config = {**DEFAULT_POOL_CONFIG, **config}
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._closed = False
+        self._stats = {
+            "reader_checkouts": 0,
+            "reader_waits": 0,
+            "reader_wait_seconds": 0.0,
+            "writer_transactions": 0,
+            "writer_rollbacks": 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.config["statement_cache_size"],
+        )
+        # Configure the connection to return rows as dictionaries
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.config['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA synchronous = {self.config['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.config['cache_size_kib'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config['mmap_size'])}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Check out a reader connection for the duration of the block."""
+        writer_depth = getattr(self._local, "writer_depth", 0)
+        if writer_depth:
+            # Reads inside a write transaction must see its uncommitted rows
+            yield self._writer
+            return
+        held = getattr(self._local, "reader", None)
+        if held is not None:
+            self._local.reader_depth += 1
+            try:
+                yield held
+            finally:
+                self._local.reader_depth -= 1
+            return
+        conn = self._checkout()
+        self._local.reader = conn
+        self._local.reader_depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.reader = None
+            self._local.reader_depth = 0
+            self._checkin(conn)
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.config["checkout_timeout"]
+        waited_since = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.config["max_readers"]:
+                    self._created += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._created -= 1
+                        raise
+                    break
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    self._stats["reader_waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise PoolTimeoutError("Timed out waiting for a database connection")
+            self._stats["reader_checkouts"] += 1
+            if waited_since is not None:
+                self._stats["reader_wait_seconds"] += time.monotonic() - waited_since
+            return conn
+
+    def _checkin(self, conn):
+        with self._cond:
+            if self._closed:
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def writer(self):
+        """
+        Run the block inside a write transaction on the writer connection.
+
+        Nested calls from the same thread join the outer transaction.
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._writer is None:
+                self._writer = self._connect()
+            depth = getattr(self._local, "writer_depth", 0)
+            if depth:
+                self._local.writer_depth = depth + 1
+                try:
+                    yield self._writer
+                finally:
+                    self._local.writer_depth = depth
+                return
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.writer_depth = 1
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self._stats["writer_rollbacks"] += 1
+                raise
+            else:
+                try:
+                    conn.execute("COMMIT")
+                except BaseException:
+                    # A failed COMMIT, e.g. on a deferred constraint, leaves the transaction open
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    self._stats["writer_rollbacks"] += 1
+                    raise
+                self._stats["writer_transactions"] += 1
+            finally:
+                self._local.writer_depth = 0
+
+    def stats(self):
+        """Return a snapshot of pool sizing and usage counters."""
+        with self._cond:
+            idle = len(self._idle)
+            snapshot = {
+                "max_readers": self.config["max_readers"],
+                "readers_created": self._created,
+                "readers_idle": idle,
+                "readers_in_use": self._created - idle,
+                **self._stats,
+            }
+        snapshot["reader_wait_seconds"] = round(snapshot["reader_wait_seconds"], 6)
+        snapshot["writer_open"] = self._writer is not None
+        return snapshot
+
+    def close(self):
+        """Close idle readers and the writer; busy readers close on check-in."""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._created -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_PATH)
+    return _pool
+
+
+def configure_pool(**config):
+    """
+    Replace the process-wide pool with one using the given settings.
+
+    Accepts any key of DEFAULT_POOL_CONFIG, e.g. configure_pool(max_readers=4).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(DATABASE_PATH, **config)
+    return _pool
+
+
+def close_pool():
+    """Close the process-wide pool; the next get_pool() call opens a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+@contextmanager
+def read_connection():
+    """
+    Context manager yielding a pooled connection for read-only queries.
+
+    Usage:
+        with read_connection() as conn:
+            conn.execute("SELECT ...")
+    """
+    with get_pool().reader() as conn:
+        yield conn
+
+
+@contextmanager
+def write_transaction():
+    """
+    Context manager yielding the writer connection inside a transaction.
+
+    Commits when the block exits normally and rolls back on an exception.
+    """
+    with get_pool().writer() as conn:
+        yield conn
+
+
+def _stats_trigger_body(row, delta):
+    """
+    SQL statements applying `delta` (+1 or -1) for the OLD/NEW `row` to the
+    counter tables. NULL priorities are matched with IS, so the row is
+    created with a zero count first rather than relying on an upsert.
+    """
+    key = f"priority IS {row}.priority AND is_completed IS {row}.is_completed"
+    statements = [
+        f"INSERT INTO task_counts (priority, is_completed, count) "
+        f"SELECT {row}.priority, {row}.is_completed, 0 "
+        f"WHERE NOT EXISTS (SELECT 1 FROM task_counts WHERE {key})",
+        f"UPDATE task_counts SET count = count + ({delta}) WHERE {key}",
+    ]
+    pending_due = f"{row}.due_date IS NOT NULL AND {row}.is_completed IS NOT 1"
+    if delta > 0:
+        statements.append(
+            f"INSERT INTO task_due_counts (due_date, pending) SELECT {row}.due_date, 1 "
+            f"WHERE {pending_due} ON CONFLICT(due_date) DO UPDATE SET pending = pending + 1"
+        )
+    else:
+        statements.append(
+            f"UPDATE task_due_counts SET pending = pending - 1 WHERE due_date = {row}.due_date AND {pending_due}"
+        )
+        statements.append(f"DELETE FROM task_due_counts WHERE due_date = {row}.due_date AND pending <= 0")
+    return "".join(f"\n        {statement};" for statement in statements)
+
+def create_stats_counters(conn):
+    """
+    Create the counter tables behind GET /stats/ and the triggers that keep
+    them current. Triggers run inside the writing statement's transaction,
+    so the counters can never disagree with a committed tasks table.
+
+    task_counts holds one row per (priority, is_completed) pair, and
+    task_due_counts the number of pending tasks per due date, which lets
+    overdue / due-today counts be answered from a small indexed table.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS task_counts (
+        priority INTEGER,
+        is_completed BOOLEAN,
+        count INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS task_due_counts (
+        due_date TEXT PRIMARY KEY,
+        pending INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_insert AFTER INSERT ON tasks BEGIN{_stats_trigger_body("NEW", 1)}
+    END""")
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_delete AFTER DELETE ON tasks BEGIN{_stats_trigger_body("OLD", -1)}
+    END""")
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_update AFTER UPDATE OF priority, is_completed, due_date ON tasks
+    BEGIN{_stats_trigger_body("OLD", -1)}{_stats_trigger_body("NEW", 1)}
+    END""")
+
+def rebuild_stats_counters(conn):
+    """
+    Recompute the counter tables from the tasks table.
+    Must run inside a write transaction.
+    """
+    conn.execute("DELETE FROM task_counts")
+    conn.execute(
+        "INSERT INTO task_counts (priority, is_completed, count) "
+        "SELECT priority, is_completed, COUNT(*) FROM tasks GROUP BY priority, is_completed"
+    )
+    conn.execute("DELETE FROM task_due_counts")
+    conn.execute(
+        "INSERT INTO task_due_counts (due_date, pending) "
+        "SELECT due_date, COUNT(*) FROM tasks WHERE due_date IS NOT NULL AND is_completed IS NOT 1 GROUP BY due_date"
+    )
+
+def create_search_index(conn):
+    """
+    Create the FTS5 index over task titles and descriptions.
+
+    tasks_fts is an external-content table: it stores only the index and
+    reads column values from tasks, so triggers must mirror every change.
+    Prefix indexes on 2 and 3 characters make short prefix queries cheap.
+    """
+    conn.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title,
+        description,
+        content='tasks',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    ''')
+
+def rebuild_search_index(conn):
+    """
+    Re-index every task from the tasks table to repair the index. Must run
+    inside a write transaction, which keeps the triggers from interleaving
+    with it.
+    """
+    conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+def create_change_log(conn):
+    """
+    Create the change log behind GET /tasks/changes.
+
+    Triggers append one row per insert, update or delete to task_changes in
+    the writing transaction, so seq is a gap-free commit order for readers.
+    task_change_log_state.compacted_through is the highest seq removed by
+    compaction; clients that last synced before it must resync.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS task_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER NOT NULL,
+        op TEXT NOT NULL                       -- 'upsert' or 'delete'
+    )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_task_changes_task_seq ON task_changes (task_id, seq)")
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS task_change_log_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        compacted_through INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO task_change_log_state (id, compacted_through) VALUES (1, 0)")
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_changes_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'upsert');
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_changes_update AFTER UPDATE ON tasks BEGIN
+        INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'upsert');
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_changes_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO task_changes (task_id, op) VALUES (OLD.id, 'delete');
+    END
+    ''')
 
 def get_db_connection():
      """
-     Creates and returns a connection to the SQLite database.
-     
-     The row_factory setting allows us to access columns by name
-     (like a dictionary) instead of by index.
+     Creates and returns a standalone connection to the SQLite database.
+
+     Kept for scripts and one-off maintenance; application code should use
+     read_connection() / write_transaction() instead.
 
      Returns:
      sqlite3.Connection: A connection to the SQLite database
@@ -29,9 +456,359 @@ def get_db_connection():
 
      return conn
 
-def init_db():
+def _table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (name,)
+    ).fetchone() is not None
+
+def _baseline_schema(conn):
+    """
+    Migration 1, schema step: the schema as it stood before versioned
+    migrations.
+
+    Written with IF NOT EXISTS so it also adopts databases created by the
+    old init_db(). Only DDL runs here; derived structures created for a
+    table that already has rows are queued in baseline_backfills and filled
+    by _backfill_baseline.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,  -- Unique identifier for each task, auto-incremented
+        title TEXT NOT NULL,                   -- Task title (required)
+        description TEXT,                      -- Task description (optional)
+        due_date TEXT,                         -- Due date in text format (optional)
+        priority INTEGER DEFAULT 1,            -- Priority level (1=Low, 2=Medium, 3=High)
+        is_completed BOOLEAN DEFAULT 0         -- Completion status (0=False, 1=True)
+    )
+    ''')
+    # Composite indexes backing the filter/sort combinations of GET /tasks/.
+    # SQLite appends the rowid to every index, so each one also orders by id
+    # within equal keys, which is what keyset pagination seeks on.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (is_completed)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_completed_due_date ON tasks (is_completed, due_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_completed_priority ON tasks (is_completed, priority)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority_due_date ON tasks (priority, due_date)")
+    # Derived structure name -> last task id it must be backfilled through;
+    # later rows are covered by the structure's triggers
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS baseline_backfills (
+        name TEXT PRIMARY KEY,
+        through_id INTEGER NOT NULL
+    )
+    ''')
+    last_id = conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0]
+    for name, table, create in (
+        ("stats_counters", "task_counts", create_stats_counters),
+        ("search_index", "tasks_fts", create_search_index),
+        ("change_log", "task_changes", create_change_log),
+    ):
+        if not _table_exists(conn, table) and last_id is not None:
+            conn.execute("INSERT INTO baseline_backfills (name, through_id) VALUES (?, ?)", (name, last_id))
+        create(conn)
+
+def _backfill_stats_counters(conn, first_id, last_id):
+    groups = conn.execute(
+        "SELECT priority, is_completed, COUNT(*) FROM tasks WHERE id BETWEEN ? AND ? GROUP BY priority, is_completed",
+        (first_id, last_id)
+    ).fetchall()
+    for priority, is_completed, count in groups:
+        # NULL priorities are matched with IS, as in the counter triggers
+        conn.execute(
+            "INSERT INTO task_counts (priority, is_completed, count) SELECT ?, ?, 0 "
+            "WHERE NOT EXISTS (SELECT 1 FROM task_counts WHERE priority IS ? AND is_completed IS ?)",
+            (priority, is_completed, priority, is_completed)
+        )
+        conn.execute(
+            "UPDATE task_counts SET count = count + ? WHERE priority IS ? AND is_completed IS ?",
+            (count, priority, is_completed)
+        )
+    conn.execute(
+        "INSERT INTO task_due_counts (due_date, pending) "
+        "SELECT due_date, COUNT(*) FROM tasks "
+        "WHERE id BETWEEN ? AND ? AND due_date IS NOT NULL AND is_completed IS NOT 1 GROUP BY due_date "
+        "ON CONFLICT(due_date) DO UPDATE SET pending = pending + excluded.pending",
+        (first_id, last_id)
+    )
+
+def _backfill_search_index(conn, first_id, last_id):
+    conn.execute(
+        "INSERT INTO tasks_fts (rowid, title, description) "
+        "SELECT id, title, description FROM tasks WHERE id BETWEEN ? AND ?",
+        (first_id, last_id)
+    )
+
+def _backfill_change_log(conn, first_id, last_id):
+    # Seed the log with existing tasks so a sync from seq 0 sees all of them
+    conn.execute(
+        "INSERT INTO task_changes (task_id, op) SELECT id, 'upsert' FROM tasks WHERE id BETWEEN ? AND ? ORDER BY id",
+        (first_id, last_id)
+    )
+
+BASELINE_BACKFILLS = {
+    "stats_counters": _backfill_stats_counters,
+    "search_index": _backfill_search_index,
+    "change_log": _backfill_change_log,
+}
+
+def _backfill_baseline(conn, after_id, batch_size):
+    """
+    Migration 1, backfill step: fill one batch of tasks into every derived
+    structure queued by the schema step. Returns the last id handled, or
+    None once every queued structure is complete.
+
+    Assumes nothing else writes the rows being backfilled while it runs, as
+    with every migration: init_db() migrates before the app starts serving.
+    """
+    pending = conn.execute("SELECT name, through_id FROM baseline_backfills").fetchall()
+    through_id = max((row["through_id"] for row in pending), default=0)
+    batch = conn.execute(
+        "SELECT id FROM tasks WHERE id > ? AND id <= ? ORDER BY id LIMIT ?", (after_id, through_id, batch_size)
+    ).fetchall()
+    if not batch:
+        conn.execute("DROP TABLE baseline_backfills")
+        return None
+    first_id, last_id = batch[0]["id"], batch[-1]["id"]
+    for row in pending:
+        if first_id <= row["through_id"]:
+            BASELINE_BACKFILLS[row["name"]](conn, first_id, min(last_id, row["through_id"]))
+    return last_id
+
+# Formats accepted for legacy free-text due dates, tried after ISO-8601
+LEGACY_DATE_FORMATS = ("%Y/%m/%d", "%m/%d/%Y", "%d.%m.%Y", "%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y")
+
+def normalize_due_date(value):
+    """
+    Return `value` as an ISO-8601 date (YYYY-MM-DD), or None if it cannot
+    be parsed. Date-times keep only their date part.
+    """
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).date().isoformat()
+    except ValueError:
+        pass
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+# An ISO date round-trips through SQLite's date() unchanged; anything else
+# does not. date() alone passes impossible days such as 2025-02-30 through,
+# while a '+0 days' modifier normalizes them to the next month
+VALID_DUE_DATE = "NEW.due_date IS NULL OR date(NEW.due_date, '+0 days') IS NEW.due_date"
+
+def _create_due_date_triggers(conn):
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_due_date_check_insert BEFORE INSERT ON tasks
+    WHEN NOT ({VALID_DUE_DATE}) BEGIN
+        SELECT RAISE(ABORT, 'due_date must be an ISO-8601 date (YYYY-MM-DD)');
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_due_date_check_update BEFORE UPDATE OF due_date ON tasks
+    WHEN NOT ({VALID_DUE_DATE}) BEGIN
+        SELECT RAISE(ABORT, 'due_date must be an ISO-8601 date (YYYY-MM-DD)');
+    END
+    """)
+
+def _typed_due_date_schema(conn):
+    """
+    Migration 2, schema step: add timestamps, a column preserving due dates
+    that cannot be parsed, and triggers enforcing ISO due dates.
+
+    SQLite cannot add a CHECK constraint to an existing column without
+    rebuilding the table, so the constraint is enforced by triggers instead;
+    ISO dates sort chronologically, so the existing due_date indexes serve
+    range queries as they are.
+    """
+    conn.execute("ALTER TABLE tasks ADD COLUMN created_at TEXT")
+    conn.execute("ALTER TABLE tasks ADD COLUMN updated_at TEXT")
+    conn.execute("ALTER TABLE tasks ADD COLUMN legacy_due_date TEXT")
+    _create_due_date_triggers(conn)
+
+def _normalize_due_dates(conn, after_id, batch_size):
+    """
+    Migration 2, backfill step: rewrite one batch of due dates as ISO dates
+    and stamp rows that predate the timestamp columns with the migration
+    time. Blank values become NULL; unparseable ones move to legacy_due_date.
+    Returns the last id handled, or None once every row is done.
+    """
+    rows = conn.execute(
+        "SELECT id, due_date FROM tasks WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    normalized, unparseable = [], []
+    for row in rows:
+        if row["due_date"] is None:
+            continue
+        if not str(row["due_date"]).strip():
+            normalized.append((None, row["id"]))
+            continue
+        value = normalize_due_date(row["due_date"])
+        if value is None:
+            unparseable.append((row["due_date"], row["id"]))
+        elif value != row["due_date"]:
+            normalized.append((value, row["id"]))
+    conn.executemany("UPDATE tasks SET due_date = ? WHERE id = ?", normalized)
+    conn.executemany("UPDATE tasks SET due_date = NULL, legacy_due_date = ? WHERE id = ?", unparseable)
+    conn.execute(
+        "UPDATE tasks SET created_at = COALESCE(created_at, strftime('%Y-%m-%dT%H:%M:%fZ', 'now')), "
+        "updated_at = COALESCE(updated_at, strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) "
+        "WHERE id BETWEEN ? AND ? AND (created_at IS NULL OR updated_at IS NULL)",
+        (rows[0]["id"], rows[-1]["id"])
+    )
+    return rows[-1]["id"]
+
+def _impossible_due_date_schema(conn):
+    """
+    Migration 3, schema step: replace the due date triggers of migration 2,
+    which accepted impossible days such as 2025-02-30.
+    """
+    conn.execute("DROP TRIGGER IF EXISTS tasks_due_date_check_insert")
+    conn.execute("DROP TRIGGER IF EXISTS tasks_due_date_check_update")
+    _create_due_date_triggers(conn)
+
+def _move_impossible_due_dates(conn, after_id, batch_size):
+    """
+    Migration 3, backfill step: move one batch of impossible due dates
+    written under the old triggers to legacy_due_date. Returns the last id
+    handled, or None once every row is done.
+    """
+    rows = conn.execute(
+        "SELECT id FROM tasks WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    conn.execute(
+        "UPDATE tasks SET legacy_due_date = due_date, due_date = NULL "
+        "WHERE id BETWEEN ? AND ? AND due_date IS NOT NULL AND date(due_date, '+0 days') IS NOT due_date",
+        (rows[0]["id"], rows[-1]["id"])
+    )
+    return rows[-1]["id"]
+
+def _priority_due_date_index_schema(conn):
+    """
+    Migration 4: indexes for pages sorted by priority and filtered by a due
+    date range. They are walked in (priority, id) order and carry due_date,
+    so the range is checked in the index and the page stops once full,
+    instead of seeking the range and sorting every match. Their prefixes
+    serve everything the indexes they replace did.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority_id_due_date ON tasks (priority, id, due_date)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_completed_priority_id_due_date "
+        "ON tasks (is_completed, priority, id, due_date)"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_tasks_priority")
+    conn.execute("DROP INDEX IF EXISTS idx_tasks_completed_priority")
+
+class Migration:
+    """
+    One schema version.
+
+    `schema(conn)` runs in a single short transaction. The optional
+    `backfill(conn, after_id, batch_size)` runs repeatedly, one transaction
+    per batch, so large tables are migrated without holding the write lock
+    for long; its progress is saved after every batch, so an interrupted
+    migration resumes where it stopped.
+    """
+
+    def __init__(self, version, description, schema, backfill=None):
+        self.version = version
+        self.description = description
+        self.schema = schema
+        self.backfill = backfill
+
+MIGRATIONS = [
+    Migration(
+        1, "Baseline schema: tasks, indexes, stats counters, search index, change log",
+        _baseline_schema, _backfill_baseline
+    ),
+    Migration(2, "ISO-8601 due dates, created_at/updated_at timestamps", _typed_due_date_schema, _normalize_due_dates),
+    Migration(3, "Reject impossible due dates", _impossible_due_date_schema, _move_impossible_due_dates),
+    Migration(4, "Indexes for priority-sorted pages filtered by due date", _priority_due_date_index_schema),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+MIGRATION_BATCH_SIZE = int(os.environ.get("TASKMASTER_MIGRATION_BATCH_SIZE", 2000))
+
+def schema_version():
+    with read_connection() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _apply_migration(migration, progress=None):
+    with write_transaction() as conn:
+        state = conn.execute(
+            "SELECT backfill_cursor FROM schema_migrations WHERE version = ?", (migration.version,)
+        ).fetchone()
+        if state is None:
+            migration.schema(conn)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description, backfill_cursor) VALUES (?, ?, 0)",
+                (migration.version, migration.description)
+            )
+            cursor = 0
+        else:
+            cursor = state["backfill_cursor"]
+    while migration.backfill is not None and cursor is not None:
+        with write_transaction() as conn:
+            cursor = migration.backfill(conn, cursor, MIGRATION_BATCH_SIZE)
+            conn.execute(
+                "UPDATE schema_migrations SET backfill_cursor = ? WHERE version = ?", (cursor, migration.version)
+            )
+        if progress and cursor is not None:
+            progress(migration, cursor)
+    with write_transaction() as conn:
+        conn.execute(
+            "UPDATE schema_migrations SET backfill_cursor = NULL, "
+            "completed_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE version = ?",
+            (migration.version,)
+        )
+        conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+
+def migrate(progress=None):
+    """
+    Bring the database up to LATEST_VERSION and return the version.
+
+    The version lives in PRAGMA user_version, so when nothing is pending
+    this costs a single header read.
+    """
+    current = schema_version()
+    if current >= LATEST_VERSION:
+        return current
+    with write_transaction() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            backfill_cursor INTEGER,            -- last id backfilled, NULL once complete
+            completed_at TEXT
+        )
+        ''')
+    for migration in MIGRATIONS:
+        if migration.version > current:
+            _apply_migration(migration, progress)
+    return LATEST_VERSION
+
+def migration_status():
+    """Applied migrations, oldest first, plus how many due dates were kept as legacy text."""
+    with read_connection() as conn:
+        applied = [dict(row) for row in conn.execute("SELECT * FROM schema_migrations ORDER BY version")]
+        # legacy_due_date only exists once migration 2 has started
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+        legacy = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE legacy_due_date IS NOT NULL"
+        ).fetchone()[0] if "legacy_due_date" in columns else 0
+    return {"version": schema_version(), "latest": LATEST_VERSION, "applied": applied, "legacy_due_dates": legacy}
+
+def init_db(progress=None):
      """
-     Initializees the db by creating tasks table if it DNE
+     Initializees the db by applying any pending schema migrations
 
      Called when the app starts to ensure proper set up of the DB
      """
@@ -39,19 +816,13 @@ def init_db():
      # Check if the database directory exists and create if not
      # if exist_ok=True then nothing happens
      os.makedirs(DATABASE_PATH.parent, exist_ok=True)
+
+     # WAL is persistent in the database file, so this only does work once
      conn = get_db_connection()
-     conn.execute('''
-     CREATE TABLE IF NOT EXISTS tasks (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,  -- Unique identifier for each task, auto-incremented
-          title TEXT NOT NULL,                   -- Task title (required)
-          description TEXT,                      -- Task description (optional)
-          due_date TEXT,                         -- Due date in text format (optional)
-          priority INTEGER DEFAULT 1,            -- Priority level (1=Low, 2=Medium, 3=High)
-          is_completed BOOLEAN DEFAULT 0         -- Completion status (0=False, 1=True)
-     )
-     ''')
-     conn.commit()
+     conn.execute("PRAGMA journal_mode = WAL")
      conn.close()
+
+     migrate(progress)
      # print(f"Database initialized at:{DATABASE_PATH}")
 
 # This allows running this script directly to initialize the database
@@ -0,0 +1,189 @@
+"""
+TaskMaster API - Async Database Executor
+
+Lets async code run the blocking sqlite3 DAO functions without tying up the
+AnyIO threadpool. Reads run on a small dedicated reader executor. Writes are
+queued to a single writer thread that drains the queue into batches and
+commits each batch in one transaction (group commit); every job runs inside
+its own savepoint so a failing write only rolls back itself. With the memory
+storage engine a batch is one log frame and one fsync instead.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from monitoring import metrics
+from persistence.storage import write_batch, write_job
+
+DEFAULT_EXECUTOR_CONFIG = {
+    "read_workers": int(os.environ.get("TASKMASTER_DB_READ_WORKERS", 4)),
+    "write_batch_max": int(os.environ.get("TASKMASTER_DB_WRITE_BATCH_MAX", 64)),
+    # How long the writer waits for more jobs after the first one arrives.
+    # 0 only groups writes that are already queued, adding no latency.
+    "write_batch_wait_ms": float(os.environ.get("TASKMASTER_DB_WRITE_BATCH_WAIT_MS", 0)),
+}
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Single writer thread that group-commits queued write jobs.
+
+    A job is a callable run on the writer thread inside the batch's
+    write_batch(), so DAO functions using write_transaction() (or the memory
+    store's transaction()) join the batch instead of committing their own.
+    """
+
+    def __init__(self, write_batch_max, write_batch_wait_ms):
+        self.max_batch = max(1, write_batch_max)
+        self.max_wait = write_batch_wait_ms / 1000
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"write_batches": 0, "write_jobs": 0, "largest_write_batch": 0}
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="taskmaster-db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            batch = [job]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        start = time.perf_counter()
+        try:
+            with write_batch():
+                for future, fn, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with write_job():
+                            result = fn(*args, **kwargs)
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+                    else:
+                        outcomes.append((future, result, None))
+        except Exception as exc:
+            # The commit itself failed, so none of the batch's writes landed
+            for future, _, _, _ in batch:
+                if future.running():
+                    future.set_exception(exc)
+            return
+        if metrics.ENABLED:
+            metrics.observe("persistence", "write_batch", time.perf_counter() - start)
+        self._stats["write_batches"] += 1
+        self._stats["write_jobs"] += len(outcomes)
+        self._stats["largest_write_batch"] = max(self._stats["largest_write_batch"], len(batch))
+        # Results are only released once the whole batch is durable
+        for future, result, exc in outcomes:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        return dict(self._stats)
+
+    def close(self):
+        """Stop the writer thread after it finishes the jobs already queued."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+
+_config = dict(DEFAULT_EXECUTOR_CONFIG)
+_reader_executor = None
+_write_queue = None
+_executor_lock = threading.Lock()
+
+
+def _get_reader_executor():
+    global _reader_executor
+    if _reader_executor is None:
+        with _executor_lock:
+            if _reader_executor is None:
+                _reader_executor = ThreadPoolExecutor(
+                    max_workers=_config["read_workers"], thread_name_prefix="taskmaster-db-reader"
+                )
+    return _reader_executor
+
+
+def _get_write_queue():
+    global _write_queue
+    if _write_queue is None:
+        with _executor_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(_config["write_batch_max"], _config["write_batch_wait_ms"])
+    return _write_queue
+
+
+async def run_read(fn, *args, **kwargs):
+    """Run a blocking read function on the reader executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_reader_executor(), lambda: fn(*args, **kwargs))
+
+
+async def run_write(fn, *args, **kwargs):
+    """Queue a blocking write function for the writer thread and await its commit."""
+    return await asyncio.wrap_future(_get_write_queue().submit(fn, *args, **kwargs))
+
+
+def configure_executors(**config):
+    """
+    Shut down the current executors and apply new settings.
+
+    Accepts any key of DEFAULT_EXECUTOR_CONFIG; executors restart lazily.
+    """
+    shutdown_executors()
+    with _executor_lock:
+        _config.update(config)
+
+
+def shutdown_executors():
+    global _reader_executor, _write_queue
+    with _executor_lock:
+        reader_executor, write_queue = _reader_executor, _write_queue
+        _reader_executor = _write_queue = None
+    if write_queue is not None:
+        write_queue.close()
+    if reader_executor is not None:
+        reader_executor.shutdown(wait=True)
+
+
+def executor_stats():
+    write_queue = _write_queue
+    if write_queue is None:
+        return {"write_batches": 0, "write_jobs": 0, "largest_write_batch": 0}
+    return write_queue.stats()
@@ -0,0 +1,781 @@
+"""
+TaskMaster API - In-Memory Task Store
+
+Storage behind TASKMASTER_STORAGE_ENGINE=memory. Every task is held in
+memory as a compact __slots__ record, with secondary indexes on completion,
+priority and due date and the same counters, change log and search index
+the SQLite engine keeps in tables, so lists, filters and stats never touch
+the disk.
+
+Durability comes from an append-only log. Each write batch (one group
+commit of the writer thread, or one sync DAO call) is appended as a single
+checksummed frame and fsynced once. Every `snapshot_every` logged changes
+the state is snapshotted in the background and a new log segment begun;
+segments covered by a durable snapshot are deleted. On startup the snapshot
+is loaded and the newer segments replayed; a torn frame at the end of the
+last segment, left by a crash mid-write, is discarded.
+
+Frames and snapshots are pickled, so the data directory must be as trusted
+as the SQLite database file. A lock file keeps a second process from
+opening the same directory.
+"""
+
+import bisect
+import fcntl
+import logging
+import os
+import pickle
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from persistence.text_index import TextIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_STORE_CONFIG = {
+    "data_dir": os.environ.get("TASKMASTER_MEMORY_DIR", str(Path(__file__).parent / "taskmaster-memory")),
+    # "batch" fsyncs once per write batch; "off" leaves flushing to the OS
+    "fsync": os.environ.get("TASKMASTER_MEMORY_FSYNC", "batch"),
+    "snapshot_every": int(os.environ.get("TASKMASTER_MEMORY_SNAPSHOT_EVERY", 100000)),
+}
+
+SNAPSHOT_FILE = "snapshot.bin"
+LOCK_FILE = "lock"
+SEGMENT_PREFIX = "log-"
+SNAPSHOT_VERSION = 1
+# Every frame is its payload length and CRC-32, then the pickled payload
+FRAME_HEADER = struct.Struct(">II")
+
+COLUMNS = ("id", "title", "description", "due_date", "priority", "is_completed", "created_at", "updated_at")
+# Columns with a sorted (type, value, id) index; id order is kept in MemoryStore.ids
+INDEXED_COLUMNS = ("due_date", "priority")
+# Column weights of the search index, matching the SQLite engine's bm25() call
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+
+class TaskRecord:
+    """
+    One task. Records are never modified once indexed: an update indexes a
+    new record in place of the old one, so a list of records is a consistent
+    snapshot. `json` caches the record's API encoding.
+    """
+
+    __slots__ = COLUMNS + ("json",)
+
+    def __init__(self, id, title, description, due_date, priority, is_completed, created_at, updated_at):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.due_date = due_date
+        self.priority = priority
+        self.is_completed = is_completed
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.json = None
+
+    def values(self):
+        return (self.id, self.title, self.description, self.due_date, self.priority,
+                self.is_completed, self.created_at, self.updated_at)
+
+    def as_dict(self):
+        return dict(zip(COLUMNS, self.values()))
+
+
+def sort_key(value, task_id):
+    """
+    Index key of a column value, ordered as SQLite orders values: NULLs,
+    then numbers, then text; ties by id.
+    """
+    if value is None:
+        return (0, 0, task_id)
+    if isinstance(value, str):
+        return (2, value, task_id)
+    return (1, value, task_id)
+
+
+class SortedKeys:
+    """
+    Sorted index keys, stored as blocks of up to 2 * BLOCK_SIZE keys so an
+    insert or delete shifts one block rather than the whole index. The
+    iterators must be consumed under the store lock.
+    """
+
+    BLOCK_SIZE = 1000
+
+    def __init__(self, keys=()):
+        keys = list(keys)
+        self._blocks = [keys[start:start + self.BLOCK_SIZE] for start in range(0, len(keys), self.BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, key):
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+        else:
+            index = min(bisect.bisect_left(self._maxes, key), len(self._blocks) - 1)
+            block = self._blocks[index]
+            bisect.insort(block, key)
+            self._maxes[index] = block[-1]
+            if len(block) > 2 * self.BLOCK_SIZE:
+                half = len(block) // 2
+                self._blocks[index:index + 1] = [block[:half], block[half:]]
+                self._maxes[index:index + 1] = [block[half - 1], block[-1]]
+        self._len += 1
+
+    def remove(self, key):
+        index = bisect.bisect_left(self._maxes, key)
+        block = self._blocks[index]
+        del block[bisect.bisect_left(block, key)]
+        if block:
+            self._maxes[index] = block[-1]
+        else:
+            del self._blocks[index]
+            del self._maxes[index]
+        self._len -= 1
+
+    def rank(self, key):
+        """Number of keys below `key`."""
+        index = bisect.bisect_left(self._maxes, key)
+        below = sum(len(block) for block in self._blocks[:index])
+        if index < len(self._blocks):
+            below += bisect.bisect_left(self._blocks[index], key)
+        return below
+
+    def after(self, key=None):
+        """Keys above `key` (every key if None), ascending."""
+        index = offset = 0
+        if key is not None:
+            index = bisect.bisect_right(self._maxes, key)
+            if index < len(self._blocks):
+                offset = bisect.bisect_right(self._blocks[index], key)
+        for block in self._blocks[index:]:
+            yield from block[offset:] if offset else block
+            offset = 0
+
+    def before(self, key=None):
+        """Keys below `key` (every key if None), descending."""
+        index = len(self._blocks) - 1
+        offset = None
+        if key is not None:
+            index = bisect.bisect_left(self._maxes, key)
+            if index < len(self._blocks):
+                offset = bisect.bisect_left(self._blocks[index], key)
+            else:
+                index -= 1
+        for position in range(index, -1, -1):
+            block = self._blocks[position]
+            yield from reversed(block if offset is None else block[:offset])
+            offset = None
+
+    def between(self, low, high):
+        """Keys from `low` up to, not including, `high`, ascending."""
+        index = bisect.bisect_left(self._maxes, low)
+        offset = bisect.bisect_left(self._blocks[index], low) if index < len(self._blocks) else 0
+        for block in self._blocks[index:]:
+            for key in block[offset:] if offset else block:
+                if key >= high:
+                    return
+                yield key
+            offset = 0
+
+
+def _check_due_date(value):
+    # Same rule as the SQLite engine's due-date triggers
+    if value is None:
+        return
+    try:
+        valid = date.fromisoformat(value).isoformat() == value
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise ValueError("due_date must be an ISO-8601 date (YYYY-MM-DD)")
+
+
+def _frame(payload):
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_frames(data):
+    """
+    Yield (offset, payload) for each intact frame of `data`, stopping at the
+    first torn or corrupt one; the last offset yielded plus its frame size
+    is where valid data ends.
+    """
+    offset = 0
+    while offset + FRAME_HEADER.size <= len(data):
+        length, checksum = FRAME_HEADER.unpack_from(data, offset)
+        start = offset + FRAME_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield offset, payload
+        offset = start + length
+
+
+class MemoryStore:
+    """
+    Tasks, their indexes and the change log, plus the log that persists them.
+
+    Readers hold `lock` while they walk the structures. Writes run inside
+    batch() (the writer thread's group commit) or transaction() (one DAO
+    call), which apply changes under `lock` and log them when the batch ends.
+    job() is the savepoint of one queued write: if it fails, only its own
+    changes are undone.
+    """
+
+    def __init__(self, data_dir, fsync="batch", snapshot_every=100000):
+        self.data_dir = Path(data_dir)
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self.lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        self._reset()
+        self._segment = None
+        self._lock_file = None
+        self._snapshot_thread = None
+        self._failed = None
+
+    def _reset(self):
+        self.tasks = {}
+        self.ids = SortedKeys()
+        self.sort_index = {column: SortedKeys() for column in INDEXED_COLUMNS}
+        self.by_completed = {}
+        self.by_priority = {}
+        # The counters behind GET /stats/, as in task_counts and task_due_counts
+        self.counts = {}
+        self.due_pending = {}
+        # The change log: the latest change per task by seq, and every seq in
+        # order; seqs missing from `changes` were superseded
+        self.changes = {}
+        self.latest_change = {}
+        self.change_seqs = []
+        self.last_seq = 0
+        self.compacted_through = 0
+        self.next_id = 1
+        # Built on the first search, then maintained with every write
+        self.text_index = None
+        self._batch_depth = 0
+        self._pending = []
+        self._undo = []
+        self._lsn = 0
+        self._logged_since_snapshot = 0
+
+    # Indexes
+
+    def _add_counts(self, record, delta):
+        key = (record.priority, record.is_completed)
+        count = self.counts.get(key, 0) + delta
+        if count:
+            self.counts[key] = count
+        else:
+            self.counts.pop(key, None)
+        if record.due_date is not None and record.is_completed != 1:
+            pending = self.due_pending.get(record.due_date, 0) + delta
+            if pending > 0:
+                self.due_pending[record.due_date] = pending
+            else:
+                self.due_pending.pop(record.due_date, None)
+
+    def _index(self, record):
+        task_id = record.id
+        self.tasks[task_id] = record
+        self.ids.add(task_id)
+        for column in INDEXED_COLUMNS:
+            self.sort_index[column].add(sort_key(getattr(record, column), task_id))
+        self.by_completed.setdefault(record.is_completed, set()).add(task_id)
+        self.by_priority.setdefault(record.priority, set()).add(task_id)
+        self._add_counts(record, 1)
+        if self.text_index is not None:
+            self.text_index.add(task_id, record.title, record.description)
+
+    def _unindex(self, record):
+        task_id = record.id
+        del self.tasks[task_id]
+        self.ids.remove(task_id)
+        for column in INDEXED_COLUMNS:
+            self.sort_index[column].remove(sort_key(getattr(record, column), task_id))
+        self._discard(self.by_completed, record.is_completed, task_id)
+        self._discard(self.by_priority, record.priority, task_id)
+        self._add_counts(record, -1)
+        if self.text_index is not None:
+            self.text_index.remove(task_id, record.title, record.description)
+
+    @staticmethod
+    def _discard(index, value, task_id):
+        ids = index.get(value)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del index[value]
+
+    def _reindex(self, old, new):
+        """Replace `old` by `new` (same id), touching only the indexes whose column changed."""
+        task_id = new.id
+        self.tasks[task_id] = new
+        for column in INDEXED_COLUMNS:
+            old_value, new_value = getattr(old, column), getattr(new, column)
+            if old_value != new_value:
+                self.sort_index[column].remove(sort_key(old_value, task_id))
+                self.sort_index[column].add(sort_key(new_value, task_id))
+        if old.is_completed != new.is_completed:
+            self._discard(self.by_completed, old.is_completed, task_id)
+            self.by_completed.setdefault(new.is_completed, set()).add(task_id)
+        if old.priority != new.priority:
+            self._discard(self.by_priority, old.priority, task_id)
+            self.by_priority.setdefault(new.priority, set()).add(task_id)
+        self._add_counts(old, -1)
+        self._add_counts(new, 1)
+        if self.text_index is not None and (old.title, old.description) != (new.title, new.description):
+            self.text_index.remove(task_id, old.title, old.description)
+            self.text_index.add(task_id, new.title, new.description)
+
+    def _restore(self, task_id, record, next_id):
+        """Put task `task_id` back to `record` (None: absent); used to undo."""
+        current = self.tasks.get(task_id)
+        if current is not None and record is not None:
+            self._reindex(current, record)
+        elif current is not None:
+            self._unindex(current)
+        elif record is not None:
+            self._index(record)
+        self.next_id = next_id
+
+    def search_index(self):
+        """The full-text index, built from every task on first use. Call with `lock` held."""
+        if self.text_index is None:
+            text_index = TextIndex(SEARCH_WEIGHTS)
+            for record in self.tasks.values():
+                text_index.add(record.id, record.title, record.description)
+            self.text_index = text_index
+        return self.text_index
+
+    def rebuild_counters(self):
+        with self.lock:
+            self.counts = {}
+            self.due_pending = {}
+            for record in self.tasks.values():
+                self._add_counts(record, 1)
+
+    def rebuild_search_index(self):
+        with self.lock:
+            self.text_index = None
+            self.search_index()
+
+    # Change log
+
+    def change_head(self):
+        """Highest seq still in the log, or 0; the MAX(seq) of the SQLite engine."""
+        if self.last_seq in self.changes:
+            return self.last_seq
+        return max(self.changes, default=0)
+
+    def _append_change(self, task_id, op):
+        seq = self.last_seq + 1
+        previous = self.latest_change.get(task_id)
+        previous_entry = self.changes.pop(previous) if previous is not None else None
+        self.changes[seq] = (task_id, op)
+        self.latest_change[task_id] = seq
+        self.change_seqs.append(seq)
+        self.last_seq = seq
+
+        def undo():
+            del self.changes[seq]
+            self.change_seqs.pop()
+            self.last_seq = seq - 1
+            if previous is None:
+                del self.latest_change[task_id]
+            else:
+                self.changes[previous] = previous_entry
+                self.latest_change[task_id] = previous
+        self._undo.append(undo)
+
+    # Changes, as applied both by writes and by log replay
+
+    def _apply_put(self, values):
+        record = TaskRecord(*values)
+        old = self.tasks.get(record.id)
+        old_next_id = self.next_id
+        if old is None:
+            self._index(record)
+        else:
+            self._reindex(old, record)
+        self.next_id = max(self.next_id, record.id + 1)
+        self._undo.append(lambda: self._restore(record.id, old, old_next_id))
+        self._append_change(record.id, "upsert")
+        return record
+
+    def _apply_delete(self, task_id):
+        old = self.tasks.get(task_id)
+        if old is None:
+            return None
+        self._unindex(old)
+        next_id = self.next_id
+        self._undo.append(lambda: self._restore(task_id, old, next_id))
+        self._append_change(task_id, "delete")
+        return old
+
+    def _apply_compact(self, retain):
+        saved = (dict(self.changes), dict(self.latest_change), self.change_seqs, self.compacted_through)
+        live = [seq for seq in self.change_seqs if seq in self.changes]
+        drop = len(live) - retain
+        if drop > 0:
+            for seq in live[:drop]:
+                task_id, _ = self.changes.pop(seq)
+                if self.latest_change.get(task_id) == seq:
+                    del self.latest_change[task_id]
+            self.compacted_through = max(self.compacted_through, live[drop - 1])
+            live = live[drop:]
+        self.change_seqs = live
+
+        def undo():
+            self.changes, self.latest_change, self.change_seqs, self.compacted_through = saved
+        self._undo.append(undo)
+        return self.compacted_through
+
+    def _apply(self, entry):
+        op, argument = entry
+        if op == "put":
+            return self._apply_put(argument)
+        if op == "delete":
+            return self._apply_delete(argument)
+        if op == "compact":
+            return self._apply_compact(argument)
+        raise ValueError(f"Unknown log entry: {op}")
+
+    def _write(self, entry):
+        if not self._batch_depth:
+            raise RuntimeError("Writes must run inside transaction() or batch()")
+        result = self._apply(entry)
+        self._pending.append(entry)
+        return result
+
+    # Writes; call inside transaction()
+
+    def insert(self, task_data, now):
+        _check_due_date(task_data.get("due_date"))
+        if task_data.get("title") is None:
+            raise ValueError("NOT NULL constraint failed: tasks.title")
+        values = (
+            self.next_id, task_data["title"], task_data.get("description"), task_data.get("due_date"),
+            task_data.get("priority"), 0, now, now,
+        )
+        return self._write(("put", values))
+
+    def update(self, task_id, update_data, now):
+        old = self.tasks.get(task_id)
+        if old is None:
+            return None
+        if "due_date" in update_data:
+            _check_due_date(update_data["due_date"])
+        if update_data.get("title", old.title) is None:
+            raise ValueError("NOT NULL constraint failed: tasks.title")
+        new = old.as_dict()
+        new.update(update_data)
+        new["updated_at"] = now
+        return self._write(("put", tuple(new[column] for column in COLUMNS)))
+
+    def delete(self, task_id):
+        if task_id not in self.tasks:
+            return False
+        self._write(("delete", task_id))
+        return True
+
+    def compact_changes(self, retain):
+        return self._write(("compact", retain))
+
+    # Transactions
+
+    @contextmanager
+    def batch(self):
+        """
+        Group commit: every write inside is applied under `lock` and then
+        appended to the log as one frame with one fsync. An exception undoes
+        the whole batch.
+
+        Readers may see the batch while it is being synced; its writers are
+        only answered once the fsync returns. If writing the log fails, the
+        batch is undone in memory, so data that never reached the log is not
+        served afterwards, and every later batch raises RuntimeError until
+        the store is reopened.
+        """
+        with self._write_lock:
+            if self._failed is not None:
+                raise RuntimeError("The task log is unusable after a failed write") from self._failed
+            committed = False
+            with self.lock:
+                self._batch_depth = 1
+                try:
+                    yield
+                    committed = True
+                finally:
+                    if not committed:
+                        self._rollback(0, 0)
+                    entries, undo = self._pending, self._undo
+                    self._pending, self._undo = [], []
+                    self._batch_depth = 0
+            if entries:
+                try:
+                    self._commit(entries)
+                except BaseException:
+                    with self.lock:
+                        while undo:
+                            undo.pop()()
+                    raise
+
+    @contextmanager
+    def job(self):
+        """Savepoint for one write inside a batch."""
+        undo_mark, pending_mark = len(self._undo), len(self._pending)
+        try:
+            yield
+        except BaseException:
+            self._rollback(undo_mark, pending_mark)
+            raise
+
+    @contextmanager
+    def transaction(self):
+        """Join the running batch, or run as a batch of one."""
+        with self._write_lock:
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield
+                finally:
+                    self._batch_depth -= 1
+                return
+            with self.batch():
+                yield
+
+    def _rollback(self, undo_mark, pending_mark):
+        while len(self._undo) > undo_mark:
+            self._undo.pop()()
+        del self._pending[pending_mark:]
+
+    # Log and snapshots
+
+    def _segment_path(self, first_lsn):
+        return self.data_dir / f"{SEGMENT_PREFIX}{first_lsn:016d}"
+
+    def _segments(self):
+        """(first lsn, path) of every log segment, oldest first."""
+        segments = []
+        for path in self.data_dir.glob(f"{SEGMENT_PREFIX}*"):
+            suffix = path.name[len(SEGMENT_PREFIX):]
+            if suffix.isdigit():
+                segments.append((int(suffix), path))
+        return sorted(segments)
+
+    def _open_segment(self, first_lsn):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = open(self._segment_path(first_lsn), "ab")
+        self._sync_directory()
+
+    def _sync(self, file):
+        file.flush()
+        if self.fsync != "off":
+            os.fsync(file.fileno())
+
+    def _sync_directory(self):
+        if self.fsync == "off" or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.data_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _commit(self, entries):
+        self._lsn += 1
+        try:
+            self._segment.write(_frame(pickle.dumps((self._lsn, entries), pickle.HIGHEST_PROTOCOL)))
+            self._sync(self._segment)
+        except OSError as exc:
+            # The log may end in a partial frame; refuse further writes
+            self._failed = exc
+            raise
+        self._logged_since_snapshot += len(entries)
+        if self._logged_since_snapshot >= self.snapshot_every:
+            self.snapshot(wait=False)
+
+    def snapshot(self, wait=True):
+        """
+        Persist the current state and start a new log segment. The state is
+        copied under `lock` and written by a background thread; older
+        segments are deleted once the snapshot is durable.
+        """
+        with self._write_lock:
+            running = self._snapshot_thread
+            if running is not None and running.is_alive():
+                if not wait:
+                    return
+                running.join()
+            with self.lock:
+                state = {
+                    "version": SNAPSHOT_VERSION,
+                    "lsn": self._lsn,
+                    "next_id": self.next_id,
+                    "last_seq": self.last_seq,
+                    "compacted_through": self.compacted_through,
+                    "tasks": list(self.tasks.values()),
+                    "changes": [(seq, *self.changes[seq]) for seq in self.change_seqs if seq in self.changes],
+                }
+            self._open_segment(self._lsn + 1)
+            self._logged_since_snapshot = 0
+            thread = threading.Thread(
+                target=self._write_snapshot, args=(state,), name="taskmaster-snapshot", daemon=True
+            )
+            self._snapshot_thread = thread
+            thread.start()
+        if wait:
+            thread.join()
+
+    def _write_snapshot(self, state):
+        try:
+            state["tasks"] = [record.values() for record in state["tasks"]]
+            temporary = self.data_dir / f"{SNAPSHOT_FILE}.tmp"
+            with open(temporary, "wb") as file:
+                file.write(_frame(pickle.dumps(state, pickle.HIGHEST_PROTOCOL)))
+                self._sync(file)
+            os.replace(temporary, self.data_dir / SNAPSHOT_FILE)
+            self._sync_directory()
+            for first_lsn, path in self._segments():
+                if first_lsn <= state["lsn"]:
+                    path.unlink()
+        except Exception:
+            # The log segments are kept, so nothing is lost; retry at the next snapshot
+            logger.exception("Writing the task snapshot failed")
+
+    def open(self):
+        """Load the latest snapshot, replay the log after it and open it for appending."""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.data_dir / LOCK_FILE, "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(f"{self.data_dir} is in use by another process")
+        with self._write_lock, self.lock:
+            self._reset()
+            snapshot_path = self.data_dir / SNAPSHOT_FILE
+            if snapshot_path.exists():
+                frames = list(_read_frames(snapshot_path.read_bytes()))
+                if not frames:
+                    raise RuntimeError(f"Snapshot {snapshot_path} is corrupt")
+                self._load_snapshot(pickle.loads(frames[0][1]))
+            segments = self._segments()
+            for position, (first_lsn, path) in enumerate(segments):
+                self._replay_segment(path, last=position == len(segments) - 1)
+            self._undo = []
+            self._open_segment(segments[-1][0] if segments else self._lsn + 1)
+        return self
+
+    def _load_snapshot(self, state):
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise RuntimeError(f"Unsupported snapshot version {state.get('version')}")
+        records = [TaskRecord(*values) for values in state["tasks"]]
+        records.sort(key=lambda record: record.id)
+        self.tasks = {record.id: record for record in records}
+        self.ids = SortedKeys(record.id for record in records)
+        for column in INDEXED_COLUMNS:
+            self.sort_index[column] = SortedKeys(sorted(sort_key(getattr(record, column), record.id) for record in records))
+        for record in records:
+            self.by_completed.setdefault(record.is_completed, set()).add(record.id)
+            self.by_priority.setdefault(record.priority, set()).add(record.id)
+            self._add_counts(record, 1)
+        for seq, task_id, op in state["changes"]:
+            self.changes[seq] = (task_id, op)
+            self.latest_change[task_id] = seq
+            self.change_seqs.append(seq)
+        self._lsn = state["lsn"]
+        self.next_id = state["next_id"]
+        self.last_seq = state["last_seq"]
+        self.compacted_through = state["compacted_through"]
+
+    def _replay_segment(self, path, last):
+        data = path.read_bytes()
+        end = 0
+        for offset, payload in _read_frames(data):
+            end = offset + FRAME_HEADER.size + len(payload)
+            lsn, entries = pickle.loads(payload)
+            if lsn <= self._lsn:
+                continue
+            for entry in entries:
+                self._apply(entry)
+            self._undo = []
+            self._lsn = lsn
+            self._logged_since_snapshot += len(entries)
+        if end < len(data):
+            if not last:
+                raise RuntimeError(f"Log segment {path} is corrupt at byte {end}")
+            # A crash interrupted the last write; it was never acknowledged
+            logger.warning("Discarding %d bytes of incomplete log at the end of %s", len(data) - end, path)
+            with open(path, "r+b") as file:
+                file.truncate(end)
+                self._sync(file)
+
+    def close(self):
+        """Snapshot anything logged since the last snapshot, then close the log."""
+        with self._write_lock:
+            if self._segment is None:
+                return
+            if self._logged_since_snapshot and self._failed is None:
+                self.snapshot(wait=True)
+            elif self._snapshot_thread is not None:
+                self._snapshot_thread.join()
+            self._segment.close()
+            self._segment = None
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                "tasks": len(self.tasks),
+                "lsn": self._lsn,
+                "logged_since_snapshot": self._logged_since_snapshot,
+                "change_log_entries": len(self.changes),
+                "search_index_built": self.text_index is not None,
+            }
+
+
+_config = dict(DEFAULT_MEMORY_STORE_CONFIG)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide store, recovering it from disk on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MemoryStore(**_config).open()
+    return _store
+
+
+def configure_store(**config):
+    """
+    Close the current store and apply new settings; the next get_store()
+    reopens it. Accepts any key of DEFAULT_MEMORY_STORE_CONFIG.
+    """
+    close_store()
+    with _store_lock:
+        _config.update(config)
+
+
+def close_store():
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
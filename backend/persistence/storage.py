@@ -0,0 +1,80 @@
+"""
+TaskMaster API - Storage Engine Selection
+
+TASKMASTER_STORAGE_ENGINE picks where tasks live:
+
+- sqlite (default): the SQLite database of persistence.database
+- memory: the in-memory store of persistence.memory_store, persisted to
+  an append-only log with periodic snapshots
+
+dao.task_dao binds its functions to the matching DAO module; this module
+gives startup, shutdown and the write queue's group commit one entry
+point for either engine.
+"""
+
+import os
+from contextlib import contextmanager
+
+STORAGE_ENGINES = ("sqlite", "memory")
+
+STORAGE_ENGINE = os.environ.get("TASKMASTER_STORAGE_ENGINE", "sqlite").lower()
+if STORAGE_ENGINE not in STORAGE_ENGINES:
+    raise ValueError(
+        f"Unknown TASKMASTER_STORAGE_ENGINE {STORAGE_ENGINE!r}, expected one of: {', '.join(STORAGE_ENGINES)}"
+    )
+
+
+def init_storage(progress=None):
+    """Open the configured engine: migrate the SQLite schema, or recover the memory store from its log."""
+    if STORAGE_ENGINE == "memory":
+        from persistence.memory_store import get_store
+        get_store()
+    else:
+        from persistence.database import init_db
+        init_db(progress=progress)
+
+
+def close_storage():
+    if STORAGE_ENGINE == "memory":
+        from persistence.memory_store import close_store
+        close_store()
+    else:
+        from persistence.database import close_pool
+        close_pool()
+
+
+@contextmanager
+def write_batch():
+    """
+    One group commit: writes inside share a transaction (SQLite) or a log
+    frame and fsync (memory) and become durable together on exit.
+    """
+    if STORAGE_ENGINE == "memory":
+        from persistence.memory_store import get_store
+        with get_store().batch():
+            yield
+    else:
+        from persistence.database import get_pool
+        with get_pool().writer():
+            yield
+
+
+@contextmanager
+def write_job():
+    """Savepoint for one write inside write_batch(); an exception undoes only this job."""
+    if STORAGE_ENGINE == "memory":
+        from persistence.memory_store import get_store
+        with get_store().job():
+            yield
+        return
+    from persistence.database import get_pool
+    # Joins the connection of the enclosing write_batch()
+    with get_pool().writer() as conn:
+        conn.execute("SAVEPOINT write_job")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK TO write_job")
+            conn.execute("RELEASE write_job")
+            raise
+        conn.execute("RELEASE write_job")
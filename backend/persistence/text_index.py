@@ -0,0 +1,302 @@
+"""
+TaskMaster API - In-Memory Full-Text Index
+
+The search index of the memory storage engine. It mirrors what the SQLite
+engine gets from FTS5 (see create_search_index): the unicode61 tokenizer
+with diacritics removed, bm25() ranking with per-column weights, and
+highlight() / snippet() markup (HTML-escaped, as dao.sqlite_task_dao
+escapes it), so both engines answer GET /tasks/search with the same hits
+in the same order.
+"""
+
+import bisect
+import math
+from html import escape
+import re
+import unicodedata
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# FTS5's bm25() constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Matches one term of the queries built by service.task_service._fts_query
+QUERY_TERM_PATTERN = re.compile(r'"((?:[^"]|"")*)"(\*?)')
+
+COLUMNS = ("title", "description")
+
+
+def fold(token):
+    """Lower-case and strip diacritics, like unicode61 remove_diacritics 2."""
+    # NFD, not NFKD: unicode61 keeps ligatures and fullwidth forms distinct
+    decomposed = unicodedata.normalize("NFD", token)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    """(folded token, start, end) for every token of `text`."""
+    if not text:
+        return []
+    return [(fold(match.group()), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+
+class Phrase:
+    """One quoted term of a match query: consecutive tokens, the last optionally a prefix."""
+
+    def __init__(self, tokens, prefix):
+        self.tokens = tokens
+        self.prefix = prefix
+
+    def matches_at(self, tokens, position):
+        """True if the phrase occurs in `tokens` starting at `position`."""
+        if position + len(self.tokens) > len(tokens):
+            return False
+        for offset, token in enumerate(self.tokens):
+            candidate = tokens[position + offset][0]
+            last = offset == len(self.tokens) - 1
+            if candidate != token and not (last and self.prefix and candidate.startswith(token)):
+                return False
+        return True
+
+    def positions(self, tokens):
+        return [position for position in range(len(tokens)) if self.matches_at(tokens, position)]
+
+
+def parse_match(match):
+    """
+    Parse an FTS5 query of quoted terms, each optionally followed by "*",
+    all of which must match. Returns None if a term has no tokens.
+    """
+    phrases = []
+    for text, star in QUERY_TERM_PATTERN.findall(match):
+        tokens = [token for token, _, _ in tokenize(text.replace('""', '"'))]
+        if not tokens:
+            return None
+        phrases.append(Phrase(tokens, bool(star)))
+    return phrases or None
+
+
+def _instances(tokens, phrases):
+    """(position, phrase number, token count) of every phrase occurrence, in position order."""
+    return sorted(
+        (position, number, len(phrase.tokens))
+        for number, phrase in enumerate(phrases)
+        for position in phrase.positions(tokens)
+    )
+
+
+def _spans(instances):
+    """Merge overlapping occurrences into (first token, last token) spans, as FTS5 marks them."""
+    spans = []
+    for position, _, length in instances:
+        last = position + length - 1
+        if spans and position <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], last)
+        else:
+            spans.append([position, last])
+    return spans
+
+
+def _markup(text, tokens, instances, start, end):
+    """
+    HTML-escaped text from token `start` up to token `end`, wrapping each
+    occurrence in <mark></mark>. As in FTS5, an occurrence that begins
+    before the range is left unmarked and one running past its end is cut
+    there.
+    """
+    pieces = []
+    cursor = tokens[start][1]
+    for first, last in _spans(instances):
+        last = min(last, end - 1)
+        if first < start or first > last:
+            continue
+        pieces.append(escape(text[cursor:tokens[first][1]]))
+        pieces.append("<mark>" + escape(text[tokens[first][1]:tokens[last][2]]) + "</mark>")
+        cursor = tokens[last][2]
+    pieces.append(escape(text[cursor:tokens[end - 1][2]]))
+    return "".join(pieces)
+
+
+def highlight(text, phrases):
+    """highlight(): the whole column with every phrase occurrence marked."""
+    if text is None:
+        return None
+    tokens = tokenize(text)
+    if not tokens:
+        return escape(text)
+    markup = _markup(text, tokens, _instances(tokens, phrases), 0, len(tokens))
+    return escape(text[:tokens[0][1]]) + markup + escape(text[tokens[-1][2]:])
+
+
+def _sentence_starts(text, tokens):
+    """Positions of tokens starting a sentence: the first, and any after "." or ":" and whitespace."""
+    starts = [0]
+    for position in range(1, len(tokens)):
+        offset = tokens[position][1] - 1
+        while offset >= 0 and text[offset] in " \t\n\r":
+            offset -= 1
+        if 0 <= offset < tokens[position][1] - 1 and text[offset] in ".:":
+            starts.append(position)
+    return starts
+
+
+def _window_score(instances, start, max_tokens):
+    """
+    FTS5's snippet score of the window at `start`: 1000 for each phrase
+    found in it, 1 for each repeat; plus where its occurrences begin and end.
+    """
+    seen = set()
+    score = 0
+    first = last = None
+    for position, number, length in instances:
+        if start <= position < start + max_tokens:
+            score += 1 if number in seen else 1000
+            seen.add(number)
+            if first is None:
+                first = position
+            last = position + length
+    return score, first, last
+
+
+def snippet(text, phrases, max_tokens=16):
+    """
+    snippet(): the `max_tokens` tokens window FTS5 scores best, marked,
+    with "..." where the column text was cut. Windows are tried around
+    each occurrence, and from the start of its sentence with a bonus.
+    """
+    if text is None:
+        return None
+    tokens = tokenize(text)
+    if not tokens:
+        return escape(text)
+    instances = _instances(tokens, phrases)
+    starts = _sentence_starts(text, tokens)
+    best_score = best_start = 0
+    for position, _, _ in instances:
+        score, first, last = _window_score(instances, position, max_tokens)
+        if score > best_score:
+            # C integer division, which truncates toward zero
+            adjusted = first - int((max_tokens - (last - first)) / 2)
+            best_score, best_start = score, max(0, min(adjusted, len(tokens) - max_tokens))
+        if len(tokens) > max_tokens:
+            sentence = starts[bisect.bisect_right(starts, position) - 1]
+            if sentence < position:
+                score = _window_score(instances, sentence, max_tokens)[0] + (120 if sentence == 0 else 100)
+                if score > best_score:
+                    best_score, best_start = score, sentence
+    end = min(len(tokens), best_start + max_tokens)
+    body = _markup(text, tokens, instances, best_start, end)
+    prefix = "..." if best_start > 0 else escape(text[:tokens[0][1]])
+    suffix = "..." if end < len(tokens) else escape(text[tokens[-1][2]:])
+    return prefix + body + suffix
+
+
+class TextIndex:
+    """
+    Inverted index over task titles and descriptions.
+
+    Postings map a token to {task id: title count * 65536 + description count},
+    packed into one int to keep a million-task index compact. Document lengths
+    (tokens in both columns) feed bm25's length normalization.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.postings = {}
+        self.lengths = {}
+        self.total_tokens = 0
+        self._vocabulary = None
+
+    def add(self, task_id, title, description):
+        counts = {}
+        length = 0
+        for column, text in enumerate((title, description)):
+            for token, _, _ in tokenize(text):
+                counts[token] = counts.get(token, 0) + (65536 if column == 0 else 1)
+                length += 1
+        for token, packed in counts.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                self._vocabulary = None
+            posting[task_id] = packed
+        self.lengths[task_id] = length
+        self.total_tokens += length
+
+    def remove(self, task_id, title, description):
+        for column_text in (title, description):
+            for token, _, _ in tokenize(column_text):
+                posting = self.postings.get(token)
+                if posting is not None and posting.pop(task_id, None) is not None and not posting:
+                    del self.postings[token]
+                    self._vocabulary = None
+        self.total_tokens -= self.lengths.pop(task_id, 0)
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, token)
+        end = bisect.bisect_left(self._vocabulary, token + "\U0010ffff")
+        return self._vocabulary[start:end]
+
+    def _frequencies(self, phrase, load):
+        """
+        {task id: weighted occurrence count} for every task containing `phrase`.
+        Single tokens come straight from the postings; longer phrases are
+        verified against the task text returned by `load(task_id)`.
+        """
+        title_weight, description_weight = self.weights
+        if len(phrase.tokens) == 1:
+            frequencies = {}
+            for token in self._expand(phrase.tokens[0], phrase.prefix):
+                for task_id, packed in self.postings[token].items():
+                    weighted = (packed >> 16) * title_weight + (packed & 0xFFFF) * description_weight
+                    frequencies[task_id] = frequencies.get(task_id, 0) + weighted
+            return frequencies
+        candidates = None
+        for index, token in enumerate(phrase.tokens):
+            last = index == len(phrase.tokens) - 1
+            ids = set()
+            for expanded in self._expand(token, phrase.prefix and last):
+                ids.update(self.postings[expanded])
+            candidates = ids if candidates is None else candidates & ids
+        frequencies = {}
+        for task_id in candidates or ():
+            weighted = 0
+            for weight, text in zip(self.weights, load(task_id)):
+                weighted += len(phrase.positions(tokenize(text))) * weight
+            if weighted:
+                frequencies[task_id] = weighted
+        return frequencies
+
+    def search(self, phrases, load):
+        """
+        Every task matching all `phrases`, as (bm25 score, task id) sorted best
+        first. Scores are negative, lower is better, as with FTS5's bm25().
+        """
+        documents = len(self.lengths)
+        if not documents:
+            return []
+        average_length = self.total_tokens / documents or 1
+        per_phrase = [self._frequencies(phrase, load) for phrase in phrases]
+        matches = set(per_phrase[0])
+        for frequencies in per_phrase[1:]:
+            matches &= frequencies.keys()
+        idfs = []
+        for frequencies in per_phrase:
+            hits = len(frequencies)
+            idf = math.log((documents - hits + 0.5) / (hits + 0.5))
+            idfs.append(idf if idf > 0 else 1e-6)
+        results = []
+        for task_id in matches:
+            normalization = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[task_id] / average_length)
+            score = 0.0
+            for idf, frequencies in zip(idfs, per_phrase):
+                frequency = frequencies[task_id]
+                score += idf * (frequency * (BM25_K1 + 1)) / (frequency + normalization)
+            results.append((-score, task_id))
+        results.sort()
+        return results
@@ -0,0 +1,139 @@
+"""
+Async counterparts of service.task_service, awaited by the API routers.
+
+Business rules and conversions are shared with the sync service; only the
+DAO calls differ.
+"""
+
+from typing import Optional
+from dao.async_task_dao import (
+    create_task_db, get_task_db, get_all_tasks_db, get_tasks_page_db, update_task_db, delete_task_db, get_stats_db,
+    create_tasks_bulk_db, update_tasks_bulk_db, delete_tasks_bulk_db, get_task_json_db, get_tasks_page_json_db,
+    search_tasks_db, get_changes_db
+)
+from monitoring.metrics import timed
+from dto.task import (
+    TaskCreate, TaskUpdate, Task, TaskStats, TaskListQuery, TaskBulkUpdate, BulkResult, TaskSearchQuery, TaskSearchHit,
+    TaskChangeFeed
+)
+from service.change_feed import build_change_feed
+from service.task_cache import task_cache
+from service.task_service import (
+    _changed, _to_task, _task_data, _update_data, _list_key, _page_request, _page_response, _page_json_response, _task_json, _bulk_updates,
+    _created_result, _updated_result, _deleted_result, _stats_window, _search_request, _search_response
+)
+
+async def _cached(key, load):
+    """Return the cached value for `key`, awaiting `load()` on a miss."""
+    hit, value = task_cache.get(key)
+    if hit:
+        return value
+    version = task_cache.version
+    value = await load()
+    if value is not None:
+        task_cache.put(key, value, version)
+    return value
+
+@timed("service")
+async def create_task_service(task_create: TaskCreate) -> Task:
+    # The inserted row itself: a concurrent delete may already have removed it
+    db_task = await create_task_db(_task_data(task_create))
+    _changed()
+    return _to_task(db_task)
+
+async def _load_task(task_id: int) -> Task:
+    db_task = await get_task_db(task_id)
+    if not db_task:
+        return None
+    return _to_task(db_task)
+
+@timed("service")
+async def get_task_service(task_id: int) -> Task:
+    return await _cached(("task", task_id), lambda: _load_task(task_id))
+
+@timed("service")
+async def get_all_tasks_service() -> list[Task]:
+    return [_to_task(db_task) for db_task in await get_all_tasks_db()]
+
+@timed("service")
+async def list_tasks_service(query: TaskListQuery) -> tuple[list[Task], Optional[str]]:
+    limit, page_args = _page_request(query)
+
+    async def load():
+        return _page_response(query, limit, await get_tasks_page_db(**page_args))
+
+    return await _cached(_list_key(query), load)
+
+@timed("service")
+async def list_tasks_json_service(query: TaskListQuery) -> tuple[bytes, Optional[str]]:
+    limit, page_args = _page_request(query)
+
+    async def load():
+        return _page_json_response(query, limit, await get_tasks_page_json_db(**page_args))
+
+    return await _cached(_list_key(query) + ("json",), load)
+
+@timed("service")
+async def get_task_json_service(task_id: int) -> Optional[bytes]:
+    async def load():
+        return _task_json(await get_task_json_db(task_id))
+
+    return await _cached(("task", task_id, "json"), load)
+
+@timed("service")
+async def search_tasks_service(query: TaskSearchQuery) -> tuple[list[TaskSearchHit], Optional[str]]:
+    match, limit, search_args = _search_request(query)
+    if match is None:
+        return [], None
+
+    async def load():
+        return _search_response(limit, search_args["offset"], await search_tasks_db(match, **search_args))
+
+    return await _cached(("search", tuple(query.dict().items())), load)
+
+@timed("service")
+async def update_task_service(task_id: int, task_update: TaskUpdate) -> Task:
+    db_task = await update_task_db(task_id, _update_data(task_update))
+    if not db_task:
+        return None
+    _changed([task_id])
+    return _to_task(db_task)
+
+@timed("service")
+async def delete_task_service(task_id: int) -> bool:
+    deleted = await delete_task_db(task_id)
+    if deleted:
+        _changed([task_id])
+    return deleted
+
+@timed("service")
+async def create_tasks_bulk_service(task_creates: list[TaskCreate]) -> BulkResult:
+    created = await create_tasks_bulk_db([_task_data(task_create) for task_create in task_creates])
+    _changed()
+    return _created_result(created)
+
+@timed("service")
+async def update_tasks_bulk_service(task_updates: list[TaskBulkUpdate]) -> BulkResult:
+    updates = _bulk_updates(task_updates)
+    updated = await update_tasks_bulk_db(updates)
+    _changed([task_id for task_id, _ in updates])
+    return _updated_result(updates, updated)
+
+@timed("service")
+async def delete_tasks_bulk_service(task_ids: list[int]) -> BulkResult:
+    deleted = await delete_tasks_bulk_db(task_ids)
+    _changed(deleted)
+    return _deleted_result(task_ids, deleted)
+
+@timed("service")
+async def get_changes_service(since: int, limit: int) -> TaskChangeFeed:
+    return build_change_feed(since, limit, await get_changes_db(since, limit + 1))
+
+@timed("service")
+async def get_stats_service() -> TaskStats:
+    window = _stats_window()
+
+    async def load():
+        return TaskStats(**await get_stats_db(*window))
+
+    return await _cached(("stats", window), load)
@@ -0,0 +1,219 @@
+"""
+Change feed for delta sync.
+
+Clients keep the seq of the last change they applied and fetch only newer
+changes, either by polling GET /tasks/changes or over a server-sent-events
+stream. One broadcaster per process reads each new batch from the log once,
+encodes it once and fans it out to every connected stream.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Optional
+from dao.async_task_dao import get_changes_db, compact_changes_db
+from dto.task import TaskChange, TaskChangeFeed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEED_CONFIG = {
+    # Log entries kept by compaction; clients further behind must resync
+    "retain": int(os.environ.get("TASKMASTER_CHANGES_RETAIN", 100000)),
+    "compact_interval": float(os.environ.get("TASKMASTER_CHANGES_COMPACT_INTERVAL", 300)),
+    # Fallback poll for writes made outside this process
+    "poll_interval": float(os.environ.get("TASKMASTER_CHANGES_POLL_INTERVAL", 1.0)),
+    "keepalive_interval": float(os.environ.get("TASKMASTER_CHANGES_KEEPALIVE", 15.0)),
+    "batch_size": 500,
+    # Undelivered batches a stream may queue before it is told to resync
+    "queue_size": 256,
+}
+
+
+def build_change_feed(since: int, limit: int, result: dict) -> TaskChangeFeed:
+    """
+    Turn a get_changes_db result, fetched with limit + 1, into a feed page.
+    """
+    head = result["head"]
+    if since < result["compacted_through"] or since > head:
+        return TaskChangeFeed(changes=[], last_seq=head, has_more=False, resync=True)
+    rows = result["changes"]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = []
+    for row in rows:
+        if row["task"] is not None:
+            row["task"]["is_completed"] = bool(row["task"]["is_completed"])
+        changes.append(TaskChange(**row))
+    # Without more rows, every entry up to head was returned or superseded
+    last_seq = rows[-1]["seq"] if has_more else head
+    return TaskChangeFeed(changes=changes, last_seq=last_seq, has_more=has_more)
+
+
+def _event(event: str, data: str, seq: Optional[int] = None) -> str:
+    lines = [f"id: {seq}"] if seq is not None else []
+    lines += [f"event: {event}", f"data: {data}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _change_event(change: TaskChange) -> str:
+    return _event("change", change.json(), change.seq)
+
+
+def _resync_event(last_seq: Optional[int] = None) -> str:
+    return _event("resync", json.dumps({"last_seq": last_seq}))
+
+
+class ChangeBroadcaster:
+    """
+    Polls the change log on behalf of every stream in this process.
+
+    notify() wakes it right after a local write commits; the poll interval
+    covers writes from other processes. Each subscriber gets a queue of
+    batches of (seq, encoded event); a subscriber that falls too far behind
+    receives None and must resync.
+    """
+
+    def __init__(self, poll_interval, batch_size, queue_size):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._loop = None
+        self._wakeup = None
+        self._started = None
+        self._task = None
+
+    def notify(self):
+        """Wake the broadcaster; safe to call from any thread."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def subscribe(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._started = self._loop.create_future()
+            self._task = self._loop.create_task(self._run())
+        # Wait until the broadcaster knows where it starts publishing: a
+        # change committed before then is only in the log, which the
+        # subscriber reads after this returns
+        await asyncio.shield(self._started)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    async def stop(self):
+        task, self._task, self._loop = self._task, None, None
+        if self._started is not None and not self._started.done():
+            self._started.cancel()
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for queue in list(self._subscribers):
+            self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _publish(self, events: list):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(events)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    async def _run(self):
+        try:
+            last_seq = (await get_changes_db(0, 0))["head"]
+        except Exception as exc:
+            self._started.set_exception(exc)
+            raise
+        self._started.set_result(None)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while True:
+                    feed = build_change_feed(
+                        last_seq, self.batch_size, await get_changes_db(last_seq, self.batch_size + 1)
+                    )
+                    if feed.resync:
+                        # Compaction overtook the broadcaster itself
+                        for queue in list(self._subscribers):
+                            self._drop(queue)
+                    elif feed.changes:
+                        self._publish([(change.seq, _change_event(change)) for change in feed.changes])
+                    last_seq = feed.last_seq
+                    if not feed.has_more:
+                        break
+            except Exception:
+                logger.exception("Change broadcaster failed to read the change log")
+
+
+change_broadcaster = ChangeBroadcaster(
+    DEFAULT_FEED_CONFIG["poll_interval"], DEFAULT_FEED_CONFIG["batch_size"], DEFAULT_FEED_CONFIG["queue_size"]
+)
+
+
+async def stream_changes(since: int):
+    """
+    Server-sent events for every change after `since`: first the backlog
+    from the log, then live batches from the broadcaster. Each change event
+    carries its seq as the event id, so a reconnecting EventSource resumes
+    from Last-Event-ID.
+    """
+    batch_size = DEFAULT_FEED_CONFIG["batch_size"]
+    # Subscribe before catching up so nothing committed in between is missed
+    queue = await change_broadcaster.subscribe()
+    try:
+        last_seq = since
+        while True:
+            feed = build_change_feed(last_seq, batch_size, await get_changes_db(last_seq, batch_size + 1))
+            if feed.resync:
+                yield _resync_event(feed.last_seq)
+                return
+            for change in feed.changes:
+                yield _change_event(change)
+            last_seq = feed.last_seq
+            if not feed.has_more:
+                break
+        yield _event("synced", json.dumps({"last_seq": last_seq}), last_seq)
+        while True:
+            try:
+                events = await asyncio.wait_for(queue.get(), timeout=DEFAULT_FEED_CONFIG["keepalive_interval"])
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if events is None:
+                yield _resync_event()
+                return
+            for seq, event in events:
+                if seq > last_seq:
+                    yield event
+                    last_seq = seq
+    finally:
+        change_broadcaster.unsubscribe(queue)
+
+
+async def compact_periodically():
+    """Compact the change log every compact_interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(DEFAULT_FEED_CONFIG["compact_interval"])
+        try:
+            await compact_changes_db(DEFAULT_FEED_CONFIG["retain"])
+        except Exception:
+            logger.exception("Change log compaction failed")
@@ -0,0 +1,125 @@
+"""
+In-process read-through cache for task reads.
+
+Entries are evicted least-recently-used once the cache is full and expire
+after a TTL. Every committed mutation bumps a table-wide version counter and
+drops the affected entries; the version doubles as the ETag of every cached
+resource, so a matching If-None-Match can be answered without touching the
+database.
+
+The cache and version live in this process only. Writes made by another
+process (a second worker, manage.py) are not seen until entries expire, so
+run a single API worker per database when caching is enabled.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+DEFAULT_CACHE_CONFIG = {
+    "max_entries": int(os.environ.get("TASKMASTER_CACHE_MAX_ENTRIES", 1024)),
+    "ttl_seconds": float(os.environ.get("TASKMASTER_CACHE_TTL_SECONDS", 30)),
+}
+
+
+class TaskCache:
+    """
+    LRU + TTL cache keyed by ("task", id), ("list", query) or ("stats", window).
+    Keys may carry a trailing variant tag, e.g. ("task", id, "json").
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        # Distinguishes ETags issued before and after a restart
+        self._epoch = uuid.uuid4().hex[:8]
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def version(self):
+        return self._version
+
+    def etag(self, version=None, suffix=None):
+        tag = f"{self._epoch}-{self._version if version is None else version}"
+        return f'W/"{tag}-{suffix}"' if suffix is not None else f'W/"{tag}"'
+
+    def get(self, key):
+        """Return (hit, value) for `key`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def put(self, key, value, version):
+        """
+        Store `value` if the table is still at `version`, the version read
+        before loading it; otherwise a write raced the load and the value
+        may already be stale.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, task_ids=()):
+        """
+        Record a committed mutation: bump the version, drop the cached
+        entries of `task_ids` and every list and stats entry.
+        """
+        task_keys = {("task", task_id) for task_id in task_ids}
+        with self._lock:
+            self._version += 1
+            self._stats["invalidations"] += 1
+            for key in list(self._entries):
+                if key[0] != "task" or key[:2] in task_keys:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "version": self._version,
+            }
+
+
+task_cache = TaskCache(**DEFAULT_CACHE_CONFIG)
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header value matches `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == opaque for candidate in candidates)
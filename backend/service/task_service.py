@@ -1,43 +1,324 @@
+import base64
+import binascii
+import json
+from datetime import date, timedelta
+from typing import Optional
 from dao.task_dao import (
-    create_task_db, get_task_db, get_all_tasks_db, update_task_db, delete_task_db, get_stats_db
+    create_task_db, get_task_db, get_all_tasks_db, get_tasks_page_db, update_task_db, delete_task_db, get_stats_db,
+    create_tasks_bulk_db, update_tasks_bulk_db, delete_tasks_bulk_db, get_task_json_db, get_tasks_page_json_db,
+    search_tasks_db, get_changes_db
 )
-from dto.task import TaskCreate, TaskUpdate, Task, TaskStats
+from monitoring.metrics import timed
+from dto.task import (
+    TaskCreate, TaskUpdate, Task, TaskStats, PoolStats, CacheStats, TaskListQuery,
+    TaskBulkUpdate, BulkItemResult, BulkResult, TaskSearchQuery, TaskSearchHit, TaskChangeFeed
+)
+from persistence.database import pool_stats
+from persistence.executor import executor_stats
+from service.change_feed import build_change_feed, change_broadcaster
+from service.task_cache import task_cache
 
-def create_task_service(task_create: TaskCreate) -> Task:
-    task_data = task_create.dict()
-    task_id = create_task_db(task_data)
-    db_task = get_task_db(task_id)
-    db_task["is_completed"] = bool(db_task["is_completed"]) if "is_completed" in db_task else False
+def _to_task(db_task: dict) -> Task:
+    db_task["is_completed"] = bool(db_task.get("is_completed", False))
     return Task(**db_task)
 
-def get_task_service(task_id: int) -> Task:
+def _iso_date(value: Optional[date]) -> Optional[str]:
+    """Dates are stored as ISO-8601 text, which sorts chronologically."""
+    return value.isoformat() if value is not None else None
+
+def _task_data(task_create: TaskCreate) -> dict:
+    task_data = task_create.dict()
+    task_data["due_date"] = _iso_date(task_data["due_date"])
+    return task_data
+
+def _update_data(task_update: TaskUpdate, **exclude) -> dict:
+    update_data = task_update.dict(exclude_unset=True, **exclude)
+    if "due_date" in update_data:
+        update_data["due_date"] = _iso_date(update_data["due_date"])
+    if "is_completed" in update_data:
+        update_data["is_completed"] = 1 if update_data["is_completed"] else 0
+    return update_data
+
+def _changed(task_ids=()):
+    """Called after a mutation commits: drop stale cache entries and wake change streams."""
+    task_cache.invalidate(task_ids)
+    change_broadcaster.notify()
+
+def _cached(key, load):
+    """Return the cached value for `key`, loading and caching it on a miss."""
+    hit, value = task_cache.get(key)
+    if hit:
+        return value
+    version = task_cache.version
+    value = load()
+    if value is not None:
+        task_cache.put(key, value, version)
+    return value
+
+def _list_key(query: TaskListQuery) -> tuple:
+    return ("list", tuple(query.dict().items()))
+
+def get_cache_etag() -> str:
+    """ETag for the current table version, shared by every cached resource."""
+    return task_cache.etag()
+
+def get_stats_etag() -> str:
+    """
+    ETag for GET /stats/: overdue and due_today also depend on the date,
+    so a response from yesterday must not be confirmed with a 304.
+    """
+    return task_cache.etag(suffix=_stats_window()[0])
+
+@timed("service")
+def create_task_service(task_create: TaskCreate) -> Task:
+    # The inserted row itself: a concurrent delete may already have removed it
+    db_task = create_task_db(_task_data(task_create))
+    _changed()
+    return _to_task(db_task)
+
+def _load_task(task_id: int) -> Task:
     db_task = get_task_db(task_id)
     if not db_task:
         return None
-    db_task["is_completed"] = bool(db_task["is_completed"])
-    return Task(**db_task)
+    return _to_task(db_task)
+
+@timed("service")
+def get_task_service(task_id: int) -> Task:
+    return _cached(("task", task_id), lambda: _load_task(task_id))
 
+@timed("service")
 def get_all_tasks_service() -> list[Task]:
-    db_tasks = get_all_tasks_db()
-    tasks = []
-    for db_task in db_tasks:
-        db_task["is_completed"] = bool(db_task["is_completed"])
-        tasks.append(Task(**db_task))
-    return tasks
+    return [_to_task(db_task) for db_task in get_all_tasks_db()]
+
+# Page size used when a cursor is supplied without an explicit limit
+DEFAULT_PAGE_SIZE = 100
+
+def _encode_cursor(sort: str, db_task: dict) -> str:
+    column = sort.lstrip("-")
+    payload = json.dumps([sort, db_task[column], db_task["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _load_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        cursor_sort, value, task_id = _load_cursor(cursor)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    # Sort values are NULL, numbers or text; anything else was not issued by us
+    if value is not None and not isinstance(value, (int, float, str)):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(task_id, int):
+        raise ValueError("Cursor does not match the requested sort order")
+    return value, task_id
+
+def _page_request(query: TaskListQuery) -> tuple[Optional[int], dict]:
+    """Translate a list query into the page limit and get_tasks_page_db arguments."""
+    after = _decode_cursor(query.cursor, query.sort) if query.cursor else None
+    limit = query.limit
+    if limit is None and after is not None:
+        limit = DEFAULT_PAGE_SIZE
+    # Fetch one extra row to learn whether another page exists
+    return limit, dict(
+        limit=limit + 1 if limit is not None else None,
+        after=after,
+        is_completed=query.is_completed,
+        priority=query.priority,
+        due_from=_iso_date(query.due_from),
+        due_to=_iso_date(query.due_to),
+        sort=query.sort.lstrip("-"),
+        descending=query.sort.startswith("-"),
+    )
+
+def _page_response(query: TaskListQuery, limit: Optional[int], db_tasks: list[dict]) -> tuple[list[Task], Optional[str]]:
+    next_cursor = None
+    if limit is not None and len(db_tasks) > limit:
+        db_tasks = db_tasks[:limit]
+        next_cursor = _encode_cursor(query.sort, db_tasks[-1])
+    return [_to_task(db_task) for db_task in db_tasks], next_cursor
 
+@timed("service")
+def list_tasks_service(query: TaskListQuery) -> tuple[list[Task], Optional[str]]:
+    """
+    Return one page of tasks and the cursor for the next page (None at the end).
+    Without a limit or cursor, every matching task is returned.
+    """
+    limit, page_args = _page_request(query)
+    return _cached(_list_key(query), lambda: _page_response(query, limit, get_tasks_page_db(**page_args)))
+
+def _page_json_response(query: TaskListQuery, limit: Optional[int], rows: list[tuple]) -> tuple[bytes, Optional[str]]:
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        _, sort_value, task_id = rows[-1]
+        next_cursor = _encode_cursor(query.sort, {query.sort.lstrip("-"): sort_value, "id": task_id})
+    return ("[" + ",".join(row[0] for row in rows) + "]").encode(), next_cursor
+
+def _task_json(task_json: Optional[str]) -> Optional[bytes]:
+    return task_json.encode() if task_json is not None else None
+
+@timed("service")
+def list_tasks_json_service(query: TaskListQuery) -> tuple[bytes, Optional[str]]:
+    """
+    Fast path of list_tasks_service: the page as pre-encoded JSON bytes,
+    built by SQLite without constructing Task models.
+    """
+    limit, page_args = _page_request(query)
+    return _cached(
+        _list_key(query) + ("json",),
+        lambda: _page_json_response(query, limit, get_tasks_page_json_db(**page_args))
+    )
+
+@timed("service")
+def get_task_json_service(task_id: int) -> Optional[bytes]:
+    """Fast path of get_task_service: the task as JSON bytes, or None."""
+    return _cached(("task", task_id, "json"), lambda: _task_json(get_task_json_db(task_id)))
+
+# Page size of search results when no limit is given
+DEFAULT_SEARCH_LIMIT = 20
+
+def _fts_query(text: str, prefix: bool) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word is quoted, so user input
+    can never be parsed as FTS5 operators, and optionally made a prefix term.
+    """
+    suffix = "*" if prefix else ""
+    terms = ['"' + term.replace('"', '""') + '"' + suffix for term in text.split()]
+    return " ".join(terms) if terms else None
+
+def _encode_search_cursor(offset: int) -> str:
+    payload = json.dumps(["search", offset], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_search_cursor(cursor: str) -> int:
+    try:
+        kind, offset = _load_cursor(cursor)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if kind != "search" or not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+def _search_request(query: TaskSearchQuery) -> tuple[Optional[str], int, dict]:
+    limit = query.limit or DEFAULT_SEARCH_LIMIT
+    offset = _decode_search_cursor(query.cursor) if query.cursor else 0
+    return _fts_query(query.q, query.prefix), limit, dict(limit=limit + 1, offset=offset)
+
+def _search_response(limit: int, offset: int, rows: list[dict]) -> tuple[list[TaskSearchHit], Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_search_cursor(offset + limit)
+    hits = []
+    for row in rows:
+        row["is_completed"] = bool(row["is_completed"])
+        hits.append(TaskSearchHit(**row))
+    return hits, next_cursor
+
+@timed("service")
+def search_tasks_service(query: TaskSearchQuery) -> tuple[list[TaskSearchHit], Optional[str]]:
+    """
+    Full-text search ranked by bm25. Unlike list_tasks_service it pages by
+    offset: scores depend on the whole corpus, so any write changes them
+    and a score cannot mark a position. Tasks that start or stop matching
+    between two pages shift later pages by that many hits.
+    """
+    match, limit, search_args = _search_request(query)
+    if match is None:
+        return [], None
+    return _cached(
+        ("search", tuple(query.dict().items())),
+        lambda: _search_response(limit, search_args["offset"], search_tasks_db(match, **search_args))
+    )
+
+@timed("service")
 def update_task_service(task_id: int, task_update: TaskUpdate) -> Task:
-    update_data = task_update.dict(exclude_unset=True)
-    if "is_completed" in update_data:
-        update_data["is_completed"] = 1 if update_data["is_completed"] else 0
-    db_task = update_task_db(task_id, update_data)
+    db_task = update_task_db(task_id, _update_data(task_update))
     if not db_task:
         return None
-    db_task["is_completed"] = bool(db_task["is_completed"])
-    return Task(**db_task)
+    _changed([task_id])
+    return _to_task(db_task)
 
+@timed("service")
 def delete_task_service(task_id: int) -> bool:
-    return delete_task_db(task_id)
+    deleted = delete_task_db(task_id)
+    if deleted:
+        _changed([task_id])
+    return deleted
+
+def _bulk_result(results: list[BulkItemResult]) -> BulkResult:
+    failed = sum(1 for result in results if result.status in ("not_found", "failed"))
+    return BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+def _created_result(created: list[tuple]) -> BulkResult:
+    return _bulk_result([
+        BulkItemResult(status="failed", error=error) if error else
+        BulkItemResult(id=db_task["id"], status="created", task=_to_task(db_task))
+        for db_task, error in created
+    ])
+
+def _bulk_updates(task_updates: list[TaskBulkUpdate]) -> list[tuple]:
+    return [(task_update.id, _update_data(task_update, exclude={"id"})) for task_update in task_updates]
+
+def _updated_result(updates: list[tuple], updated: list[tuple]) -> BulkResult:
+    results = []
+    for (task_id, _), (db_task, error) in zip(updates, updated):
+        if error:
+            results.append(BulkItemResult(id=task_id, status="failed", error=error))
+        elif not db_task:
+            results.append(BulkItemResult(id=task_id, status="not_found"))
+        else:
+            results.append(BulkItemResult(id=task_id, status="updated", task=_to_task(db_task)))
+    return _bulk_result(results)
+
+def _deleted_result(task_ids: list[int], deleted: set) -> BulkResult:
+    return _bulk_result([
+        BulkItemResult(id=task_id, status="deleted" if task_id in deleted else "not_found")
+        for task_id in task_ids
+    ])
+
+@timed("service")
+def create_tasks_bulk_service(task_creates: list[TaskCreate]) -> BulkResult:
+    created = create_tasks_bulk_db([_task_data(task_create) for task_create in task_creates])
+    _changed()
+    return _created_result(created)
 
+@timed("service")
+def update_tasks_bulk_service(task_updates: list[TaskBulkUpdate]) -> BulkResult:
+    updates = _bulk_updates(task_updates)
+    updated = update_tasks_bulk_db(updates)
+    _changed([task_id for task_id, _ in updates])
+    return _updated_result(updates, updated)
+
+@timed("service")
+def delete_tasks_bulk_service(task_ids: list[int]) -> BulkResult:
+    deleted = delete_tasks_bulk_db(task_ids)
+    _changed(deleted)
+    return _deleted_result(task_ids, deleted)
+
+@timed("service")
+def get_changes_service(since: int, limit: int) -> TaskChangeFeed:
+    return build_change_feed(since, limit, get_changes_db(since, limit + 1))
+
+def _stats_window() -> tuple[str, str]:
+    """ISO dates bounding "due today" in server local time."""
+    today = date.today()
+    return today.isoformat(), (today + timedelta(days=1)).isoformat()
+
+@timed("service")
 def get_stats_service() -> TaskStats:
-    stats = get_stats_db()
-    return TaskStats(**stats)
+    window = _stats_window()
+    return _cached(("stats", window), lambda: TaskStats(**get_stats_db(*window)))
+
+@timed("service")
+def get_pool_stats_service() -> PoolStats:
+    return PoolStats(**pool_stats(), **executor_stats())
+
+@timed("service")
+def get_cache_stats_service() -> CacheStats:
+    return CacheStats(**task_cache.stats())
@@ -0,0 +1,71 @@
+"""
+Shared fixtures. Every API test runs once per storage engine, each against
+a fresh database or memory store in its own tmp_path.
+"""
+
+import base64
+import json
+import os
+import tempfile
+
+import pytest
+
+# Configuration is read at import; keep the import-time init_storage() of
+# main out of the source tree
+_session_dir = tempfile.mkdtemp(prefix="taskmaster-tests-")
+os.environ.setdefault("TASKMASTER_DB_PATH", os.path.join(_session_dir, "tasks.db"))
+os.environ.setdefault("TASKMASTER_MEMORY_DIR", os.path.join(_session_dir, "memory"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from dao import memory_task_dao, sqlite_task_dao, task_dao  # noqa: E402
+from main import app  # noqa: E402
+from persistence import database, storage  # noqa: E402
+from persistence.executor import shutdown_executors  # noqa: E402
+from persistence.memory_store import configure_store  # noqa: E402
+from service.task_cache import task_cache  # noqa: E402
+
+ENGINE_DAOS = {"sqlite": sqlite_task_dao, "memory": memory_task_dao}
+
+# Runs a test against the SQLite engine only, e.g. for pool or schema internals
+sqlite_only = pytest.mark.parametrize("engine", ["sqlite"], indirect=True)
+
+
+@pytest.fixture(params=storage.STORAGE_ENGINES)
+def engine(request, tmp_path, monkeypatch):
+    """Switch the storage engine and point it at an empty tmp_path."""
+    shutdown_executors()
+    storage.close_storage()
+    monkeypatch.setattr(storage, "STORAGE_ENGINE", request.param)
+    dao = ENGINE_DAOS[request.param]
+    for name in dir(task_dao):
+        if name.endswith("_db"):
+            monkeypatch.setattr(task_dao, name, getattr(dao, name))
+    monkeypatch.setattr(database, "DATABASE_PATH", tmp_path / "tasks.db")
+    configure_store(data_dir=str(tmp_path / "memory"))
+    storage.init_storage()
+    task_cache.clear()
+    yield request.param
+    shutdown_executors()
+    storage.close_storage()
+
+
+@pytest.fixture
+def client(engine):
+    with TestClient(app) as client:
+        yield client
+
+
+def create_tasks(client, *tasks):
+    """POST each task and return the created tasks."""
+    created = []
+    for task in tasks:
+        response = client.post("/tasks/", json=task)
+        assert response.status_code == 201, response.text
+        created.append(response.json())
+    return created
+
+
+def make_cursor(*values):
+    """A cursor with arbitrary contents, encoded like the service's."""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
@@ -0,0 +1,107 @@
+"""Bulk create, update and delete (POST, PATCH and DELETE /tasks/bulk)."""
+
+from api import tasks as tasks_api
+from dao import task_dao
+from tests.conftest import create_tasks
+
+
+def test_bulk_create_update_delete(client):
+    response = client.post("/tasks/bulk", json=[{"title": f"t{i}", "priority": i % 3 + 1} for i in range(5)])
+    assert response.status_code == 201
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (5, 0)
+    ids = [item["id"] for item in result["results"]]
+    assert [item["task"]["title"] for item in result["results"]] == [f"t{i}" for i in range(5)]
+
+    response = client.patch("/tasks/bulk", json=[
+        {"id": ids[0], "is_completed": True},
+        {"id": ids[1], "title": "renamed", "priority": 3},
+        {"id": 9999, "title": "missing"},
+    ])
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert [item["status"] for item in result["results"]] == ["updated", "updated", "not_found"]
+    assert client.get(f"/tasks/{ids[0]}").json()["is_completed"] is True
+    assert client.get(f"/tasks/{ids[1]}").json()["title"] == "renamed"
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": [ids[2], ids[3], 9999]})
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert [task["id"] for task in client.get("/tasks/").json()] == [ids[0], ids[1], ids[4]]
+
+
+def test_bulk_rejects_duplicate_ids(client):
+    first, second = create_tasks(client, {"title": "a"}, {"title": "b"})
+    response = client.patch("/tasks/bulk", json=[
+        {"id": first["id"], "title": "x"}, {"id": second["id"], "title": "y"}, {"id": first["id"], "title": "z"},
+    ])
+    assert response.status_code == 422
+    assert response.json()["detail"] == f"Duplicate task ids: {first['id']}"
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": [second["id"], first["id"], second["id"]]})
+    assert response.status_code == 422
+    assert response.json()["detail"] == f"Duplicate task ids: {second['id']}"
+    # Nothing was applied
+    assert [task["title"] for task in client.get("/tasks/").json()] == ["a", "b"]
+
+
+def test_bulk_size_limit(client, monkeypatch):
+    monkeypatch.setattr(tasks_api, "MAX_BULK_ITEMS", 2)
+    assert client.post("/tasks/bulk", json=[{"title": "a"}] * 3).status_code == 413
+
+
+def test_bulk_create_is_validated_before_anything_is_written(client):
+    response = client.post("/tasks/bulk", json=[{"title": "a"}, {"description": "no title"}])
+    assert response.status_code == 422
+    assert client.get("/tasks/").json() == []
+
+
+def test_bulk_writes_are_visible_to_every_read_path(client):
+    result = client.post("/tasks/bulk", json=[{"title": f"milk {i}", "priority": 2} for i in range(300)]).json()
+    ids = [item["id"] for item in result["results"]]
+    assert ids == sorted(ids)
+    client.patch("/tasks/bulk", json=[{"id": task_id, "is_completed": True} for task_id in ids[:100]])
+    client.request("DELETE", "/tasks/bulk", json={"ids": ids[200:]})
+
+    stats = client.get("/stats/").json()
+    assert (stats["total"], stats["completed"], stats["pending"]) == (200, 100, 100)
+    assert len(client.get("/tasks/search", params={"q": "milk", "limit": 1000}).json()) == 200
+    changes = client.get("/tasks/changes", params={"limit": 1000}).json()["changes"]
+    assert len(changes) == 300
+    assert sum(change["op"] == "delete" for change in changes) == 100
+
+
+def test_bulk_create_keeps_valid_items(engine):
+    created = task_dao.create_tasks_bulk_db([
+        {"title": "a"},
+        {"title": None},
+        {"title": "b", "due_date": "2025-02-30"},
+        {"title": "c", "due_date": "2025-03-01"},
+    ])
+    assert [row["title"] if row else None for row, _ in created] == ["a", None, None, "c"]
+    assert [error for _, error in created][:2] == [None, "NOT NULL constraint failed: tasks.title"]
+    assert "ISO-8601" in created[2][1]
+    assert [task["title"] for task in task_dao.get_all_tasks_db()] == ["a", "c"]
+    # Rejected items left nothing behind in the derived structures either
+    assert task_dao.verify_stats_db() == []
+    assert len(task_dao.get_changes_db(0, 100)["changes"]) == 2
+
+
+def test_bulk_update_keeps_valid_items(client):
+    first, second, third = create_tasks(client, {"title": "a"}, {"title": "b"}, {"title": "c"})
+    response = client.patch("/tasks/bulk", json=[
+        {"id": first["id"], "priority": 3},
+        {"id": second["id"], "title": None, "priority": 3},
+        {"id": 9999, "title": "missing"},
+        {"id": third["id"], "is_completed": True},
+    ])
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 2)
+    assert [item["status"] for item in result["results"]] == ["updated", "failed", "not_found", "updated"]
+    assert result["results"][1] == {
+        "id": second["id"], "status": "failed", "task": None, "error": "NOT NULL constraint failed: tasks.title",
+    }
+    tasks = {task["id"]: task for task in client.get("/tasks/").json()}
+    assert tasks[first["id"]]["priority"] == 3
+    assert (tasks[second["id"]]["title"], tasks[second["id"]]["priority"]) == ("b", 1)
+    assert tasks[third["id"]]["is_completed"] is True
@@ -0,0 +1,111 @@
+"""Read-through cache and ETag / 304 handling."""
+
+import time
+from datetime import date, timedelta
+
+from service import async_task_service, task_service
+from service.task_cache import TaskCache, etag_matches
+from tests.conftest import create_tasks
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TaskCache(max_entries=2, ttl_seconds=60)
+    cache.put(("task", 1), "a", cache.version)
+    cache.put(("task", 2), "b", cache.version)
+    assert cache.get(("task", 1)) == (True, "a")
+    cache.put(("task", 3), "c", cache.version)
+    assert cache.get(("task", 2)) == (False, None)
+    assert cache.get(("task", 1)) == (True, "a")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    cache = TaskCache(max_entries=10, ttl_seconds=0.01)
+    cache.put(("task", 1), "a", cache.version)
+    time.sleep(0.02)
+    assert cache.get(("task", 1)) == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_value_loaded_before_a_write_is_not_stored():
+    cache = TaskCache(max_entries=10, ttl_seconds=60)
+    version = cache.version
+    cache.invalidate([1])
+    cache.put(("task", 1), "stale", version)
+    assert cache.get(("task", 1)) == (False, None)
+
+
+def test_invalidate_keeps_unaffected_tasks():
+    cache = TaskCache(max_entries=10, ttl_seconds=60)
+    for key in (("task", 1), ("task", 1, "json"), ("task", 2), ("list", ()), ("stats", ("a", "b"))):
+        cache.put(key, "value", cache.version)
+    etag = cache.etag()
+    cache.invalidate([1])
+    assert cache.etag() != etag
+    assert [cache.get(key)[0] for key in (("task", 1), ("task", 1, "json"), ("list", ()), ("stats", ("a", "b")))] == [False] * 4
+    assert cache.get(("task", 2)) == (True, "value")
+
+
+def test_if_none_match_parsing():
+    assert etag_matches('W/"x-1"', 'W/"x-1"')
+    assert etag_matches('"x-1"', 'W/"x-1"')
+    assert etag_matches('W/"x-0", W/"x-1"', 'W/"x-1"')
+    assert etag_matches("*", 'W/"x-1"')
+    assert not etag_matches('W/"x-2"', 'W/"x-1"')
+    assert not etag_matches(None, 'W/"x-1"')
+
+
+def test_reads_are_served_from_the_cache(client):
+    task, = create_tasks(client, {"title": "a"})
+    client.get(f"/tasks/{task['id']}")
+    hits = client.get("/stats/cache").json()["hits"]
+    client.get(f"/tasks/{task['id']}")
+    assert client.get("/stats/cache").json()["hits"] == hits + 1
+
+
+def test_stats_etag(client):
+    create_tasks(client, {"title": "a"})
+    etag = client.get("/stats/").headers["ETag"]
+    assert client.get("/stats/", headers={"If-None-Match": etag}).status_code == 304
+    create_tasks(client, {"title": "b"})
+    response = client.get("/stats/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+
+def test_stats_etag_changes_with_the_date(client, monkeypatch):
+    yesterday = date.today() - timedelta(days=1)
+    create_tasks(client, {"title": "a", "due_date": date.today().isoformat()})
+    with monkeypatch.context() as patch:
+        window = lambda: (yesterday.isoformat(), date.today().isoformat())  # noqa: E731
+        patch.setattr(task_service, "_stats_window", window)
+        patch.setattr(async_task_service, "_stats_window", window)
+        response = client.get("/stats/")
+    assert response.json()["due_today"] == 0
+    etag = response.headers["ETag"]
+
+    # The next day, with no writes in between, the counts are recomputed
+    response = client.get("/stats/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["due_today"] == 1
+    assert client.get("/stats/", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_get_task_etag(client):
+    task, = create_tasks(client, {"title": "a"})
+    response = client.get(f"/tasks/{task['id']}")
+    etag = response.headers["ETag"]
+    assert client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/tasks/{task['id']}", json={"title": "b"})
+    response = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "b"
+
+
+def test_list_etag(client):
+    create_tasks(client, {"title": "a"})
+    etag = client.get("/tasks/").headers["ETag"]
+    assert client.get("/tasks/", headers={"If-None-Match": etag}).status_code == 304
+    create_tasks(client, {"title": "b"})
+    assert client.get("/tasks/", headers={"If-None-Match": etag}).status_code == 200
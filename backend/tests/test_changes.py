@@ -0,0 +1,113 @@
+"""Change feed for delta sync (GET /tasks/changes and its SSE stream)."""
+
+import asyncio
+import json
+
+import pytest
+
+import manage
+from dao import task_dao
+from persistence.executor import run_write
+from service.change_feed import change_broadcaster, stream_changes
+from tests.conftest import create_tasks
+
+
+def test_change_feed(client):
+    first, second = create_tasks(client, {"title": "a"}, {"title": "b"})
+    feed = client.get("/tasks/changes").json()
+    assert [(c["op"], c["id"]) for c in feed["changes"]] == [("upsert", first["id"]), ("upsert", second["id"])]
+    assert feed["changes"][0]["task"]["title"] == "a"
+    assert feed["has_more"] is False
+    assert feed["resync"] is False
+
+    since = feed["last_seq"]
+    client.put(f"/tasks/{first['id']}", json={"title": "a2"})
+    client.delete(f"/tasks/{second['id']}")
+    feed = client.get("/tasks/changes", params={"since": since}).json()
+    assert [(c["op"], c["id"]) for c in feed["changes"]] == [("upsert", first["id"]), ("delete", second["id"])]
+    assert feed["changes"][0]["task"]["title"] == "a2"
+    assert feed["changes"][1]["task"] is None
+    assert client.get("/tasks/changes", params={"since": feed["last_seq"]}).json()["changes"] == []
+
+
+def test_change_feed_pages_and_supersedes(client):
+    tasks = create_tasks(client, *({"title": f"t{i}"} for i in range(5)))
+    client.put(f"/tasks/{tasks[0]['id']}", json={"is_completed": True})
+
+    seen, since, has_more = [], 0, True
+    while has_more:
+        feed = client.get("/tasks/changes", params={"since": since, "limit": 2}).json()
+        seen += [c["id"] for c in feed["changes"]]
+        since, has_more = feed["last_seq"], feed["has_more"]
+    # The first create was superseded by the update and is sent once
+    assert seen == [task["id"] for task in tasks[1:]] + [tasks[0]["id"]]
+
+
+def test_change_feed_resync(client):
+    create_tasks(client, *({"title": f"t{i}"} for i in range(4)))
+    head = client.get("/tasks/changes").json()["last_seq"]
+    task_dao.compact_changes_db(1)
+
+    feed = client.get("/tasks/changes", params={"since": 0}).json()
+    assert feed["resync"] is True
+    assert feed["last_seq"] == head
+    assert client.get("/tasks/changes", params={"since": head + 1}).json()["resync"] is True
+    assert client.get("/tasks/changes", params={"since": head}).json()["resync"] is False
+
+
+def test_compaction_keeps_the_log_head(client, capsys):
+    create_tasks(client, {"title": "a"}, {"title": "b"})
+    head = client.get("/tasks/changes").json()["last_seq"]
+    # Dropping every entry would move the head below the compaction point
+    with pytest.raises(ValueError, match="at least 1"):
+        task_dao.compact_changes_db(0)
+    with pytest.raises(SystemExit):
+        manage.main(["compact-changes", "--retain", "0"])
+    assert "must be at least 1" in capsys.readouterr().err
+    assert task_dao.compact_changes_db(1) == head - 1
+    feed = client.get("/tasks/changes", params={"since": head}).json()
+    assert (feed["resync"], feed["last_seq"]) == (False, head)
+
+
+def _parse(event):
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return fields["event"], json.loads(fields["data"]), fields.get("id")
+
+
+def test_stream_sends_the_backlog_then_live_changes(engine):
+    first = task_dao.create_task_db({"title": "a"})["id"]
+
+    async def main():
+        stream = stream_changes(0)
+        try:
+            kind, data, seq = _parse(await anext(stream))
+            assert (kind, data["id"], data["task"]["title"], seq) == ("change", first, "a", "1")
+            kind, data, _ = _parse(await anext(stream))
+            assert (kind, data) == ("synced", {"last_seq": 1})
+
+            second = (await run_write(task_dao.create_task_db, {"title": "b"}))["id"]
+            change_broadcaster.notify()
+            kind, data, seq = _parse(await asyncio.wait_for(anext(stream), timeout=5))
+            assert (kind, data["id"], seq) == ("change", second, "2")
+        finally:
+            await stream.aclose()
+            await change_broadcaster.stop()
+
+    asyncio.run(main())
+
+
+def test_stream_tells_clients_behind_compaction_to_resync(engine):
+    for title in ("a", "b", "c"):
+        task_dao.create_task_db({"title": title})
+    task_dao.compact_changes_db(1)
+
+    async def main():
+        stream = stream_changes(0)
+        try:
+            kind, data, _ = _parse(await anext(stream))
+            assert (kind, data) == ("resync", {"last_seq": 3})
+        finally:
+            await stream.aclose()
+            await change_broadcaster.stop()
+
+    asyncio.run(main())
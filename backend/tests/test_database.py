@@ -0,0 +1,138 @@
+"""Connection pool of the SQLite engine (persistence.database)."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from persistence import database
+from persistence.database import ConnectionPool, PoolTimeoutError
+from tests.conftest import sqlite_only
+
+pytestmark = sqlite_only
+
+
+@pytest.fixture
+def pool(engine):
+    pool = ConnectionPool(database.DATABASE_PATH, max_readers=2, checkout_timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+def test_database_is_in_wal_mode(pool):
+    with pool.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == pool.config["busy_timeout_ms"]
+
+
+def test_nested_reads_share_a_connection(pool):
+    with pool.reader() as outer:
+        with pool.reader() as inner:
+            assert inner is outer
+        assert pool.stats()["readers_in_use"] == 1
+    stats = pool.stats()
+    assert (stats["readers_created"], stats["readers_idle"], stats["reader_checkouts"]) == (1, 1, 1)
+    with pool.reader() as again:
+        assert again is outer
+
+
+def test_checkout_times_out_when_every_reader_is_busy(pool):
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.reader():
+            held.set()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        held.wait()
+        held.clear()
+    try:
+        with pytest.raises(PoolTimeoutError):
+            with pool.reader():
+                pass
+        assert pool.stats()["reader_waits"] == 1
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+
+def test_writer_commits_and_rolls_back(pool):
+    with pool.writer() as conn:
+        conn.execute("INSERT INTO tasks (title) VALUES ('a')")
+        # Reads inside the transaction see its uncommitted rows
+        with pool.reader() as reader:
+            assert _count(reader) == 1
+    with pytest.raises(ZeroDivisionError):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO tasks (title) VALUES ('b')")
+            1 / 0
+    with pool.reader() as conn:
+        assert _count(conn) == 1
+    stats = pool.stats()
+    assert (stats["writer_transactions"], stats["writer_rollbacks"]) == (1, 1)
+
+
+def test_failed_commit_rolls_back(pool):
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE task_notes (task_id INTEGER REFERENCES tasks (id) DEFERRABLE INITIALLY DEFERRED)")
+    # A deferred foreign key is only checked by COMMIT
+    with pytest.raises(sqlite3.IntegrityError, match="FOREIGN KEY"):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO tasks (title) VALUES ('a')")
+            conn.execute("INSERT INTO task_notes (task_id) VALUES (9999)")
+    with pool.writer() as conn:
+        assert _count(conn) == 0
+        conn.execute("INSERT INTO tasks (title) VALUES ('b')")
+    with pool.reader() as conn:
+        assert _count(conn) == 1
+    stats = pool.stats()
+    assert (stats["writer_transactions"], stats["writer_rollbacks"]) == (2, 1)
+
+
+def test_nested_writes_join_the_outer_transaction(pool):
+    with pytest.raises(ZeroDivisionError):
+        with pool.writer() as outer:
+            with pool.writer() as inner:
+                assert inner is outer
+                inner.execute("INSERT INTO tasks (title) VALUES ('a')")
+            1 / 0
+    with pool.reader() as conn:
+        assert _count(conn) == 0
+
+
+def test_readers_do_not_see_uncommitted_writes(pool):
+    in_transaction, done = threading.Event(), threading.Event()
+
+    def write():
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO tasks (title) VALUES ('a')")
+            in_transaction.set()
+            done.wait()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    in_transaction.wait()
+    with pool.reader() as conn:
+        assert _count(conn) == 0
+    done.set()
+    thread.join()
+    with pool.reader() as conn:
+        assert _count(conn) == 1
+
+
+def test_closed_pool_refuses_checkouts(pool):
+    pool.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.reader():
+            pass
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.writer():
+            pass
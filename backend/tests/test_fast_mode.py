@@ -0,0 +1,51 @@
+"""TASKMASTER_RESPONSE_MODE=fast: JSON built by the storage engine."""
+
+import pytest
+
+from api import tasks as tasks_api
+from tests.conftest import create_tasks
+
+AWKWARD_TASKS = (
+    {"title": "plain"},
+    {"title": "quote \" backslash \\ slash /", "description": "line\nbreak\ttab \u0001 ctrl", "priority": None},
+    {"title": "unicode é 漢字 😀", "description": "", "due_date": "2025-12-31", "priority": 3},
+)
+
+
+@pytest.fixture
+def tasks(client):
+    created = create_tasks(client, *AWKWARD_TASKS)
+    client.put(f"/tasks/{created[1]['id']}", json={"is_completed": True})
+    return created
+
+
+def _both_modes(client, monkeypatch, path, **params):
+    validated = client.get(path, params=params)
+    with monkeypatch.context() as patch:
+        patch.setattr(tasks_api, "RESPONSE_MODE", "fast")
+        fast = client.get(path, params=params)
+    return validated, fast
+
+
+def test_list_bytes_match_validated_mode(client, tasks, monkeypatch):
+    for params in ({}, {"sort": "-priority"}, {"is_completed": True}, {"limit": 2}):
+        validated, fast = _both_modes(client, monkeypatch, "/tasks/", **params)
+        assert fast.content == validated.content, params
+        assert fast.headers.get("X-Next-Cursor") == validated.headers.get("X-Next-Cursor")
+
+
+def test_task_bytes_match_validated_mode(client, tasks, monkeypatch):
+    for task in tasks:
+        validated, fast = _both_modes(client, monkeypatch, f"/tasks/{task['id']}")
+        assert fast.content == validated.content
+    validated, fast = _both_modes(client, monkeypatch, "/tasks/999")
+    assert fast.status_code == validated.status_code == 404
+
+
+def test_fast_response_mode_matches_validated(client, monkeypatch):
+    create_tasks(client, {"title": "a", "due_date": "2025-01-01"}, {"title": "b \"quoted\"", "description": "é"})
+    validated = client.get("/tasks/", params={"limit": 1})
+    monkeypatch.setattr(tasks_api, "RESPONSE_MODE", "fast")
+    fast = client.get("/tasks/", params={"limit": 1})
+    assert fast.content == validated.content
+    assert fast.headers["X-Next-Cursor"] == validated.headers["X-Next-Cursor"]
@@ -0,0 +1,177 @@
+"""Recovery of the memory engine's store from its snapshot and log."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from persistence.memory_store import SEGMENT_PREFIX, SNAPSHOT_FILE, MemoryStore, sort_key
+
+NOW = "2025-01-01T00:00:00.000Z"
+
+
+def _crash(store):
+    """Drop the store without close(): no final snapshot is written."""
+    store._segment.close()
+    store._lock_file.close()
+
+
+def _insert(store, *titles):
+    with store.transaction():
+        return [store.insert({"title": title, "priority": 1}, NOW).id for title in titles]
+
+
+def _titles(store):
+    return {task_id: record.title for task_id, record in store.tasks.items()}
+
+
+def _segments(path):
+    return sorted(path.glob(f"{SEGMENT_PREFIX}*"))
+
+
+def test_log_replay_after_crash(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a", "b")
+    with store.transaction():
+        store.update(1, {"title": "a2"}, NOW)
+        store.delete(2)
+    _crash(store)
+
+    store = MemoryStore(tmp_path).open()
+    assert _titles(store) == {1: "a2"}
+    assert store.next_id == 3
+    assert [store.changes[seq] for seq in store.change_seqs if seq in store.changes] == [(1, "upsert"), (2, "delete")]
+    store.close()
+
+
+def test_torn_last_frame_is_discarded(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a")
+    _insert(store, "b")
+    _crash(store)
+    segment, = _segments(tmp_path)
+    data = segment.read_bytes()
+    # Cut into the second frame, as a crash during its write would
+    segment.write_bytes(data[:-3])
+
+    store = MemoryStore(tmp_path).open()
+    assert _titles(store) == {1: "a"}
+    _insert(store, "c")
+    store.close()
+
+    store = MemoryStore(tmp_path).open()
+    assert _titles(store) == {1: "a", 2: "c"}
+    store.close()
+
+
+def test_corrupt_frame_before_the_last_segment_is_an_error(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a")
+    store._open_segment(store._lsn + 1)
+    _insert(store, "b")
+    _crash(store)
+    first = _segments(tmp_path)[0]
+    first.write_bytes(first.read_bytes()[:-1])
+
+    with pytest.raises(RuntimeError, match="corrupt"):
+        MemoryStore(tmp_path).open()
+
+
+def test_snapshot_then_replay(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a", "b")
+    store.snapshot()
+    _insert(store, "c")
+    with store.transaction():
+        store.delete(1)
+    _crash(store)
+    assert (tmp_path / SNAPSHOT_FILE).exists()
+    # Segments covered by the snapshot are deleted
+    assert len(_segments(tmp_path)) == 1
+
+    store = MemoryStore(tmp_path).open()
+    assert _titles(store) == {2: "b", 3: "c"}
+    assert list(store.sort_index["priority"].after()) == [sort_key(1, 2), sort_key(1, 3)]
+    store.close()
+
+    # close() snapshots, leaving an empty log to replay
+    store = MemoryStore(tmp_path).open()
+    assert _titles(store) == {2: "b", 3: "c"}
+    assert store.stats()["logged_since_snapshot"] == 0
+    store.close()
+
+
+def test_failed_job_rolls_back_inside_a_batch(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a")
+    with store.batch():
+        with store.job():
+            store.insert({"title": "b"}, NOW)
+        with pytest.raises(ValueError):
+            with store.job():
+                store.update(1, {"title": "a2"}, NOW)
+                store.insert({"title": "c", "due_date": "not a date"}, NOW)
+        with store.job():
+            store.insert({"title": "d"}, NOW)
+    assert _titles(store) == {1: "a", 2: "b", 3: "d"}
+    assert store.by_completed[0] == {1, 2, 3}
+    _crash(store)
+
+    store = MemoryStore(tmp_path).open()
+    assert _titles(store) == {1: "a", 2: "b", 3: "d"}
+    store.close()
+
+
+def test_failed_batch_is_undone(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a")
+    with pytest.raises(ZeroDivisionError):
+        with store.batch():
+            store.insert({"title": "b"}, NOW)
+            1 / 0
+    assert _titles(store) == {1: "a"}
+    assert store.next_id == 2
+    store.close()
+
+
+def test_failed_log_write_undoes_the_batch(tmp_path, monkeypatch):
+    store = MemoryStore(tmp_path).open()
+    _insert(store, "a")
+
+    def failing_sync(file):
+        raise OSError("fsync failed")
+
+    monkeypatch.setattr(store, "_sync", failing_sync)
+    with pytest.raises(OSError):
+        with store.batch():
+            store.update(1, {"title": "a2"}, NOW)
+            store.insert({"title": "b"}, NOW)
+    # Readers no longer see writes that never reached the log
+    assert _titles(store) == {1: "a"}
+    assert store.next_id == 2
+    assert store.counts == {(1, 0): 1}
+    assert [store.changes[seq] for seq in store.change_seqs if seq in store.changes] == [(1, "upsert")]
+    with pytest.raises(RuntimeError, match="unusable"):
+        _insert(store, "c")
+    monkeypatch.undo()
+    store.close()
+
+
+def test_data_dir_is_locked(tmp_path):
+    store = MemoryStore(tmp_path).open()
+    with pytest.raises(RuntimeError, match="in use"):
+        MemoryStore(tmp_path).open()
+    store.close()
+
+
+def test_sqlite_engine_does_not_import_the_memory_store():
+    # The memory store needs fcntl, which is missing on Windows
+    code = "import sys, dao.task_dao; print('persistence.memory_store' in sys.modules)"
+    env = {**os.environ, "TASKMASTER_STORAGE_ENGINE": "sqlite"}
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent.parent, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.strip() == "False"
@@ -0,0 +1,103 @@
+"""Metrics instrumentation and the benchmark runner's statistics."""
+
+import asyncio
+
+from benchmarks.run import compare, percentile
+from monitoring import metrics
+from monitoring.metrics import Counter, Histogram, MetricsMiddleware, render_metrics
+from service.task_service import get_cache_stats_service, get_pool_stats_service
+
+
+def _types(text):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE"))
+
+
+def test_stats_are_exported_as_counters_or_gauges():
+    types = _types(render_metrics(get_pool_stats_service().dict(), get_cache_stats_service().dict()))
+    for name in (
+        "taskmaster_cache_hits_total", "taskmaster_cache_invalidations_total",
+        "taskmaster_db_pool_reader_wait_seconds_total", "taskmaster_db_pool_writer_transactions_total",
+        "taskmaster_db_pool_write_jobs_total",
+    ):
+        assert types[name] == "counter"
+    for name in (
+        "taskmaster_cache_entries", "taskmaster_cache_ttl_seconds", "taskmaster_cache_version",
+        "taskmaster_db_pool_readers_in_use", "taskmaster_db_pool_writer_open", "taskmaster_db_pool_largest_write_batch",
+    ):
+        assert types[name] == "gauge"
+    assert not any(name.endswith("_total") for name, kind in types.items() if kind == "gauge")
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(("/a",), value)
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("rows_total", "Rows.", ("function",))
+    counter.inc(("a\\b \"c\"\n",), 2)
+    assert counter.render()[-1] == r'rows_total{function="a\\b \"c\"\n"} 2'
+
+
+def test_timed_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    fn = lambda: 1  # noqa: E731
+    assert metrics.timed("dao")(fn) is fn
+
+
+def test_timed_records_duration_and_rows(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    metrics.reset_metrics()
+
+    @metrics.timed("dao")
+    def list_things():
+        return [1, 2, 3]
+
+    list_things()
+    list_things()
+    assert metrics.layer_duration._series[("dao", "list_things")][2] == 2
+    assert metrics.dao_rows._series[("list_things",)] == 6
+    metrics.reset_metrics()
+
+
+def test_middleware_labels_requests_by_route_template():
+    metrics.reset_metrics()
+
+    class Route:
+        path = "/tasks/{task_id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    asyncio.run(MetricsMiddleware(app)({"type": "http", "method": "GET", "path": "/tasks/7"}, None, send))
+    assert list(metrics.http_request_duration._series) == [("GET", "/tasks/{task_id}", "404")]
+    metrics.reset_metrics()
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions_beyond_the_tolerance(capsys):
+    baseline = {"a": {"p95_ms": 10.0, "throughput_rps": 100.0}, "b": {"p95_ms": 10.0, "throughput_rps": 100.0}}
+    results = {"a": {"p95_ms": 11.0, "throughput_rps": 95.0}, "b": {"p95_ms": 13.0, "throughput_rps": 100.0}}
+    assert compare(results, baseline, 0.2) == ["b"]
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,155 @@
+"""Versioned schema migrations and the typed due_date column."""
+
+import sqlite3
+
+import pytest
+
+from dao import task_dao
+from persistence import database
+from persistence.database import close_pool, init_db, migration_status, read_connection, write_transaction
+from tests.conftest import create_tasks, sqlite_only
+
+LEGACY_TASKS = [
+    ("ISO", "2025-01-02", 1, 0),
+    ("slashes", "2025/01/03", 2, 0),
+    ("US", "01/04/2025", 2, 1),
+    ("words", "Jan 5, 2025", 3, 0),
+    ("date-time", "2025-01-06T10:00:00Z", 1, 0),
+    ("blank", "  ", 1, 0),
+    ("none", None, None, 0),
+    ("unparseable", "someday", 3, 0),
+]
+
+
+@pytest.fixture
+def legacy_database(engine, tmp_path, monkeypatch):
+    """A database as the app created it before migrations existed."""
+    close_pool()
+    path = tmp_path / "legacy.db"
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+    CREATE TABLE tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT,
+        due_date TEXT,
+        priority INTEGER DEFAULT 1,
+        is_completed BOOLEAN DEFAULT 0
+    )
+    ''')
+    conn.executemany(
+        "INSERT INTO tasks (title, description, due_date, priority, is_completed) VALUES (?, 'legacy task', ?, ?, ?)",
+        LEGACY_TASKS,
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _due_dates():
+    with read_connection() as conn:
+        return {
+            row["title"]: (row["due_date"], row["legacy_due_date"])
+            for row in conn.execute("SELECT title, due_date, legacy_due_date FROM tasks")
+        }
+
+
+@sqlite_only
+def test_legacy_database_is_migrated(legacy_database, monkeypatch):
+    monkeypatch.setattr(database, "MIGRATION_BATCH_SIZE", 3)
+    progress = []
+    init_db(progress=lambda migration, cursor: progress.append((migration.version, cursor)))
+
+    assert progress == [(1, 3), (1, 6), (1, 8), (2, 3), (2, 6), (2, 8), (3, 3), (3, 6), (3, 8)]
+    status = migration_status()
+    assert status["version"] == status["latest"] == database.LATEST_VERSION
+    assert [migration["backfill_cursor"] for migration in status["applied"]] == [None] * len(database.MIGRATIONS)
+    assert status["legacy_due_dates"] == 1
+    assert _due_dates() == {
+        "ISO": ("2025-01-02", None),
+        "slashes": ("2025-01-03", None),
+        "US": ("2025-01-04", None),
+        "words": ("2025-01-05", None),
+        "date-time": ("2025-01-06", None),
+        "blank": (None, None),
+        "none": (None, None),
+        "unparseable": (None, "someday"),
+    }
+    # Structures derived from tasks were backfilled for the existing rows
+    assert task_dao.verify_stats_db() == []
+    assert len(task_dao.search_tasks_db('"legacy"')) == len(LEGACY_TASKS)
+    assert len(task_dao.get_changes_db(0, 100)["changes"]) == len(LEGACY_TASKS)
+    with read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks WHERE created_at IS NULL OR updated_at IS NULL").fetchone()[0] == 0
+        assert not database._table_exists(conn, "baseline_backfills")
+
+
+@sqlite_only
+def test_interrupted_backfill_resumes(legacy_database, monkeypatch):
+    monkeypatch.setattr(database, "MIGRATION_BATCH_SIZE", 3)
+
+    def crash(migration, cursor):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        init_db(progress=crash)
+    assert migration_status()["version"] == 0
+    with read_connection() as conn:
+        assert conn.execute("SELECT backfill_cursor FROM schema_migrations WHERE version = 1").fetchone()[0] == 3
+
+    progress = []
+    init_db(progress=lambda migration, cursor: progress.append((migration.version, cursor)))
+    assert progress == [(1, 6), (1, 8), (2, 3), (2, 6), (2, 8), (3, 3), (3, 6), (3, 8)]
+    assert migration_status()["version"] == database.LATEST_VERSION
+    assert _due_dates()["words"] == ("2025-01-05", None)
+    # Each task was backfilled exactly once across the interruption
+    assert task_dao.verify_stats_db() == []
+    assert len(task_dao.search_tasks_db('"legacy"')) == len(LEGACY_TASKS)
+
+
+@sqlite_only
+def test_migrated_database_is_left_alone(engine):
+    with write_transaction() as conn:
+        conn.execute("INSERT INTO tasks (title) VALUES ('a')")
+    applied = migration_status()["applied"]
+    init_db()
+    assert migration_status()["applied"] == applied
+
+
+@sqlite_only
+def test_database_rejects_non_iso_due_dates(engine):
+    for value in ("01/04/2025", "2025-1-4", "", "2025-02-30", "2025-02-29"):
+        with pytest.raises(sqlite3.IntegrityError, match="ISO-8601"):
+            with write_transaction() as conn:
+                conn.execute("INSERT INTO tasks (title, due_date) VALUES ('a', ?)", (value,))
+    with write_transaction() as conn:
+        conn.execute("INSERT INTO tasks (title, due_date) VALUES ('a', '2024-02-29')")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("UPDATE tasks SET due_date = '2025/02/28'")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("UPDATE tasks SET due_date = '2025-02-29'")
+
+
+@sqlite_only
+def test_impossible_due_dates_from_version_2_are_moved(engine):
+    # Rewind to version 2, whose triggers accepted impossible days
+    with write_transaction() as conn:
+        conn.execute("DROP TRIGGER tasks_due_date_check_insert")
+        conn.execute("INSERT INTO tasks (title, due_date) VALUES ('impossible', '2025-02-30'), ('fine', '2025-02-28')")
+        conn.execute("DELETE FROM schema_migrations WHERE version = 3")
+        conn.execute("PRAGMA user_version = 2")
+    init_db()
+    assert migration_status()["version"] == database.LATEST_VERSION
+    assert _due_dates() == {"impossible": (None, "2025-02-30"), "fine": ("2025-02-28", None)}
+    with pytest.raises(sqlite3.IntegrityError, match="ISO-8601"):
+        with write_transaction() as conn:
+            conn.execute("INSERT INTO tasks (title, due_date) VALUES ('a', '2025-02-30')")
+
+
+def test_due_dates_are_typed_in_the_api(client):
+    assert client.post("/tasks/", json={"title": "x", "due_date": "2025-02-30"}).status_code == 422
+    assert client.post("/tasks/", json={"title": "x", "due_date": "tomorrow"}).status_code == 422
+    task, = create_tasks(client, {"title": "x", "due_date": "2025-02-28"})
+    assert client.put(f"/tasks/{task['id']}", json={"due_date": "2025-13-01"}).status_code == 422
+    assert client.get("/tasks/", params={"due_from": "not a date"}).status_code == 422
@@ -0,0 +1,131 @@
+"""Keyset pagination, filters and sorting of GET /tasks/."""
+
+from dao import task_dao
+from persistence.database import read_connection
+from service import task_service
+from tests.conftest import create_tasks, make_cursor, sqlite_only
+
+
+def _pages(client, **params):
+    """Follow X-Next-Cursor to the end and return every page's ids."""
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/tasks/", params=query)
+        assert response.status_code == 200, response.text
+        pages.append([task["id"] for task in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_keyset_pages(client):
+    client.post("/tasks/bulk", json=[
+        {"title": f"t{i}", "priority": (i * 7) % 4 or None, "due_date": f"2025-01-{i % 5 + 1:02d}" if i % 3 else None}
+        for i in range(23)
+    ])
+    everything = client.get("/tasks/").json()
+    for sort in ("id", "-id", "priority", "-priority", "due_date", "-due_date"):
+        column = sort.lstrip("-")
+        expected = sorted(
+            everything,
+            key=lambda task: (task[column] is not None, task[column] or 0, task["id"]),
+            reverse=sort.startswith("-"),
+        )
+        pages = _pages(client, limit=5, sort=sort)
+        assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+        assert sum(pages, []) == [task["id"] for task in expected], sort
+
+
+def test_filtered_pages(client):
+    client.post("/tasks/bulk", json=[
+        {"title": f"t{i}", "priority": i % 3 + 1, "due_date": f"2025-01-{i % 9 + 1:02d}"} for i in range(40)
+    ])
+    expected = [
+        task["id"] for task in client.get("/tasks/").json()
+        if task["priority"] == 2 and "2025-01-03" <= task["due_date"] <= "2025-01-07"
+    ]
+    pages = _pages(client, limit=3, priority=2, due_from="2025-01-03", due_to="2025-01-07", sort="due_date")
+    assert sorted(sum(pages, [])) == expected
+
+
+def test_page_cursor_rejects_other_sort(client):
+    create_tasks(client, {"title": "a"}, {"title": "b"})
+    cursor = client.get("/tasks/", params={"limit": 1, "sort": "priority"}).headers["X-Next-Cursor"]
+    assert client.get("/tasks/", params={"limit": 1, "sort": "id", "cursor": cursor}).status_code == 400
+    assert client.get("/tasks/", params={"limit": 1, "cursor": "not a cursor"}).status_code == 400
+    assert client.get("/tasks/", params={"limit": 1, "cursor": make_cursor("id", None)}).status_code == 400
+
+
+def test_page_cursor_rejects_non_scalar_values(client):
+    create_tasks(client, {"title": "a", "priority": 1}, {"title": "b", "priority": 2})
+    for value in ([1], {"a": 1}):
+        response = client.get("/tasks/", params={"sort": "priority", "cursor": make_cursor("priority", value, 2)})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_filtered_sorted_pages_in_both_directions(client):
+    client.post("/tasks/bulk", json=[
+        {"title": f"t{i}", "priority": i % 4 or None, "due_date": f"2025-02-{i % 12 + 1:02d}"} for i in range(60)
+    ])
+    client.patch("/tasks/bulk", json=[{"id": task_id, "is_completed": True} for task_id in range(1, 61, 3)])
+    everything = client.get("/tasks/").json()
+    filters = {"is_completed": False, "due_from": "2025-02-03", "due_to": "2025-02-09"}
+    matching = [
+        task for task in everything
+        if not task["is_completed"] and "2025-02-03" <= task["due_date"] <= "2025-02-09"
+    ]
+    for sort in ("priority", "-priority", "due_date", "-due_date", "-id"):
+        column = sort.lstrip("-")
+        expected = sorted(
+            matching,
+            key=lambda task: (task[column] is not None, task[column] or 0, task["id"]),
+            reverse=sort.startswith("-"),
+        )
+        assert sum(_pages(client, limit=4, sort=sort, **filters), []) == [task["id"] for task in expected], sort
+
+
+def test_priority_sorted_pages_with_a_priority_filter(client):
+    client.post("/tasks/bulk", json=[{"title": f"t{i}", "priority": i % 3 + 1} for i in range(20)])
+    expected = [task["id"] for task in client.get("/tasks/").json() if task["priority"] == 2]
+    assert sum(_pages(client, limit=3, priority=2, sort="priority"), []) == expected
+    assert sum(_pages(client, limit=3, priority=2, sort="-priority"), []) == expected[::-1]
+
+
+@sqlite_only
+def test_priority_sorted_pages_need_no_sort_step(client):
+    client.post("/tasks/bulk", json=[
+        {"title": f"t{i}", "priority": i % 3 + 1, "due_date": f"2025-03-{i % 28 + 1:02d}"} for i in range(50)
+    ])
+    due = {"due_from": "2025-03-05", "due_to": "2025-03-20"}
+    with read_connection() as conn:
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            for filters in ({}, {"is_completed": False}, {"priority": 2}, {"is_completed": False, "priority": 2}):
+                for descending in (False, True):
+                    for after in (None, (2, 10)):
+                        task_dao.get_tasks_page_db(5, after, sort="priority", descending=descending, **due, **filters)
+        finally:
+            conn.set_trace_callback(None)
+        assert statements
+        for statement in statements:
+            plan = " | ".join(row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}"))
+            assert "TEMP B-TREE" not in plan, (statement, plan)
+
+
+def test_cursor_without_limit_uses_the_default_page_size(client, monkeypatch):
+    monkeypatch.setattr(task_service, "DEFAULT_PAGE_SIZE", 2)
+    create_tasks(client, *({"title": f"t{i}"} for i in range(5)))
+    assert len(client.get("/tasks/").json()) == 5
+    cursor = client.get("/tasks/", params={"limit": 1}).headers["X-Next-Cursor"]
+    response = client.get("/tasks/", params={"cursor": cursor})
+    assert [task["id"] for task in response.json()] == [2, 3]
+    assert response.headers["X-Next-Cursor"]
+
+
+def test_page_parameters_are_validated(client):
+    assert client.get("/tasks/", params={"limit": 0}).status_code == 422
+    assert client.get("/tasks/", params={"limit": 1001}).status_code == 422
+    assert client.get("/tasks/", params={"sort": "title"}).status_code == 422
@@ -0,0 +1,117 @@
+"""Full-text search (GET /tasks/search)."""
+
+from dao import task_dao
+from service.task_cache import task_cache
+from tests.conftest import create_tasks, make_cursor
+
+
+def _search(client, **params):
+    response = client.get("/tasks/search", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_search_ranks_title_above_description(client):
+    by_title, by_description, _ = create_tasks(
+        client,
+        {"title": "Buy milk", "description": "at the corner shop"},
+        {"title": "Groceries", "description": "eggs, bread and milk"},
+        {"title": "Call mum"},
+    )
+    hits = _search(client, q="milk").json()
+    assert [hit["id"] for hit in hits] == [by_title["id"], by_description["id"]]
+    # bm25: lower is a better match
+    assert hits[0]["rank"] < hits[1]["rank"]
+    assert hits[0]["title_highlight"] == "Buy <mark>milk</mark>"
+    assert hits[1]["snippet"] == "eggs, bread and <mark>milk</mark>"
+
+
+def test_search_markup_is_html_escaped(client):
+    create_tasks(
+        client,
+        {"title": "<script>alert(1)</script> milk & \"honey\"", "description": "<b>milk</b> <img src=x onerror=alert(1)>"},
+        {"title": "milk \x02 bread \x03 <i>", "description": "<milk>"},
+    )
+    hits = {hit["title"][:4]: hit for hit in _search(client, q="milk").json()}
+    first, second = hits["<scr"], hits["milk"]
+    assert first["title_highlight"] == "&lt;script&gt;alert(1)&lt;/script&gt; <mark>milk</mark> &amp; &quot;honey&quot;"
+    assert first["snippet"] == "&lt;b&gt;<mark>milk</mark>&lt;/b&gt; &lt;img src=x onerror=alert(1)&gt;"
+    # Control characters in the text cannot be mistaken for match markers
+    assert second["title_highlight"] == "<mark>milk</mark> \x02 bread \x03 &lt;i&gt;"
+    assert second["snippet"] == "&lt;<mark>milk</mark>&gt;"
+
+
+def test_search_prefix_and_phrase(client):
+    create_tasks(client, {"title": "Write report"}, {"title": "Rewrite the report"}, {"title": "report written"})
+    assert len(_search(client, q="writ").json()) == 2
+    assert _search(client, q="writ", prefix=False).json() == []
+    assert [hit["title"] for hit in _search(client, q='"write report"').json()] == ["Write report"]
+
+
+def test_search_pages(client):
+    create_tasks(client, *({"title": f"milk {i}", "description": "milk " * (i % 4)} for i in range(7)))
+    everything = [hit["id"] for hit in _search(client, q="milk").json()]
+    ids, cursor = [], None
+    while True:
+        response = _search(client, q="milk", limit=3, **({"cursor": cursor} if cursor else {}))
+        ids += [hit["id"] for hit in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert ids == everything
+
+
+def test_search_pages_survive_unrelated_writes(client):
+    create_tasks(client, *({"title": f"Buy milk {i}", "description": "milk " * i} for i in range(3)))
+    expected = [hit["id"] for hit in _search(client, q="milk").json()]
+    first = _search(client, q="milk", limit=1)
+    create_tasks(client, *({"title": f"Unrelated {i}", "description": "bread and eggs"} for i in range(30)))
+    ids, cursor = [hit["id"] for hit in first.json()], first.headers["X-Next-Cursor"]
+    while cursor:
+        response = _search(client, q="milk", limit=1, cursor=cursor)
+        ids += [hit["id"] for hit in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert ids == expected
+
+
+def test_search_follows_writes(client):
+    task, = create_tasks(client, {"title": "Buy milk"})
+    client.put(f"/tasks/{task['id']}", json={"title": "Buy bread"})
+    assert _search(client, q="milk").json() == []
+    assert [hit["id"] for hit in _search(client, q="bread").json()] == [task["id"]]
+    client.delete(f"/tasks/{task['id']}")
+    assert _search(client, q="bread").json() == []
+
+
+def test_search_rejects_bad_input(client):
+    assert client.get("/tasks/search", params={"q": ""}).status_code == 422
+    create_tasks(client, {"title": "milk"}, {"title": "more milk"})
+    page_cursor = client.get("/tasks/", params={"limit": 1}).headers.get("X-Next-Cursor")
+    for cursor in ("garbage", page_cursor, make_cursor("rank", "a", 1), make_cursor("search", -1), make_cursor("search", "1")):
+        assert client.get("/tasks/search", params={"q": "milk", "cursor": cursor}).status_code == 400, cursor
+
+
+def test_query_syntax_in_user_input_is_matched_literally(client):
+    create_tasks(client, {"title": "milk OR bread"}, {"title": "bread"}, {"title": 'say "cheese"'})
+    assert [hit["title"] for hit in _search(client, q="milk OR").json()] == ["milk OR bread"]
+    assert [hit["title"] for hit in _search(client, q='"cheese').json()] == ['say "cheese"']
+    for q in ("NEAR(milk bread)", "title:milk", "-milk", "*", "()", '"'):
+        assert client.get("/tasks/search", params={"q": q}).status_code == 200, q
+
+
+def test_rebuilt_index_answers_like_the_maintained_one(client):
+    create_tasks(client, *({"title": f"report {i}", "description": "quarterly figures"} for i in range(5)))
+    before = _search(client, q="quarter").json()
+    task_dao.rebuild_search_index_db()
+    task_cache.clear()
+    assert _search(client, q="quarter").json() == before
+
+
+def test_ligatures_and_fullwidth_forms_are_not_folded(client):
+    # unicode61 folds case and diacritics only; both engines must agree
+    create_tasks(client, {"title": "ﬁle report"}, {"title": "file report"}, {"title": "ＦＩＬＥ report"}, {"title": "Fïle"})
+    titles = lambda q: sorted(hit["title"] for hit in _search(client, q=q).json())
+    assert titles("file") == ["Fïle", "file report"]
+    assert titles("ﬁle") == ["ﬁle report"]
+    assert titles("ｆｉｌｅ") == ["ＦＩＬＥ report"]
+    assert [hit["title_highlight"] for hit in _search(client, q="ﬁ").json()] == ["<mark>ﬁle</mark> report"]
@@ -0,0 +1,82 @@
+"""Incrementally maintained task statistics (GET /stats/)."""
+
+import random
+from datetime import date, timedelta
+
+from dao import task_dao
+from persistence.database import write_transaction
+from persistence.memory_store import get_store
+from tests.conftest import create_tasks
+
+
+def test_stats(client):
+    today = date.today()
+    yesterday, tomorrow = today - timedelta(days=1), today + timedelta(days=1)
+    tasks = create_tasks(
+        client,
+        {"title": "a", "priority": 1, "due_date": yesterday.isoformat()},
+        {"title": "b", "priority": 1, "due_date": today.isoformat()},
+        {"title": "c", "priority": 2, "due_date": tomorrow.isoformat()},
+        {"title": "d", "priority": 3, "due_date": yesterday.isoformat()},
+    )
+    client.put(f"/tasks/{tasks[3]['id']}", json={"is_completed": True})
+
+    stats = client.get("/stats/").json()
+    assert (stats["total"], stats["completed"], stats["pending"]) == (4, 1, 3)
+    assert stats["overdue"] == 1
+    assert stats["due_today"] == 1
+    assert {(p["priority"], p["total"], p["completed"]) for p in stats["by_priority"]} == {(1, 2, 0), (2, 1, 0), (3, 1, 1)}
+
+    client.delete(f"/tasks/{tasks[0]['id']}")
+    stats = client.get("/stats/").json()
+    assert (stats["total"], stats["overdue"]) == (3, 0)
+
+
+def test_counters_follow_every_kind_of_write(client):
+    rng = random.Random(4)
+    ids = []
+    for i in range(120):
+        action = rng.random()
+        if action < 0.5 or not ids:
+            ids += [task["id"] for task in create_tasks(client, {
+                "title": f"t{i}", "priority": rng.choice((1, 2, 3, None)),
+                "due_date": rng.choice((None, f"2025-01-{rng.randint(1, 9):02d}")),
+            })]
+        elif action < 0.8:
+            client.put(f"/tasks/{rng.choice(ids)}", json={
+                "is_completed": rng.random() < 0.5, "priority": rng.choice((1, 2, 3)),
+                "due_date": rng.choice((None, f"2025-01-{rng.randint(1, 9):02d}")),
+            })
+        else:
+            client.delete(f"/tasks/{ids.pop(rng.randrange(len(ids)))}")
+    assert task_dao.verify_stats_db() == []
+
+    tasks = client.get("/tasks/").json()
+    stats = client.get("/stats/").json()
+    assert stats["total"] == len(tasks)
+    assert stats["completed"] == sum(task["is_completed"] for task in tasks)
+    by_priority = {entry["priority"]: entry["total"] for entry in stats["by_priority"]}
+    for priority in {task["priority"] for task in tasks}:
+        assert by_priority[priority] == sum(task["priority"] == priority for task in tasks)
+    assert stats["overdue"] == sum(
+        1 for task in tasks if not task["is_completed"] and task["due_date"] and task["due_date"] < date.today().isoformat()
+    )
+
+
+def test_drift_is_reported_and_rebuilt(client, engine):
+    create_tasks(client, {"title": "a", "priority": 2, "due_date": "2025-01-01"})
+    if engine == "sqlite":
+        with write_transaction() as conn:
+            conn.execute("UPDATE task_counts SET count = count + 5")
+            conn.execute("DELETE FROM task_due_counts")
+    else:
+        store = get_store()
+        with store.lock:
+            store.counts[(2, 0)] += 5
+            store.due_pending.clear()
+    drift = task_dao.verify_stats_db()
+    assert {entry["counter"] for entry in drift} == {"task_counts", "task_due_counts"}
+    assert [(entry["expected"], entry["actual"]) for entry in drift if entry["counter"] == "task_counts"] == [(1, 6)]
+
+    task_dao.rebuild_stats_db()
+    assert task_dao.verify_stats_db() == []
@@ -0,0 +1,21 @@
+from tests.conftest import create_tasks
+
+
+def test_crud(client):
+    task, = create_tasks(client, {"title": "Buy milk", "description": "2 litres", "due_date": "2025-03-01", "priority": 2})
+    assert task["title"] == "Buy milk"
+    assert task["due_date"] == "2025-03-01"
+    assert task["is_completed"] is False
+    assert task["created_at"] and task["updated_at"]
+
+    assert client.get(f"/tasks/{task['id']}").json() == task
+
+    updated = client.put(f"/tasks/{task['id']}", json={"is_completed": True, "priority": 3}).json()
+    assert updated["is_completed"] is True
+    assert updated["priority"] == 3
+    assert updated["title"] == "Buy milk"
+
+    assert client.delete(f"/tasks/{task['id']}").status_code == 200
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+    assert client.put(f"/tasks/{task['id']}", json={"title": "x"}).status_code == 404
+    assert client.delete(f"/tasks/{task['id']}").status_code == 404
@@ -0,0 +1,86 @@
+"""Group commit of the writer thread (persistence.executor)."""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from dao import task_dao
+from persistence.executor import WriteQueue, run_read, run_write
+from persistence.memory_store import get_store
+
+
+@pytest.fixture
+def write_queue(engine):
+    # Waits for more jobs so everything submitted together is one batch
+    write_queue = WriteQueue(write_batch_max=64, write_batch_wait_ms=200)
+    yield write_queue
+    write_queue.close()
+
+
+def test_queued_writes_share_one_batch(write_queue):
+    futures = [write_queue.submit(task_dao.create_task_db, {"title": f"t{i}"}) for i in range(10)]
+    assert sorted(future.result(timeout=5)["id"] for future in futures) == list(range(1, 11))
+    stats = write_queue.stats()
+    assert (stats["write_batches"], stats["write_jobs"], stats["largest_write_batch"]) == (1, 10, 10)
+
+
+def test_failing_job_rolls_back_only_itself(write_queue):
+    def create_then_fail():
+        task_dao.create_task_db({"title": "rolled back"})
+        raise ValueError("job failed")
+
+    first = write_queue.submit(task_dao.create_task_db, {"title": "a"})
+    failing = write_queue.submit(create_then_fail)
+    invalid = write_queue.submit(task_dao.create_task_db, {"title": None})
+    last = write_queue.submit(task_dao.create_task_db, {"title": "b"})
+    assert first.result(timeout=5) is not None
+    assert last.result(timeout=5) is not None
+    with pytest.raises(ValueError, match="job failed"):
+        failing.result(timeout=5)
+    with pytest.raises((ValueError, sqlite3.IntegrityError)):
+        invalid.result(timeout=5)
+    assert write_queue.stats()["write_batches"] == 1
+    assert [task["title"] for task in task_dao.get_all_tasks_db()] == ["a", "b"]
+
+
+@pytest.mark.parametrize("engine", ["memory"], indirect=True)
+def test_failed_commit_fails_every_job(write_queue, monkeypatch):
+    def failing_sync(file):
+        raise OSError("fsync failed")
+
+    monkeypatch.setattr(get_store(), "_sync", failing_sync)
+    futures = [write_queue.submit(task_dao.create_task_db, {"title": f"t{i}"}) for i in range(3)]
+    for future in futures:
+        with pytest.raises(OSError):
+            future.result(timeout=5)
+    assert task_dao.get_all_tasks_db() == []
+
+
+def test_concurrent_async_writes_and_reads(engine):
+    async def create(i):
+        task = await run_write(task_dao.create_task_db, {"title": f"t{i}"})
+        return await run_read(task_dao.get_task_db, task["id"])
+
+    async def main():
+        return await asyncio.gather(*(create(i) for i in range(50)))
+
+    tasks = asyncio.run(main())
+    assert sorted(task["title"] for task in tasks) == sorted(f"t{i}" for i in range(50))
+    assert len({task["id"] for task in tasks}) == 50
+
+
+def test_create_returns_row_deleted_before_response(client, monkeypatch):
+    # A delete committed right after the insert must not turn the create into a 500
+    def delete_after_create(task_data):
+        task = create_task_db(task_data)
+        task_dao.delete_task_db(task["id"])
+        return task
+
+    create_task_db = task_dao.create_task_db
+    monkeypatch.setattr(task_dao, "create_task_db", delete_after_create)
+    response = client.post("/tasks/", json={"title": "short-lived", "priority": 2})
+    assert response.status_code == 201
+    assert response.json()["title"] == "short-lived"
+    assert response.json()["priority"] == 2
+    assert client.get(f"/tasks/{response.json()['id']}").status_code == 404